@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
 from typing import Dict, List, Optional, Sequence, Tuple
 
 from src.encoding_schemes.peptide_mapping import BITS_TO_AA
 from src.pipeline.config import PipelineConfig
-from src.utils.bits_bytes_utils import bitstring_to_bytes, bytes_to_bitstring
+from src.utils.profiling import reset_inherited_profilers
 
 
 DEFAULT_ALPHABET = "AVLSTFYE"
@@ -42,82 +47,290 @@ class YinYangEncoded:
     index_aa_length: int
     original_size_bytes: int
     scheme_id: str = "yy_pairs_v1"
+    # Hard-rule violations (1000.0 penalty terms) left in the payload.
+    violations: int = 0
 
 
-def _suffix_run_len(current: str, predicate, candidate: str) -> int:
-    if not predicate(candidate):
-        return 0
-    run = 1
-    for ch in reversed(current):
-        if predicate(ch):
-            run += 1
-        else:
-            break
-    return run
+# Running constraint state of the payload being built:
+# (last residue, its run length, hydrophobic suffix run, E suffix run,
+#  aromatic count, E count). Runs and counts are clamped where the rules stop
+# distinguishing them (a count over its cap penalises both candidates alike),
+# so the state space is small and every choice can be cached per (state, symbol).
+_VariantState = Tuple[str, int, int, int, int, int]
+_EMPTY_STATE: _VariantState = ("", 0, 0, 0, 0, 0)
 
+# Runs longer than this are penalised (a candidate extends a run of 2 to 3).
+_MAX_RUN = 2
 
-def _suffix_same_len(current: str, candidate: str) -> int:
-    run = 1
-    for ch in reversed(current):
-        if ch == candidate:
-            run += 1
-        else:
-            break
-    return run
 
-
-def _choose_variant(
-    candidates: Tuple[str, str],
-    current_payload: str,
-    payload_len: int,
-) -> str:
+def _rule_caps(payload_len: int) -> Tuple[int, int]:
     # Rule parameters tuned for peptide_length ~= 18, but work for other lengths.
     aro_cap = max(1, min(3, payload_len // 6))  # ~2-3 aromatics per 18-mer
     e_cap = max(2, min(6, payload_len // 3))    # allow some E, avoid all-E
+    return aro_cap, e_cap
+
+
+def _variant_penalty(aa: str, state: _VariantState, aro_cap: int, e_cap: int) -> float:
+    last, same_run, hydro_run, e_run, aro_count, e_count = state
+    pen = 0.0
+
+    if aa == last and same_run >= _MAX_RUN:
+        pen += 1000.0
+    if aa in _STRONG_HYDROPHOBIC and hydro_run >= _MAX_RUN:
+        pen += 1000.0
+    if aa == "E" and e_run >= _MAX_RUN:
+        pen += 1000.0
+    if aro_count + (aa in _AROMATIC) > aro_cap:
+        pen += 1000.0
+    if e_count + (aa == "E") > e_cap:
+        pen += 1000.0
+
+    # Soft preferences: bias toward polar/acidic variants to reduce hydrophobicity.
+    if aa in _STRONG_HYDROPHOBIC:
+        pen += 1.0
+    if aa in _AROMATIC:
+        pen += 0.5
+    if aa == "E":
+        pen += 0.2
+    if aa in {"S", "T"}:
+        pen -= 0.2
+
+    # Avoid immediate repeats when possible.
+    if aa == last:
+        pen += 0.8
+
+    return pen
+
+
+def _advance_state(state: _VariantState, aa: str, aro_cap: int, e_cap: int) -> _VariantState:
+    last, same_run, hydro_run, e_run, aro_count, e_count = state
+    return (
+        aa,
+        min(_MAX_RUN, same_run + 1) if aa == last else 1,
+        min(_MAX_RUN, hydro_run + 1) if aa in _STRONG_HYDROPHOBIC else 0,
+        min(_MAX_RUN, e_run + 1) if aa == "E" else 0,
+        min(aro_cap + 1, aro_count + 1) if aa in _AROMATIC else aro_count,
+        min(e_cap + 1, e_count + 1) if aa == "E" else e_count,
+    )
 
-    def penalty(aa: str) -> float:
-        pen = 0.0
 
-        same_run = _suffix_same_len(current_payload, aa)
-        if same_run > 2:
-            pen += 1000.0
+def _hard_violations(penalty: float) -> int:
+    # Soft terms stay within (-1, 3), so the 1000.0 terms are recoverable.
+    return int(round(penalty / 1000.0))
 
-        hydro_run = _suffix_run_len(current_payload, lambda x: x in _STRONG_HYDROPHOBIC, aa)
-        if hydro_run > 2:
-            pen += 1000.0
 
-        e_run = _suffix_run_len(current_payload, lambda x: x == "E", aa)
-        if e_run > 2:
-            pen += 1000.0
+def _choose_variant(
+    candidates: Tuple[str, str],
+    state: _VariantState,
+    aro_cap: int,
+    e_cap: int,
+) -> str:
+    a0, a1 = candidates
+    p0 = _variant_penalty(a0, state, aro_cap, e_cap)
+    p1 = _variant_penalty(a1, state, aro_cap, e_cap)
+    return a0 if p0 <= p1 else a1
 
-        aro_count = sum(1 for ch in current_payload if ch in _AROMATIC) + (1 if aa in _AROMATIC else 0)
-        if aro_count > aro_cap:
-            pen += 1000.0
 
-        e_count = current_payload.count("E") + (1 if aa == "E" else 0)
-        if e_count > e_cap:
-            pen += 1000.0
+# 2-bit symbol value -> YY_PAIRS candidates.
+_SYMBOL_PAIRS: Tuple[Tuple[str, str], ...] = tuple(YY_PAIRS[f"{sym:02b}"] for sym in range(4))
 
-        # Soft preferences: bias toward polar/acidic variants to reduce hydrophobicity.
-        if aa in _STRONG_HYDROPHOBIC:
-            pen += 1.0
-        if aa in _AROMATIC:
-            pen += 0.5
-        if aa == "E":
-            pen += 0.2
-        if aa in {"S", "T"}:
-            pen -= 0.2
 
-        # Avoid immediate repeats when possible.
-        if current_payload and aa == current_payload[-1]:
-            pen += 0.8
+# Upper bound on memoised (state, byte) steps per payload length (~tens of MB).
+_BYTE_MEMO_LIMIT = 1 << 18
 
-        return pen
 
-    a0, a1 = candidates
-    p0 = penalty(a0)
-    p1 = penalty(a1)
-    return a0 if p0 <= p1 else a1
+class _YinYangTransducer:
+    """
+    The greedy variant rules compiled into a state machine for one payload
+    length. A state is (constraint state, position in peptide); the peptide
+    boundary resets it. States are numbered from the empty start state, and
+    `_steps[state * 4 + symbol]` holds (residue, next state, hard-rule
+    violations). Whole bytes (four symbols) are memoised on first use as
+    (residues, next state, violations).
+    """
+
+    def __init__(self, payload_len: int):
+        aro_cap, e_cap = _rule_caps(payload_len)
+        start = (_EMPTY_STATE, 0)
+        ids: Dict[Tuple[_VariantState, int], int] = {start: 0}
+        order = [start]
+        steps: List[Tuple[str, int, int]] = []
+        for state, pos in order:  # `order` grows while we walk it (BFS).
+            for pair in _SYMBOL_PAIRS:
+                aa = _choose_variant(pair, state, aro_cap, e_cap)
+                hard = _hard_violations(_variant_penalty(aa, state, aro_cap, e_cap))
+                nxt = (_advance_state(state, aa, aro_cap, e_cap), pos + 1)
+                if nxt[1] == payload_len:
+                    nxt = start
+                if nxt not in ids:
+                    ids[nxt] = len(order)
+                    order.append(nxt)
+                steps.append((aa, ids[nxt], hard))
+        self.payload_len = payload_len
+        self.state_count = len(order)
+        self._steps = steps
+        self._bytes: Dict[int, Tuple[str, int, int]] = {}
+
+    def _byte_step(self, state: int, byte: int) -> Tuple[str, int, int]:
+        steps = self._steps
+        residues = []
+        violations = 0
+        for shift in (6, 4, 2, 0):
+            aa, state, hard = steps[state * 4 + ((byte >> shift) & 3)]
+            residues.append(aa)
+            violations += hard
+        return "".join(residues), state, violations
+
+    def encode(self, data: bytes) -> Tuple[str, int]:
+        """Residue string for `data` (four residues per byte) and its violation count."""
+        memo = self._bytes
+        out: List[str] = []
+        state = 0
+        violations = 0
+        for byte in data:
+            key = (state << 8) | byte
+            step = memo.get(key)
+            if step is None:
+                step = self._byte_step(state, byte)
+                if len(memo) < _BYTE_MEMO_LIMIT:
+                    memo[key] = step
+            out.append(step[0])
+            state = step[1]
+            violations += step[2]
+        return "".join(out), violations
+
+
+@lru_cache(maxsize=8)
+def _transducer(payload_len: int) -> _YinYangTransducer:
+    return _YinYangTransducer(payload_len)
+
+
+# Upper bound on memoised optimal peptides per payload length.
+_PEPTIDE_MEMO_LIMIT = 1 << 16
+
+
+class _YinYangOptimizer:
+    """
+    Minimum-penalty variant choice per peptide: Viterbi over the binary
+    choice trellis, or a beam of the `beam_width` cheapest states. Every
+    peptide starts from the empty state, so the best payload is a function
+    of its symbols alone and is memoised. Constraint states get integer ids,
+    and each (state, symbol) edge pair is costed once and reused across
+    peptides: `_edges[state * 4 + symbol]` holds, per candidate residue,
+    (penalty, violations, next state, residue).
+    """
+
+    def __init__(self, payload_len: int, beam_width: int = 0):
+        self.payload_len = payload_len
+        self.beam_width = beam_width
+        self._caps = _rule_caps(payload_len)
+        self._ids: Dict[_VariantState, int] = {}
+        self._states: List[_VariantState] = []
+        self._edges: List[Optional[Tuple[Tuple[float, int, int, str], ...]]] = []
+        self._peptides: Dict[Tuple[int, ...], Tuple[str, int]] = {}
+        self._state_id(_EMPTY_STATE)
+
+    def _state_id(self, state: _VariantState) -> int:
+        sid = self._ids.get(state)
+        if sid is None:
+            sid = len(self._states)
+            self._ids[state] = sid
+            self._states.append(state)
+            self._edges.extend([None] * 4)
+        return sid
+
+    def _edge_pair(self, sid: int, symbol: int) -> Tuple[Tuple[float, int, int, str], ...]:
+        aro_cap, e_cap = self._caps
+        state = self._states[sid]
+        pair = []
+        for aa in _SYMBOL_PAIRS[symbol]:
+            penalty = _variant_penalty(aa, state, aro_cap, e_cap)
+            nxt = self._state_id(_advance_state(state, aa, aro_cap, e_cap))
+            pair.append((penalty, _hard_violations(penalty), nxt, aa))
+        edges = tuple(pair)
+        self._edges[sid * 4 + symbol] = edges
+        return edges
+
+    def _solve(self, symbols: Tuple[int, ...]) -> Tuple[str, int]:
+        edges = self._edges
+        # layer: state id -> (total penalty, violations, path as nested (residue, parent) pairs)
+        layer: Dict[int, Tuple[float, int, object]] = {0: (0.0, 0, None)}
+        for symbol in symbols:
+            nxt: Dict[int, Tuple[float, int, object]] = {}
+            for sid, (total, hard, path) in layer.items():
+                pair = edges[sid * 4 + symbol] or self._edge_pair(sid, symbol)
+                for penalty, violations, new_sid, aa in pair:
+                    cand = total + penalty
+                    best = nxt.get(new_sid)
+                    if best is None or cand < best[0]:
+                        nxt[new_sid] = (cand, hard + violations, (aa, path))
+            if self.beam_width and len(nxt) > self.beam_width:
+                nxt = dict(sorted(nxt.items(), key=lambda item: item[1][0])[: self.beam_width])
+            layer = nxt
+
+        _, hard, path = min(layer.values(), key=lambda entry: entry[0])
+        residues = []
+        while path is not None:
+            aa, path = path
+            residues.append(aa)
+        return "".join(reversed(residues)), hard
+
+    def encode(self, data: bytes) -> Tuple[str, int]:
+        """Residue string for `data` (four residues per byte) and its violation count."""
+        symbols = [(byte >> shift) & 3 for byte in data for shift in (6, 4, 2, 0)]
+        memo = self._peptides
+        out: List[str] = []
+        violations = 0
+        for i in range(0, len(symbols), self.payload_len):
+            chunk = tuple(symbols[i:i + self.payload_len])
+            solved = memo.get(chunk)
+            if solved is None:
+                solved = self._solve(chunk)
+                if len(memo) < _PEPTIDE_MEMO_LIMIT:
+                    memo[chunk] = solved
+            out.append(solved[0])
+            violations += solved[1]
+        return "".join(out), violations
+
+
+@lru_cache(maxsize=8)
+def _optimizer(payload_len: int, beam_width: int) -> _YinYangOptimizer:
+    return _YinYangOptimizer(payload_len, beam_width)
+
+
+YIN_YANG_MODES = ("greedy", "optimal")
+
+
+def _encode_payload(data: bytes, payload_len: int, mode: str, beam_width: int) -> Tuple[str, int]:
+    """Residues for `data` (which starts on a peptide boundary) and their violations."""
+    if mode == "optimal":
+        return _optimizer(payload_len, beam_width).encode(data)
+    return _transducer(payload_len).encode(data)
+
+
+def _encode_payload_chunked(
+    data: bytes,
+    payload_len: int,
+    mode: str,
+    beam_width: int,
+    workers: int,
+    chunk_bytes: int,
+) -> Tuple[str, int]:
+    """
+    Encode `data` in chunks on a process pool. The variant state resets at
+    every peptide, so chunks that end on both a byte and a peptide boundary
+    encode independently; results are joined in input order.
+    """
+    align = math.lcm(payload_len, 4) // 4  # bytes per byte-and-peptide-aligned block
+    chunk = max(align, chunk_bytes // align * align)
+    pieces = [data[i:i + chunk] for i in range(0, len(data), chunk)]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(pieces)), initializer=reset_inherited_profilers
+    ) as pool:
+        results = list(
+            pool.map(_encode_payload, pieces, repeat(payload_len), repeat(mode), repeat(beam_width))
+        )
+    return "".join(payload for payload, _ in results), sum(violations for _, violations in results)
 
 
 def _index_prefix(idx: int, index_aa_length: int) -> str:
@@ -132,36 +345,35 @@ def yin_yang_encode(data: bytes, cfg: PipelineConfig) -> YinYangEncoded:
     """
     Offline Yin–Yang-style encoder for peptides (no online scoring).
 
-    - Converts bytes -> bitstring.
-    - Encodes 2 bits per residue using YY_PAIRS, choosing variants via offline rules.
+    - Encodes 2 bits per residue using YY_PAIRS, choosing variants via offline rules:
+      greedily per residue (compiled once per payload length, see _YinYangTransducer)
+      or, with cfg.yin_yang_mode="optimal", minimising each peptide's total penalty.
+    - Inputs larger than cfg.yin_yang_chunk_bytes are split at peptide boundaries
+      and encoded on cfg.yin_yang_workers processes (same output as one pass).
     - Chunks residues into peptides (optionally prefixing an index using the 3-bit AA mapping).
     """
-    bits = bytes_to_bitstring(data)
     original_size = len(data)
-
-    # Pad to a multiple of 2 bits (since we store 2 bits per residue).
-    pad_bits = (2 - (len(bits) % 2)) % 2
-    if pad_bits:
-        bits += "0" * pad_bits
+    # Every byte is four whole 2-bit symbols, so no padding is needed.
+    pad_bits = 0
 
     payload_len = cfg.peptide_length - cfg.index_aa_length
     if payload_len <= 0:
         raise ValueError("peptide_length must be greater than index_aa_length.")
 
-    payload_peptides: List[str] = []
-    current_payload = ""
-
-    for i in range(0, len(bits), 2):
-        symbol = bits[i:i + 2]
-        candidates = YY_PAIRS[symbol]
-        aa = _choose_variant(candidates, current_payload, payload_len)
-        current_payload += aa
-        if len(current_payload) >= payload_len:
-            payload_peptides.append(current_payload[:payload_len])
-            current_payload = ""
-
-    if current_payload:
-        payload_peptides.append(current_payload)
+    mode = (cfg.yin_yang_mode or "greedy").lower()
+    if mode not in YIN_YANG_MODES:
+        raise ValueError(f"Unsupported Yin-Yang mode: {cfg.yin_yang_mode}")
+    beam_width = max(0, cfg.yin_yang_beam_width)
+    workers = cfg.yin_yang_workers if cfg.yin_yang_workers > 0 else (os.cpu_count() or 1)
+    if workers > 1 and len(data) > cfg.yin_yang_chunk_bytes:
+        payload, violations = _encode_payload_chunked(
+            data, payload_len, mode, beam_width, workers, cfg.yin_yang_chunk_bytes
+        )
+    else:
+        payload, violations = _encode_payload(data, payload_len, mode, beam_width)
+    payload_peptides: List[str] = [
+        payload[i:i + payload_len] for i in range(0, len(payload), payload_len)
+    ]
 
     if cfg.index_aa_length:
         index_bits_len = cfg.index_aa_length * 3
@@ -178,9 +390,41 @@ def yin_yang_encode(data: bytes, cfg: PipelineConfig) -> YinYangEncoded:
         peptide_length=cfg.peptide_length,
         index_aa_length=cfg.index_aa_length,
         original_size_bytes=original_size,
+        violations=violations,
     )
 
 
+# ASCII residue -> base-4 digit ("0".."3"); everything else -> "?" so
+# unknown residues survive translation and can be reported.
+_DIGIT_TABLE = bytes(
+    ord(str(int(YY_AA_TO_BITS[chr(c)], 2))) if chr(c) in YY_AA_TO_BITS else ord("?")
+    for c in range(256)
+)
+
+
+def _residues_to_bytes(residues: str, pad_bits: int) -> bytes:
+    """
+    Pack residues (2 bits each, most significant first) into bytes without a
+    bitstring: one table lookup per residue, then a single base-4 parse,
+    which CPython does in linear time for power-of-two bases.
+    """
+    try:
+        raw = residues.encode("ascii")
+    except UnicodeEncodeError as exc:
+        raise ValueError(f"Unknown amino acid '{residues[exc.start]}' for Yin-Yang mapping.") from None
+    digits = raw.translate(_DIGIT_TABLE)
+    bad = digits.find(b"?")
+    if bad >= 0:
+        raise ValueError(f"Unknown amino acid '{residues[bad]}' for Yin-Yang mapping.")
+    bit_len = 2 * len(digits) - pad_bits
+    if bit_len % 8 != 0:
+        raise ValueError(f"Bitstring length must be multiple of 8, got {bit_len}")
+    if not digits:
+        return b""
+    value = int(digits, 4) >> pad_bits
+    return value.to_bytes(bit_len // 8, "big")
+
+
 def yin_yang_decode(encoded: YinYangEncoded) -> bytes:
     """
     Decode YinYangEncoded peptides back to bytes.
@@ -192,15 +436,5 @@ def yin_yang_decode(encoded: YinYangEncoded) -> bytes:
         elif not encoded.index_aa_length:
             payloads.append(pep)
 
-    bits_list: List[str] = []
-    for aa in "".join(payloads):
-        if aa not in YY_AA_TO_BITS:
-            raise ValueError(f"Unknown amino acid '{aa}' for Yin-Yang mapping.")
-        bits_list.append(YY_AA_TO_BITS[aa])
-
-    bits = "".join(bits_list)
-    if encoded.pad_bits:
-        bits = bits[:-encoded.pad_bits]
-
-    decoded = bitstring_to_bytes(bits)
+    decoded = _residues_to_bytes("".join(payloads), encoded.pad_bits)
     return decoded[: encoded.original_size_bytes]
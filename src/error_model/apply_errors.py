@@ -1,4 +1,4 @@
-from typing import List, Sequence
+from typing import List, Optional, Sequence
 import random
 
 from src.error_model.drop import drop_amino_acids, drop_peptides
@@ -19,12 +19,14 @@ def apply_peptide_errors(
     alphabet: str = DEFAULT_ALPHABET,
     drop_empty: bool = True,
     loss_mode: str = "aa",
+    seed: Optional[int] = None,
 ) -> List[str]:
     """
     Apply simulated biological / sequencing imperfections to peptide sequences.
 
+    Pass `seed` to make the corruption reproducible (e.g. per sweep task).
     """
-    rng = random.Random()
+    rng = random.Random(seed)
 
     if loss_prob > 0.0:
         if loss_mode == "peptide":
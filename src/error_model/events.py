@@ -0,0 +1,66 @@
+"""
+Event sink for the error models: per-outcome counters plus an optional,
+sampled per-peptide trace written as JSON lines.
+
+Levels:
+- "quiet": count only
+- "summary": count and print one summary line per call (default)
+- "trace": additionally write sampled per-peptide records to `trace_path`
+"""
+
+import json
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+EVENT_LEVELS = ("quiet", "summary", "trace")
+
+
+class ErrorEventSink:
+    def __init__(
+        self,
+        level: str = "summary",
+        trace_path: Optional[str] = None,
+        trace_sample_rate: float = 0.01,
+        seed: Optional[int] = None,
+    ):
+        level = (level or "summary").lower()
+        if level not in EVENT_LEVELS:
+            raise ValueError(f"Unsupported event level: {level}")
+        self.level = level
+        self.counters: Counter = Counter()
+        self.trace_sample_rate = min(1.0, max(0.0, float(trace_sample_rate)))
+        # Own RNG so sampling never shifts the corruption RNG stream.
+        self._sample_rng = random.Random(seed)
+        self._trace_file = None
+        if level == "trace" and trace_path and self.trace_sample_rate > 0.0:
+            path = Path(trace_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._trace_file = path.open("a", encoding="utf-8")
+
+    @property
+    def tracing(self) -> bool:
+        return self._trace_file is not None
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def trace(self, record: Dict[str, object]) -> None:
+        """Write `record` if tracing is on and it falls in the sample."""
+        if self._trace_file is None:
+            return
+        if self.trace_sample_rate < 1.0 and self._sample_rng.random() >= self.trace_sample_rate:
+            return
+        self._trace_file.write(json.dumps(record) + "\n")
+
+    def summary(self, prefix: str) -> None:
+        if self.level == "quiet":
+            return
+        parts = ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items()))
+        print(f"{prefix} {parts}")
+
+    def close(self) -> None:
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
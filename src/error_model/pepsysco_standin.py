@@ -0,0 +1,150 @@
+"""
+Local stand-in for the IEDB Pepsysco web form.
+
+Speaks the same protocol as the remote tool (GET form for a CSRF cookie,
+multipart POST of `sequence_file`, GET `result_in_csv/`), scoring peptides
+with the in-process heuristic scorer. Point `score_provider="local"` at it:
+
+    python -m src.error_model.pepsysco_standin --port 8765
+"""
+
+import argparse
+import csv
+import secrets
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from typing import Dict, List, Optional, Tuple
+
+from src.error_model.score_providers import HeuristicScoreProvider, ScoreProvider
+
+FORM_PATH = "/pepsysco/"
+CSV_PATH = "/pepsysco/result_in_csv/"
+
+
+def _parse_form(content_type: str, body: bytes) -> Dict[str, str]:
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields: Dict[str, str] = {}
+    if not message.is_multipart():
+        return fields
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            payload = part.get_payload(decode=True) or b""
+            fields[name] = payload.decode("utf-8", errors="replace")
+    return fields
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    server: "PepsyscoStandinServer"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _cookies(self) -> Dict[str, str]:
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return {key: morsel.value for key, morsel in cookie.items()}
+
+    def _send(self, status: int, body: str = "", content_type: str = "text/html", headers=()) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        cookies = self._cookies()
+        if self.path == FORM_PATH:
+            headers = []
+            if "csrftoken" not in cookies:
+                headers.append(("Set-Cookie", f"csrftoken={secrets.token_hex(16)}; Path=/"))
+            if "sessionid" not in cookies:
+                headers.append(("Set-Cookie", f"sessionid={secrets.token_hex(16)}; Path=/"))
+            self._send(200, "<form method='post' enctype='multipart/form-data'></form>", headers=headers)
+        elif self.path == CSV_PATH:
+            csv_text = self.server.results.get(cookies.get("sessionid", ""))
+            if csv_text is None:
+                self._send(404, "no result for this session")
+            else:
+                self._send(200, csv_text, content_type="text/csv")
+        else:
+            self._send(404, "not found")
+
+    def do_POST(self) -> None:
+        if self.path != FORM_PATH:
+            self._send(404, "not found")
+            return
+        cookies = self._cookies()
+        length = int(self.headers.get("Content-Length", "0"))
+        fields = _parse_form(self.headers.get("Content-Type", ""), self.rfile.read(length))
+        token = cookies.get("csrftoken")
+        if not token or fields.get("csrfmiddlewaretoken") != token or "sessionid" not in cookies:
+            self._send(403, "CSRF verification failed")
+            return
+
+        text = fields.get("sequence_file") or fields.get("sequence_text", "")
+        sequences = [line.strip() for line in text.splitlines() if line.strip()]
+        self.server.results[cookies["sessionid"]] = self.server.score_csv(sequences)
+        self._send(302, headers=[("Location", "/pepsysco/result/")])
+
+
+class PepsyscoStandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server emulating the Pepsysco form and CSV endpoints."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], scorer: Optional[ScoreProvider] = None):
+        super().__init__(address, _StandinHandler)
+        self.scorer = scorer or HeuristicScoreProvider()
+        # Last CSV result per session id, like the real tool.
+        self.results: Dict[str, str] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def score_csv(self, sequences: List[str]) -> str:
+        rows, column = self.scorer.fetch_batch(sequences, score_column=None, score_label=None)
+        buf = StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(["peptide", column])
+        for pep, score in rows:
+            writer.writerow([pep, f"{score:.6f}"])
+        return buf.getvalue()
+
+
+def serve_in_background(host: str = "127.0.0.1", port: int = 0) -> PepsyscoStandinServer:
+    """Start a stand-in server on a daemon thread (port 0 = any free port)."""
+    server = PepsyscoStandinServer((host, port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Pepsysco-compatible scoring server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = PepsyscoStandinServer((args.host, args.port))
+    print(f"Pepsysco stand-in listening on {server.base_url}{FORM_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
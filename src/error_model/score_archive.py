@@ -0,0 +1,100 @@
+"""
+Append-only, compressed archive of raw score CSV responses.
+
+Each process writes one `scores_<timestamp>_<pid>.csv.gz` per run. Every
+batch is appended as its own gzip member, so the file as a whole still
+reads with `gzip.open`. A sibling `.index.jsonl` records, per batch, its
+label, row count and byte range, so one batch can be read back without
+decompressing the others.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class BatchCompressor:
+    """Gzip-compresses one batch incrementally, line by line."""
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self._chunks: List[bytes] = []
+
+    def feed(self, line: str) -> None:
+        self._chunks.append(self._compressor.compress(line.encode("utf-8") + b"\n"))
+
+    def tee(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield `lines` unchanged while compressing them."""
+        for line in lines:
+            self.feed(line)
+            yield line
+
+    def finish(self) -> bytes:
+        self._chunks.append(self._compressor.flush())
+        return b"".join(self._chunks)
+
+
+class ScoreArchive:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name.replace(".csv.gz", "") + ".index.jsonl")
+        self._lock = threading.Lock()
+        self._next_batch = 0
+
+    def append(self, compressed: bytes, label: Optional[str], rows: int) -> int:
+        """Append one compressed batch and return its batch number."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as handle:
+                offset = handle.seek(0, os.SEEK_END)
+                handle.write(compressed)
+            batch = self._next_batch
+            self._next_batch += 1
+            entry = {
+                "batch": batch,
+                "label": label,
+                "rows": rows,
+                "offset": offset,
+                "length": len(compressed),
+                "time": datetime.now(timezone.utc).isoformat(),
+            }
+            with self.index_path.open("a", encoding="utf-8") as index:
+                index.write(json.dumps(entry) + "\n")
+            return batch
+
+    def read_index(self) -> List[Dict[str, object]]:
+        if not self.index_path.exists():
+            return []
+        with self.index_path.open("r", encoding="utf-8") as index:
+            return [json.loads(line) for line in index if line.strip()]
+
+    def read_batch(self, batch: int) -> str:
+        """Return the raw CSV text of one archived batch."""
+        for entry in self.read_index():
+            if entry["batch"] == batch:
+                with self.path.open("rb") as handle:
+                    handle.seek(entry["offset"])
+                    return gzip.decompress(handle.read(entry["length"])).decode("utf-8")
+        raise KeyError(f"Batch {batch} not in {self.index_path}")
+
+
+_ARCHIVES: Dict[Path, ScoreArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_score_archive(directory: Path) -> ScoreArchive:
+    """Return this process's archive under `directory`, creating it on first use."""
+    key = Path(directory).resolve()
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        # Forked workers inherit the parent's dict; give them their own file.
+        if archive is None or not archive.path.name.endswith(f"_{os.getpid()}.csv.gz"):
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            archive = ScoreArchive(key / f"scores_{timestamp}_{os.getpid()}.csv.gz")
+            _ARCHIVES[key] = archive
+        return archive
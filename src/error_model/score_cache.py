@@ -0,0 +1,90 @@
+"""
+Persistent peptide -> score cache for the Pepsysco scored error model.
+
+Scores are stored in a small SQLite database keyed by sequence and requested
+score column (prefixed by the score provider's namespace), so repeated runs
+over the same peptides never hit the network.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+SCORE_CACHE_ENV = "PEPSYSCO_SCORE_CACHE"
+# Key used when the score column is auto-detected from the CSV.
+AUTO_SCORE_COLUMN = "<auto>"
+
+
+class ScoreCache:
+    """SQLite-backed map of (sequence, score column) -> score."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Several sweep workers may share one cache file.
+        self._conn = sqlite3.connect(str(self.path), timeout=60.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " sequence TEXT NOT NULL,"
+            " score_column TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " PRIMARY KEY (sequence, score_column))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _column_key(score_column: Optional[str], namespace: str = "") -> str:
+        column = score_column or AUTO_SCORE_COLUMN
+        return f"{namespace}/{column}" if namespace else column
+
+    def get_many(
+        self,
+        sequences: Iterable[str],
+        score_column: Optional[str],
+        namespace: str = "",
+    ) -> Dict[str, float]:
+        column = self._column_key(score_column, namespace)
+        unique = list(dict.fromkeys(sequences))
+        found: Dict[str, float] = {}
+        # Stay below SQLite's bound-parameter limit.
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT sequence, score FROM scores WHERE score_column = ? AND sequence IN ({placeholders})",
+                [column, *chunk],
+            )
+            found.update(rows)
+        return found
+
+    def put_many(
+        self,
+        rows: Sequence[Tuple[str, float]],
+        score_column: Optional[str],
+        namespace: str = "",
+    ) -> None:
+        column = self._column_key(score_column, namespace)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (sequence, score_column, score) VALUES (?, ?, ?)",
+                [(seq, column, float(score)) for seq, score in rows if seq],
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def get_score_cache(path: Optional[str] = None) -> Optional[ScoreCache]:
+    """
+    Open the cache at `path` (or the PEPSYSCO_SCORE_CACHE environment
+    variable), or return None if neither is set.
+    """
+    path = path or os.environ.get(SCORE_CACHE_ENV)
+    if not path:
+        return None
+    return ScoreCache(Path(path))
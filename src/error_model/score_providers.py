@@ -0,0 +1,157 @@
+"""
+Score providers for the scored error model.
+
+- pepsysco: the IEDB Pepsysco web form (network access required)
+- local: a server speaking the same form/CSV protocol, e.g.
+  `python -m src.error_model.pepsysco_standin`
+- heuristic: an in-process composition-based stand-in scorer
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_LOCAL_SCORE_URL = "http://127.0.0.1:8765"
+
+# Residues treated as hydrophobic / beta-branched by the heuristic scorer.
+_HYDROPHOBIC = frozenset("AVLIFMWY")
+_BETA_BRANCHED = frozenset("VIT")
+
+
+def _normalize_base_url(url: str) -> str:
+    """Lowercase the scheme and host and drop trailing slashes, query and fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def _form_cache_namespace(name: str, base_url: str) -> str:
+    """
+    Score-cache namespace for a form-based provider. Only the public IEDB
+    form keeps the empty namespace that older caches were written under;
+    any other server gets its own, so its scores never mix with IEDB's.
+    """
+    from src.error_model.scored_errors import BASE_URL
+
+    base_url = _normalize_base_url(base_url)
+    if base_url == _normalize_base_url(BASE_URL):
+        return ""
+    return f"{name}:{base_url}"
+
+
+class ScoreProvider(ABC):
+    """Scores batches of peptide sequences with Q values in [0, 1]."""
+
+    name = "base"
+    # Prefix separating this provider's entries in the persistent score cache.
+    cache_namespace = ""
+
+    @abstractmethod
+    def fetch_batch(
+        self,
+        sequences: Sequence[str],
+        score_column: Optional[str],
+        score_label: Optional[str],
+        retry_sleep: float = 1.0,
+        max_sleep: float = 30.0,
+        request_timeout: float = 30.0,
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        """Return `(peptide, score)` rows and the resolved score column."""
+
+
+class PepsyscoFormProvider(ScoreProvider):
+    """Submits batches through the Pepsysco form protocol at `base_url`."""
+
+    name = "pepsysco"
+
+    def __init__(self, base_url: Optional[str] = None, cache_namespace: Optional[str] = None):
+        from src.error_model.scored_errors import BASE_URL
+
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        if cache_namespace is None:
+            cache_namespace = _form_cache_namespace(self.name, self.base_url)
+        self.cache_namespace = cache_namespace
+
+    def fetch_batch(
+        self,
+        sequences: Sequence[str],
+        score_column: Optional[str],
+        score_label: Optional[str],
+        retry_sleep: float = 1.0,
+        max_sleep: float = 30.0,
+        request_timeout: float = 30.0,
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        from src.error_model import scored_errors
+
+        return scored_errors._fetch_scores_batch(
+            sequences,
+            score_column=score_column,
+            score_label=score_label,
+            retry_sleep=retry_sleep,
+            max_sleep=max_sleep,
+            request_timeout=request_timeout,
+            base_url=self.base_url,
+        )
+
+
+class HeuristicScoreProvider(ScoreProvider):
+    """
+    Deterministic offline scorer for benchmarking and air-gapped runs.
+
+    It is not the Pepsysco model: Q drops with the hydrophobic and
+    beta-branched fraction of a peptide and with long single-residue runs,
+    which are the usual synthesis-difficulty signals.
+    """
+
+    name = "heuristic"
+    cache_namespace = "heuristic"
+
+    def score(self, peptide: str) -> float:
+        if not peptide:
+            return 0.0
+        length = len(peptide)
+        hydrophobic = sum(aa in _HYDROPHOBIC for aa in peptide) / length
+        branched = sum(aa in _BETA_BRANCHED for aa in peptide) / length
+        longest_run = run = 1
+        for prev, cur in zip(peptide, peptide[1:]):
+            run = run + 1 if cur == prev else 1
+            longest_run = max(longest_run, run)
+        q = 1.0 - 0.5 * hydrophobic - 0.3 * branched - 0.2 * (longest_run - 1) / length
+        return min(1.0, max(0.0, q))
+
+    def fetch_batch(
+        self,
+        sequences: Sequence[str],
+        score_column: Optional[str],
+        score_label: Optional[str],
+        retry_sleep: float = 1.0,
+        max_sleep: float = 30.0,
+        request_timeout: float = 30.0,
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        return [(seq, self.score(seq)) for seq in sequences], score_column or "score"
+
+
+_PROVIDER_NAMES = ("pepsysco", "local", "heuristic")
+_PROVIDERS: Dict[Tuple[str, Optional[str]], ScoreProvider] = {}
+
+
+def get_score_provider(name: str = "pepsysco", url: Optional[str] = None) -> ScoreProvider:
+    """
+    Return the provider for `name` ("pepsysco", "local" or "heuristic").
+    `url` overrides the base URL of the form-based providers; each distinct
+    server caches its scores under its own namespace.
+    """
+    name = (name or "pepsysco").lower()
+    if name not in _PROVIDER_NAMES:
+        raise ValueError(f"Unsupported score provider: {name}")
+    key = (name, url)
+    provider = _PROVIDERS.get(key)
+    if provider is None:
+        if name == "heuristic":
+            provider = HeuristicScoreProvider()
+        elif name == "local":
+            base_url = url or DEFAULT_LOCAL_SCORE_URL
+            provider = PepsyscoFormProvider(base_url, _form_cache_namespace(name, base_url))
+        else:
+            provider = PepsyscoFormProvider(url)
+        _PROVIDERS[key] = provider
+    return provider
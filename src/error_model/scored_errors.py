@@ -1,20 +1,21 @@
 import csv
+import itertools
 import os
+import threading
 import time
-from datetime import datetime, timezone
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple
-import re
-from uuid import uuid4
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import random
 
 import requests
 
-from src.error_model.drop import drop_amino_acids, drop_peptides
-from src.error_model.mutate import mutate_peptides
-from src.error_model.insert import insert_aa_random_position
-from src.error_model.shuffle import shuffle_amino_acids
+from src.error_model.events import ErrorEventSink
+from src.error_model.score_archive import BatchCompressor, get_score_archive
+from src.error_model.score_cache import ScoreCache, get_score_cache
+from src.error_model.score_providers import ScoreProvider, get_score_provider
 
 BASE_URL = "https://tools.iedb.org"
 FORM_URL = f"{BASE_URL}/pepsysco/"
@@ -34,8 +35,18 @@ DEFAULT_SCORE_BATCH_MAX_PAYLOAD_BYTES = max(
     1024,
     int(os.environ.get("PEPSYSCO_BATCH_MAX_PAYLOAD_BYTES", "200000")),
 )
+DEFAULT_SCORE_CONCURRENCY = max(1, int(os.environ.get("PEPSYSCO_CONCURRENCY", "4")))
+# Minimum spacing between submissions across all threads of this process.
+SCORE_MIN_INTERVAL_S = max(0.0, float(os.environ.get("PEPSYSCO_MIN_INTERVAL", "0.2")))
 _LAST_SCORE_STATS: Optional[Dict[str, float]] = None
 
+# Idle (session, csrf token) pairs per base URL. Pepsysco keeps the last result in the
+# server-side session, so a session is only ever used by one in-flight batch at a time.
+_SESSION_POOL: Dict[str, List[Tuple[requests.Session, str]]] = {}
+_SESSION_LOCK = threading.Lock()
+_THROTTLE_LOCK = threading.Lock()
+_NEXT_SUBMIT_AT = 0.0
+
 
 def get_last_score_stats() -> Optional[Dict[str, float]]:
     return _LAST_SCORE_STATS
@@ -58,20 +69,45 @@ def _percentile(values: List[float], pct: float) -> float:
     return values[lo] * (1 - frac) + values[hi] * frac
 
 
+class ScoreRows:
+    """Parsed score CSV: peptides plus a typed array of scores; iterates as (peptide, score)."""
+
+    __slots__ = ("peptides", "scores")
+
+    def __init__(self):
+        self.peptides: List[str] = []
+        self.scores = array("d")
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return zip(self.peptides, self.scores)
+
+
 def _parse_score_rows(
-    csv_text: str,
+    csv_lines: Union[str, Iterable[str]],
     score_column: Optional[str],
-) -> Tuple[Optional[str], str, List[Tuple[str, float]]]:
-    reader = csv.DictReader(StringIO(csv_text))
-    rows = list(reader)
-    if not rows:
+) -> Tuple[Optional[str], str, ScoreRows]:
+    """
+    Parse a score CSV row by row. `csv_lines` is the CSV text or an iterable of
+    lines (e.g. a streamed HTTP response), so the response is never held as a
+    list of row dicts.
+    """
+    if isinstance(csv_lines, str):
+        csv_lines = StringIO(csv_lines)
+    reader = (row for row in csv.reader(csv_lines) if row)
+    header = next(reader, None)
+    first_row = next(reader, None)
+    if header is None or first_row is None:
         raise RuntimeError("Score CSV returned no rows.")
 
-    header = reader.fieldnames or []
+    peptide_idx: Optional[int] = None
     peptide_column = None
     for candidate in ("peptide", "sequence", "seq"):
         if candidate in header:
             peptide_column = candidate
+            peptide_idx = header.index(candidate)
             break
 
     if score_column is None:
@@ -79,9 +115,9 @@ def _parse_score_rows(
             score_column = "score"
         else:
             candidates = []
-            for name in header:
+            for name, value in zip(header, first_row):
                 try:
-                    fval = float(rows[0][name])
+                    fval = float(value)
                 except (TypeError, ValueError):
                     continue
                 if 0.0 <= fval <= 1.0:
@@ -94,32 +130,18 @@ def _parse_score_rows(
                     "Pass score_column explicitly."
                 )
             score_column = candidates[0]
+    if score_column not in header:
+        raise RuntimeError(f"Score column '{score_column}' not found in CSV.")
+    score_idx = header.index(score_column)
 
-    parsed: List[Tuple[str, float]] = []
-    for row in rows:
-        pep = row.get(peptide_column) if peptide_column else ""
-        if score_column not in row:
-            raise RuntimeError(f"Score column '{score_column}' not found in CSV.")
-        parsed.append((pep or "", float(row[score_column])))
+    parsed = ScoreRows()
+    for row in itertools.chain((first_row,), reader):
+        parsed.peptides.append(row[peptide_idx] if peptide_idx is not None else "")
+        parsed.scores.append(float(row[score_idx]))
 
     return peptide_column, score_column, parsed
 
 
-def _safe_label(label: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
-    return cleaned or "pepsysco"
-
-
-def _save_score_csv(csv_text: str, label: Optional[str]) -> Path:
-    SCORE_REPORT_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
-    prefix = _safe_label(label) if label else "pepsysco"
-    filename = f"{prefix}_{timestamp}_{uuid4().hex}.csv"
-    path = SCORE_REPORT_DIR / filename
-    path.write_text(csv_text, encoding="utf-8")
-    return path
-
-
 def _split_score_batches(
     sequences: Sequence[str],
     max_sequences_per_batch: int,
@@ -161,6 +183,45 @@ def _split_score_batches(
     return batches
 
 
+def _form_url(base_url: str) -> str:
+    return f"{base_url.rstrip('/')}/pepsysco/"
+
+
+def _acquire_session(timeout_s: float, base_url: str = BASE_URL) -> Tuple[requests.Session, str]:
+    with _SESSION_LOCK:
+        idle = _SESSION_POOL.get(base_url)
+        if idle:
+            return idle.pop()
+
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    try:
+        r_get = session.get(_form_url(base_url), timeout=timeout_s)
+        r_get.raise_for_status()
+        csrf_token = session.cookies.get("csrftoken")
+        if not csrf_token:
+            raise RuntimeError("CSRF token not found")
+    except Exception:
+        session.close()
+        raise
+    return session, csrf_token
+
+
+def _release_session(pooled: Tuple[requests.Session, str], base_url: str = BASE_URL) -> None:
+    with _SESSION_LOCK:
+        _SESSION_POOL.setdefault(base_url, []).append(pooled)
+
+
+def _throttle() -> None:
+    global _NEXT_SUBMIT_AT
+    with _THROTTLE_LOCK:
+        now = time.monotonic()
+        wait_s = _NEXT_SUBMIT_AT - now
+        _NEXT_SUBMIT_AT = max(now, _NEXT_SUBMIT_AT) + SCORE_MIN_INTERVAL_S
+    if wait_s > 0:
+        time.sleep(wait_s)
+
+
 def _fetch_scores_batch(
     sequences: Sequence[str],
     score_column: Optional[str],
@@ -168,7 +229,11 @@ def _fetch_scores_batch(
     retry_sleep: float = 1.0,
     max_sleep: float = 30.0,
     request_timeout: float = 30.0,
+    base_url: str = BASE_URL,
 ) -> Tuple[List[Tuple[str, float]], str]:
+    """Submit one batch through the Pepsysco form at `base_url` and parse the CSV."""
+    form_url = _form_url(base_url)
+    csv_url = f"{form_url}result_in_csv/"
     base_sleep = max(0.1, float(retry_sleep))
     max_retry_window = max(base_sleep, float(max_sleep))
     timeout_s = max(1.0, float(request_timeout))
@@ -179,15 +244,10 @@ def _fetch_scores_batch(
 
     while time.monotonic() <= deadline:
         attempt += 1
+        pooled = None
         try:
-            session = requests.Session()
-            session.headers.update(REQUEST_HEADERS)
-            r_get = session.get(FORM_URL, timeout=timeout_s)
-            r_get.raise_for_status()
-
-            csrf_token = session.cookies.get("csrftoken")
-            if not csrf_token:
-                raise RuntimeError("CSRF token not found")
+            pooled = _acquire_session(timeout_s, base_url)
+            session, csrf_token = pooled
 
             payload = "\n".join(sequences)
             data = {
@@ -199,12 +259,13 @@ def _fetch_scores_batch(
                 "sequence_file": ("sequences.txt", payload.encode("utf-8"), "text/plain"),
             }
             headers = {
-                "Origin": BASE_URL,
-                "Referer": FORM_URL,
+                "Origin": base_url.rstrip("/"),
+                "Referer": form_url,
             }
 
+            _throttle()
             r_post = session.post(
-                FORM_URL,
+                form_url,
                 data=data,
                 files=files,
                 headers=headers,
@@ -214,17 +275,26 @@ def _fetch_scores_batch(
             if r_post.status_code not in (200, 302):
                 raise RuntimeError(f"Submission failed: {r_post.status_code}")
 
-            r_csv = session.get(CSV_URL, timeout=timeout_s)
-            r_csv.raise_for_status()
-
-            if "text/csv" not in r_csv.headers.get("Content-Type", ""):
-                raise RuntimeError("Did not receive CSV content.")
-
-            _save_score_csv(r_csv.text, score_label)
-            _, resolved_score_column, parsed = _parse_score_rows(r_csv.text, score_column)
-            time.sleep(0.2)
+            with session.get(csv_url, timeout=timeout_s, stream=True) as r_csv:
+                r_csv.raise_for_status()
+
+                if "text/csv" not in r_csv.headers.get("Content-Type", ""):
+                    raise RuntimeError("Did not receive CSV content.")
+
+                # Parse and compress the response as it streams in.
+                r_csv.encoding = r_csv.encoding or "utf-8"
+                compressor = BatchCompressor()
+                lines = compressor.tee(r_csv.iter_lines(decode_unicode=True))
+                _, resolved_score_column, parsed = _parse_score_rows(lines, score_column)
+                for _ in lines:
+                    pass  # archive any trailing lines the parser did not need
+            get_score_archive(SCORE_REPORT_DIR).append(compressor.finish(), score_label, len(parsed))
+            _release_session(pooled, base_url)
             return parsed, resolved_score_column
         except Exception as exc:
+            if pooled is not None:
+                # Start the next attempt from a fresh session and CSRF token.
+                pooled[0].close()
             last_exc = exc
             remaining = deadline - time.monotonic()
             if remaining <= 0:
@@ -253,7 +323,16 @@ def _fetch_scores_chunked(
     request_timeout: float = 30.0,
     max_sequences_per_batch: int = DEFAULT_SCORE_BATCH_SIZE,
     max_payload_bytes: int = DEFAULT_SCORE_BATCH_MAX_PAYLOAD_BYTES,
+    max_concurrency: int = DEFAULT_SCORE_CONCURRENCY,
+    provider: Optional[ScoreProvider] = None,
 ) -> List[Tuple[str, float]]:
+    """
+    Score `sequences` in upload-sized batches, up to `max_concurrency` at a time,
+    through `provider` (default: the remote Pepsysco form).
+
+    Each batch retries on its own. When `score_column` is None, the first batch
+    is fetched alone to resolve the column used for the remaining ones.
+    """
     if not sequences:
         return []
 
@@ -263,19 +342,21 @@ def _fetch_scores_chunked(
         max_payload_bytes=max_payload_bytes,
     )
     total_batches = len(batches)
+    provider = provider or get_score_provider()
     resolved_score_column = score_column
-    merged: List[Tuple[str, float]] = []
+    batch_rows: List[List[Tuple[str, float]]] = [[] for _ in batches]
 
-    for batch_idx, batch_sequences in enumerate(batches, start=1):
+    def fetch(batch_idx: int) -> Tuple[List[Tuple[str, float]], str]:
+        batch_sequences = batches[batch_idx]
         print(
-            f"[scored] submitting batch {batch_idx}/{total_batches} "
+            f"[scored] submitting batch {batch_idx + 1}/{total_batches} "
             f"({len(batch_sequences)} peptides)"
         )
         batch_label = score_label
         if score_label and total_batches > 1:
-            batch_label = f"{score_label}_chunk{batch_idx:03d}"
+            batch_label = f"{score_label}_chunk{batch_idx + 1:03d}"
 
-        batch_rows, returned_score_column = _fetch_scores_batch(
+        return provider.fetch_batch(
             batch_sequences,
             score_column=resolved_score_column,
             score_label=batch_label,
@@ -283,11 +364,86 @@ def _fetch_scores_chunked(
             max_sleep=max_sleep,
             request_timeout=request_timeout,
         )
-        if resolved_score_column is None:
-            resolved_score_column = returned_score_column
-        merged.extend(batch_rows)
 
-    return merged
+    remaining = list(range(total_batches))
+    if resolved_score_column is None:
+        batch_rows[0], resolved_score_column = fetch(0)
+        remaining = remaining[1:]
+
+    workers = min(max(1, max_concurrency), len(remaining))
+    if workers <= 1:
+        for batch_idx in remaining:
+            batch_rows[batch_idx] = fetch(batch_idx)[0]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {batch_idx: pool.submit(fetch, batch_idx) for batch_idx in remaining}
+            for batch_idx, future in futures.items():
+                batch_rows[batch_idx] = future.result()[0]
+
+    return [row for rows in batch_rows for row in rows]
+
+
+def _fetch_scores_cached(
+    sequences: Sequence[str],
+    score_column: Optional[str],
+    score_label: Optional[str],
+    cache: ScoreCache,
+    retry_sleep: float = 1.0,
+    max_sleep: float = 30.0,
+    request_timeout: float = 30.0,
+    max_sequences_per_batch: int = DEFAULT_SCORE_BATCH_SIZE,
+    max_payload_bytes: int = DEFAULT_SCORE_BATCH_MAX_PAYLOAD_BYTES,
+    max_concurrency: int = DEFAULT_SCORE_CONCURRENCY,
+    provider: Optional[ScoreProvider] = None,
+) -> Tuple[List[Tuple[str, float]], int]:
+    """
+    Like `_fetch_scores_chunked`, but look sequences up in `cache` first and
+    only submit the ones never scored before. Returns rows in input order and
+    the number of sequences served from the cache.
+    """
+    provider = provider or get_score_provider()
+    known = cache.get_many(sequences, score_column, namespace=provider.cache_namespace)
+    missing = [seq for seq in sequences if seq not in known]
+    hits = len(sequences) - len(missing)
+    if missing:
+        print(f"[scored] score cache: {hits} hits, fetching {len(missing)} peptides")
+        fetched_rows = _fetch_scores_chunked(
+            missing,
+            score_column=score_column,
+            score_label=score_label,
+            retry_sleep=retry_sleep,
+            max_sleep=max_sleep,
+            request_timeout=request_timeout,
+            max_sequences_per_batch=max_sequences_per_batch,
+            max_payload_bytes=max_payload_bytes,
+            max_concurrency=max_concurrency,
+            provider=provider,
+        )
+        fetched = _scores_by_sequence(missing, fetched_rows)
+        cache.put_many(list(fetched.items()), score_column, namespace=provider.cache_namespace)
+        known.update(fetched)
+    else:
+        print(f"[scored] score cache: all {hits} peptides cached, no request needed")
+
+    return [(seq, known[seq]) for seq in sequences], hits
+
+
+def _scores_by_sequence(
+    sequences: Sequence[str],
+    score_rows: Sequence[Tuple[str, float]],
+) -> Dict[str, float]:
+    """Map each submitted sequence to its score from the returned CSV rows."""
+    if all(pep for pep, _ in score_rows):
+        scores = dict(score_rows)
+    else:
+        # CSV without a peptide column: rows follow submission order.
+        if len(score_rows) != len(sequences):
+            raise RuntimeError("Score row count does not match number of peptides.")
+        scores = {seq: score for seq, (_, score) in zip(sequences, score_rows)}
+    for seq in sequences:
+        if seq not in scores:
+            raise RuntimeError(f"Score missing for peptide: {seq}")
+    return scores
 
 
 def apply_peptide_errors_scored(
@@ -304,6 +460,13 @@ def apply_peptide_errors_scored(
     request_timeout: float = 30.0,
     score_batch_size: int = DEFAULT_SCORE_BATCH_SIZE,
     score_batch_max_payload_bytes: int = DEFAULT_SCORE_BATCH_MAX_PAYLOAD_BYTES,
+    score_cache_path: Optional[str] = None,
+    score_concurrency: int = DEFAULT_SCORE_CONCURRENCY,
+    score_provider: str = "pepsysco",
+    score_provider_url: Optional[str] = None,
+    event_level: str = "summary",
+    trace_path: Optional[str] = None,
+    trace_sample_rate: float = 0.01,
 ) -> List[str]:
     """
     Apply peptide errors using a score-driven probability per peptide.
@@ -313,7 +476,15 @@ def apply_peptide_errors_scored(
       loss_prob = p(Q)
       mutation/insertion/shuffle prob = p(Q) / 2
 
-    Large peptide sets are fetched in batches to avoid oversized requests.
+    Large peptide sets are fetched in batches to avoid oversized requests;
+    up to `score_concurrency` batches are in flight at once. `score_provider`
+    selects the scorer: "pepsysco" (remote), "local" (form-compatible server at
+    `score_provider_url`) or "heuristic" (in-process, offline).
+    Scores already in the persistent cache (`score_cache_path` or
+    $PEPSYSCO_SCORE_CACHE) are reused; only unseen peptides are submitted.
+
+    Outcomes are counted (intact / corrupted / dropped) instead of printed per
+    peptide; `event_level="trace"` writes a sampled JSONL trace to `trace_path`.
     """
     global _LAST_SCORE_STATS
     rng = random.Random(seed)
@@ -324,8 +495,16 @@ def apply_peptide_errors_scored(
         _LAST_SCORE_STATS = None
         return [] if drop_empty else list(peptides)
 
-    score_rows = _fetch_scores_chunked(
-        scored_peptides,
+    # Score every distinct sequence once and fan the score out to all occurrences.
+    unique_peptides = list(dict.fromkeys(scored_peptides))
+    dedup_ratio = len(unique_peptides) / len(scored_peptides)
+    if len(unique_peptides) < len(scored_peptides):
+        print(
+            f"[scored] scoring {len(unique_peptides)} distinct of {len(scored_peptides)} peptides "
+            f"(dedup ratio {dedup_ratio:.3f})"
+        )
+
+    fetch_kwargs = dict(
         score_column=score_column,
         score_label=score_label,
         retry_sleep=retry_sleep,
@@ -333,106 +512,145 @@ def apply_peptide_errors_scored(
         request_timeout=request_timeout,
         max_sequences_per_batch=score_batch_size,
         max_payload_bytes=score_batch_max_payload_bytes,
+        max_concurrency=score_concurrency,
+        provider=get_score_provider(score_provider, score_provider_url),
     )
-    q_values = [score for _, score in score_rows]
-    if q_values:
-        p_values = [(1.0 - q) * 0.02 for q in q_values]
-        avg_q = sum(q_values) / len(q_values)
-        avg_p = sum(p_values) / len(p_values)
-        _LAST_SCORE_STATS = {
-            "avg_q": avg_q,
-            "avg_loss_prob": avg_p,
-            "avg_mutation_prob": avg_p / 2.0,
-            "avg_insertion_prob": avg_p / 2.0,
-            "avg_shuffle_prob": avg_p / 2.0,
-            "score_mean": avg_q,
-            "score_p10": _percentile(q_values, 0.10),
-            "score_p90": _percentile(q_values, 0.90),
-            "base_error_mean": avg_p,
-            "base_error_p10": _percentile(p_values, 0.10),
-            "base_error_p90": _percentile(p_values, 0.90),
-        }
-    else:
-        _LAST_SCORE_STATS = None
-    use_order = all(pep for pep, _ in score_rows)
-    order_scores: Optional[List[float]] = None
-
-    score_map: Dict[str, List[float]] = {}
-    if use_order:
-        for pep, score in score_rows:
-            score_map.setdefault(pep, []).append(score)
+    cache = get_score_cache(score_cache_path)
+    cache_hits = 0
+    if cache is None:
+        score_rows = _fetch_scores_chunked(unique_peptides, **fetch_kwargs)
+        scores = _scores_by_sequence(unique_peptides, score_rows)
     else:
-        if len(score_rows) != len(scored_peptides):
-            raise RuntimeError("Score row count does not match number of peptides.")
-        order_scores = [score for _, score in score_rows]
-
-    order_idx = 0
-
-    for peptide in peptides:
-        if peptide == "":
-            if not drop_empty:
-                out.append(peptide)
-            continue
-
-        if order_scores is not None:
-            q = order_scores[order_idx]
-            order_idx += 1
-        else:
-            if peptide not in score_map or not score_map[peptide]:
-                raise RuntimeError(f"Score missing for peptide: {peptide}")
-            q = score_map[peptide].pop(0)
-        p_val = (1.0 - q) * 0.02
-        loss_prob = p_val
-        other_prob = p_val / 2.0
-
-        print(f"[scored] seq={peptide} Q={q:.6f} p={p_val:.6f}")
-
-        current = [peptide]
-        if loss_prob > 0.0:
-            if loss_mode == "peptide":
-                current = drop_peptides(
-                    current,
-                    loss_prob=loss_prob,
-                    rng=rng,
-                    drop_empty=drop_empty,
-                )
-            else:
-                current = drop_amino_acids(
-                    current,
-                    loss_prob=loss_prob,
-                    rng=rng,
-                    drop_empty=drop_empty,
-                )
-        if not current:
-            print("[scored] -> dropped (empty after loss)")
-            continue
-
-        if other_prob > 0.0:
-            current = mutate_peptides(
-                current,
-                mutation_prob=other_prob,
-                alphabet=alphabet,
+        try:
+            score_rows, cache_hits = _fetch_scores_cached(unique_peptides, cache=cache, **fetch_kwargs)
+        finally:
+            cache.close()
+        scores = dict(score_rows)
+
+    q_values = [scores[pep] for pep in scored_peptides]
+    p_values = [(1.0 - q) * 0.02 for q in q_values]
+    avg_q = sum(q_values) / len(q_values)
+    avg_p = sum(p_values) / len(p_values)
+    _LAST_SCORE_STATS = {
+        "avg_q": avg_q,
+        "avg_loss_prob": avg_p,
+        "avg_mutation_prob": avg_p / 2.0,
+        "avg_insertion_prob": avg_p / 2.0,
+        "avg_shuffle_prob": avg_p / 2.0,
+        "score_mean": avg_q,
+        "score_p10": _percentile(q_values, 0.10),
+        "score_p90": _percentile(q_values, 0.90),
+        "base_error_mean": avg_p,
+        "base_error_p10": _percentile(p_values, 0.10),
+        "base_error_p90": _percentile(p_values, 0.90),
+        "score_cache_hits": float(cache_hits),
+        "score_unique_peptides": float(len(unique_peptides)),
+        "score_dedup_ratio": dedup_ratio,
+    }
+
+    sink = ErrorEventSink(event_level, trace_path, trace_sample_rate, seed=seed)
+    mutation_choices = {aa: [x for x in alphabet if x != aa] for aa in alphabet}
+    try:
+        for peptide in peptides:
+            if peptide == "":
+                if not drop_empty:
+                    out.append(peptide)
+                continue
+
+            q = scores[peptide]
+            p_val = (1.0 - q) * 0.02
+            corrupted = _corrupt_scored_peptide(
+                peptide,
+                loss_prob=p_val,
+                other_prob=p_val / 2.0,
                 rng=rng,
-            )
-            current = insert_aa_random_position(
-                current,
-                insertion_prob=other_prob,
                 alphabet=alphabet,
-                rng=rng,
-            )
-            current = shuffle_amino_acids(
-                current,
-                shuffle_prob=other_prob,
-                rng=rng,
-                passes=shuffle_passes,
+                mutation_choices=mutation_choices,
+                drop_empty=drop_empty,
+                loss_mode=loss_mode,
+                shuffle_passes=shuffle_passes,
             )
 
-        print(f"[scored] with_errors={current}")
-        if current == [peptide]:
-            print("\x1b[32mMATCH\x1b[0m")
-        else:
-            print("\x1b[31mERROR\x1b[0m")
-
-        out.extend(current)
-        #time.sleep(1.0)
+            if not corrupted:
+                status = "dropped"
+            elif corrupted == peptide:
+                status = "intact"
+            else:
+                status = "corrupted"
+            sink.count(status)
+            if sink.tracing:
+                sink.trace({"seq": peptide, "q": q, "p": p_val, "status": status, "out": corrupted})
+
+            if corrupted is not None:
+                out.append(corrupted)
+    finally:
+        sink.close()
+
+    for status in ("intact", "corrupted", "dropped"):
+        _LAST_SCORE_STATS[f"error_{status}"] = float(sink.counters[status])
+    sink.summary(f"[scored] {len(scored_peptides)} peptides:")
     return out
+
+
+def _corrupt_scored_peptide(
+    peptide: str,
+    loss_prob: float,
+    other_prob: float,
+    rng: random.Random,
+    alphabet: str,
+    mutation_choices: Dict[str, List[str]],
+    drop_empty: bool,
+    loss_mode: str,
+    shuffle_passes: int,
+) -> Optional[str]:
+    """
+    Loss, mutation, insertion and neighbour shuffle for one peptide in a single
+    pass. Consumes `rng` exactly like chaining drop_* / mutate_peptides /
+    insert_aa_random_position / shuffle_amino_acids on `[peptide]`, so seeded
+    runs are unchanged. Returns None when the peptide is dropped entirely.
+    """
+    if loss_prob > 0.0:
+        if loss_mode == "peptide":
+            if rng.random() < loss_prob:
+                return None if drop_empty else ""
+            chars = list(peptide)
+        else:
+            chars = [aa for aa in peptide if rng.random() >= loss_prob]
+            if not chars:
+                return None if drop_empty else ""
+    else:
+        chars = list(peptide)
+
+    if other_prob <= 0.0:
+        return "".join(chars)
+
+    for i, aa in enumerate(chars):
+        if rng.random() < other_prob:
+            choices = mutation_choices.get(aa)
+            if choices is None:
+                choices = [x for x in alphabet if x != aa]
+            if choices:
+                chars[i] = rng.choice(choices)
+
+    if alphabet:
+        inserted: List[str] = []
+        for aa in chars:
+            if rng.random() < other_prob:
+                ins_aa = rng.choice(alphabet)
+                if rng.random() < 0.5:
+                    inserted.append(ins_aa)
+                    inserted.append(aa)
+                else:
+                    inserted.append(aa)
+                    inserted.append(ins_aa)
+            else:
+                inserted.append(aa)
+        chars = inserted
+
+    n = len(chars)
+    if n > 1:
+        for _ in range(shuffle_passes):
+            for i in range(n - 1):
+                if rng.random() < other_prob:
+                    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
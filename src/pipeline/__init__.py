@@ -1,4 +1,6 @@
 from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool, decode_pool, encode_pool
+from src.pipeline.result import PipelineResult
 from src.pipeline.runner import encode_file_bytes
 
 
@@ -12,6 +14,10 @@ def run_batch_on_folder(*args, **kwargs):
 
 __all__ = [
     "PipelineConfig",
+    "EncodedPool",
+    "encode_pool",
+    "decode_pool",
+    "PipelineResult",
     "encode_file_bytes",
     "run_batch_on_folder",
 ]
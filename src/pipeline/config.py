@@ -27,6 +27,30 @@ class PipelineConfig:
     score_timeout: float = 30.0
     score_batch_size: int = 5000
     score_batch_max_payload_bytes: int = 200_000
+    score_concurrency: int = 4
+    # "pepsysco" (remote IEDB form), "local" (form-compatible server) or "heuristic" (offline)
+    score_provider: str = "pepsysco"
+    score_provider_url: str | None = None
+    # Scored-model events: "quiet", "summary" or "trace" (sampled JSONL at error_trace_path)
+    error_event_level: str = "summary"
+    error_trace_path: str | None = None
+    error_trace_sample_rate: float = 0.01
+    # Persistent Pepsysco score cache (None = use $PEPSYSCO_SCORE_CACHE if set, else disabled)
+    score_cache_path: str | None = None
+    # Encoded-pool cache (None = use $PEPTIDE_ENCODE_CACHE_DIR if set, else disabled)
+    encode_cache_dir: str | None = None
+    encode_cache_max_bytes: int = 1 << 30
+    # Per-stage tracemalloc peaks and peak RSS in results (slows runs down noticeably)
+    track_memory: bool = False
+    # Yin-Yang variant choice: "greedy" (per residue) or "optimal" (min total penalty per peptide;
+    # yin_yang_beam_width > 0 bounds the search to that many states per residue)
+    yin_yang_mode: str = "greedy"
+    yin_yang_beam_width: int = 0
+    # Encode inputs larger than yin_yang_chunk_bytes on this many processes (0 = one per CPU core)
+    yin_yang_workers: int = 1
+    yin_yang_chunk_bytes: int = 1 << 20
+    # Batch `_encoded` output: "text" (one peptide per line) or "binary" (.ppool container)
+    pool_format: str = "text"
     # Fountain-code settings (used when encoder="fountain")
     # NOTE: With peptide_length=18 and index_aa_length=0, one LT droplet is mapped
     # over a small, fixed number of peptides. Large symbol sizes make droplets
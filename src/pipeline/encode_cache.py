@@ -0,0 +1,152 @@
+"""
+Content-addressed on-disk cache for encoded peptide pools.
+
+Entries are keyed by a hash of the input bytes, the config fields that
+influence encoding and the pipeline source hash (so code changes never
+serve pools built by older encoders), stored in the pool container format
+(`src/pipeline/pool_container.py`) and evicted least-recently-used once the
+cache grows past its byte budget.
+
+The cache directory may be shared between runs and users, so entries are
+treated as untrusted input: nothing is unpickled, and an entry whose
+checksum or structure does not verify is deleted and re-encoded.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.pipeline import fingerprint
+from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool
+from src.pipeline.pool_container import pool_from_bytes, pool_to_bytes
+
+# Bump when the entry format changes; encoder code changes are covered by the source hash.
+CACHE_FORMAT_VERSION = 2
+ENCODE_CACHE_DIR_ENV = "PEPTIDE_ENCODE_CACHE_DIR"
+
+_COMMON_FIELDS = ("encoder", "peptide_length", "index_aa_length", "ecc_profile")
+_ENCODER_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "huffman": (),
+    "yin_yang": ("yin_yang_mode", "yin_yang_beam_width"),
+    "fountain": (
+        "fountain_symbol_size",
+        "fountain_overhead",
+        "fountain_seed_bytes",
+        "fountain_degree_bytes",
+        "fountain_crc_bytes",
+        "fountain_c",
+        "fountain_delta",
+        "fountain_seed",
+        "fountain_max_bytes",
+    ),
+}
+
+
+def encode_config_fields(cfg: PipelineConfig, encoder: str) -> Optional[Dict[str, object]]:
+    """
+    Return the config fields that determine the encoded pool, or None when
+    the encoding is not reproducible (e.g. Fountain without a fixed seed).
+    """
+    encoder = encoder.lower()
+    if encoder not in _ENCODER_FIELDS:
+        return None
+    if encoder == "fountain" and cfg.fountain_seed is None:
+        return None
+
+    fields: Dict[str, object] = {name: getattr(cfg, name) for name in _COMMON_FIELDS}
+    fields["encoder"] = encoder
+    fields["ecc_profile"] = cfg.ecc_profile.lower()
+    for name in _ENCODER_FIELDS[encoder]:
+        fields[name] = getattr(cfg, name)
+    if encoder in {"huffman", "yin_yang"}:
+        from src.error_correction import reed_solomon
+
+        fields["rs_block_size"] = reed_solomon.NUM_DATA_PEPTIDES
+    return fields
+
+
+class EncodeCache:
+    """Size-bounded LRU cache of EncodedPool objects under `root`."""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+
+    def key_for(self, data: bytes, cfg: PipelineConfig, encoder: str) -> Optional[str]:
+        fields = encode_config_fields(cfg, encoder)
+        if fields is None:
+            return None
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_FORMAT_VERSION}:{fingerprint.code_version()}\n".encode("utf-8"))
+        digest.update(json.dumps(fields, sort_keys=True).encode("utf-8"))
+        digest.update(b"\n")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.bin"
+
+    def get(self, key: str) -> Optional[EncodedPool]:
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            pool = pool_from_bytes(blob)
+        except Exception:
+            # Corrupt or stale entry: drop it and re-encode.
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return pool
+
+    def put(self, key: str, pool: EncodedPool) -> None:
+        blob = pool_to_bytes(pool)
+        if self.max_bytes and len(blob) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(blob)
+        # Atomic rename so concurrent workers never read a half-written entry.
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits `max_bytes`."""
+        if not self.max_bytes:
+            return
+        entries: List[Tuple[float, int, Path]] = []
+        total = 0
+        for path in self.root.glob("*/*.bin"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def get_encode_cache(cfg: PipelineConfig) -> Optional[EncodeCache]:
+    """
+    Return the cache configured by cfg.encode_cache_dir (or the
+    PEPTIDE_ENCODE_CACHE_DIR environment variable), or None if disabled.
+    """
+    root = cfg.encode_cache_dir or os.environ.get(ENCODE_CACHE_DIR_ENV)
+    if not root:
+        return None
+    return EncodeCache(Path(root), cfg.encode_cache_max_bytes)
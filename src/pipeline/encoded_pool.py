@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, TYPE_CHECKING
+
+from src.encoding_schemes.peptide_mapping import PeptideMappingResult
+from src.pipeline.config import PipelineConfig
+from src.pipeline.instrumentation import count, span
+
+if TYPE_CHECKING:
+    from src.error_correction.reed_solomon import RSEncodedPeptides
+
+
+@dataclass
+class EncodedPool:
+    """
+    Encoder output before the channel: the transmitted peptide pool plus
+    everything the decoder needs to invert it.
+
+    - peptides: transmitted peptides (data + parity for RS encoders)
+    - mapping: data peptides and pad bits before ECC
+    - ecc_packet: RS packet for Huffman / Yin-Yang (None for Fountain)
+    - source: source-codec state (HuffmanEncoded, YinYangEncoded or
+      FountainEncoded) with its bitstream/peptides stripped
+    - payload_bits: useful payload bits carried by the pool
+    """
+    encoder: str
+    peptides: List[str]
+    mapping: PeptideMappingResult
+    ecc_packet: Optional["RSEncodedPeptides"] = None
+    source: Any = None
+    payload_bits: int = 0
+
+
+def encode_pool(data: bytes, cfg: PipelineConfig, encoder: Optional[str] = None) -> EncodedPool:
+    """
+    Encode `data` into a peptide pool, going through the on-disk encode cache
+    when one is configured. `encoder` defaults to cfg.encoder.
+    """
+    from src.pipeline.encode_cache import get_encode_cache
+
+    encoder = (encoder or cfg.encoder).lower()
+    cache = get_encode_cache(cfg)
+    if cache is None:
+        return _encode_pool_uncached(data, cfg, encoder)
+
+    key = cache.key_for(data, cfg, encoder)
+    if key is None:
+        return _encode_pool_uncached(data, cfg, encoder)
+
+    with span("encode_cache"):
+        pool = cache.get(key)
+    if pool is None:
+        count("encode_cache_misses")
+        pool = _encode_pool_uncached(data, cfg, encoder)
+        with span("encode_cache"):
+            cache.put(key, pool)
+    else:
+        count("encode_cache_hits")
+    return pool
+
+
+def _encode_pool_uncached(data: bytes, cfg: PipelineConfig, encoder: str) -> EncodedPool:
+    if encoder == "huffman":
+        from src.pipeline.huffman_runner import encode_huffman_pool
+
+        return encode_huffman_pool(data, cfg)
+    if encoder == "yin_yang":
+        from src.pipeline.yin_yang_runner import encode_yin_yang_pool
+
+        return encode_yin_yang_pool(data, cfg)
+    if encoder == "fountain":
+        from src.pipeline.fountain_runner import encode_fountain_pool
+
+        return encode_fountain_pool(data, cfg)
+    raise ValueError(f"Unsupported encoder: {encoder}")
+
+
+def decode_pool(pool: EncodedPool, peptides: Sequence[str], cfg: PipelineConfig) -> bytes:
+    """
+    Decode received `peptides` (e.g. a corrupted copy of `pool.peptides`)
+    back to bytes with the decoder for `pool.encoder`.
+    """
+    if pool.encoder == "huffman":
+        from src.pipeline.huffman_runner import decode_huffman_pool
+
+        return decode_huffman_pool(pool, peptides, cfg)
+    if pool.encoder == "yin_yang":
+        from src.pipeline.yin_yang_runner import decode_yin_yang_pool
+
+        return decode_yin_yang_pool(pool, peptides, cfg)
+    if pool.encoder == "fountain":
+        from src.pipeline.fountain_runner import decode_fountain_pool
+
+        return decode_fountain_pool(pool, peptides, cfg)
+    raise ValueError(f"Unsupported encoder: {pool.encoder}")
@@ -0,0 +1,77 @@
+"""
+Hashes that decide whether a batch or sweep result can be reused.
+
+Batch manifests and sweep checkpoints both key finished work by the config
+(minus the fields below) and by a hash of the pipeline sources, so both use
+these helpers to stay in agreement about what invalidates a result. The
+encode cache keys its entries by the same source hash.
+"""
+
+import hashlib
+import json
+from dataclasses import asdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from src.pipeline.config import PipelineConfig
+
+_SRC_ROOT = Path(__file__).resolve().parents[1]
+_PROJECT_ROOT = _SRC_ROOT.parent
+
+# Config fields that do not change what a run produces: per-file labels,
+# caching and concurrency knobs, logging and memory tracking.
+UNHASHED_CONFIG_FIELDS = frozenset(
+    {
+        "score_label",
+        "encode_cache_dir",
+        "encode_cache_max_bytes",
+        "score_cache_path",
+        "score_concurrency",
+        "error_event_level",
+        "error_trace_path",
+        "error_trace_sample_rate",
+        "track_memory",
+        "yin_yang_workers",
+        "yin_yang_chunk_bytes",
+    }
+)
+
+
+def hashed_config_fields(cfg: PipelineConfig) -> Dict[str, object]:
+    """The config fields that results depend on (encoder name lowercased)."""
+    fields = {k: v for k, v in asdict(cfg).items() if k not in UNHASHED_CONFIG_FIELDS}
+    fields["encoder"] = cfg.encoder.lower()
+    return fields
+
+
+def config_hash(cfg: PipelineConfig) -> str:
+    payload = json.dumps(hashed_config_fields(cfg), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _src_digest() -> "hashlib._Hash":
+    """Running hash of the `src/` sources, computed once per process."""
+    digest = hashlib.sha256()
+    for path in sorted(_SRC_ROOT.rglob("*.py")):
+        digest.update(path.relative_to(_PROJECT_ROOT).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest
+
+
+def code_version(*extra_paths: Path) -> str:
+    """
+    Short hash of the `src/` sources plus `extra_paths` (e.g. the script
+    driving the run), so code changes invalidate earlier results. The
+    `src/` part is read once per process.
+    """
+    digest = _src_digest().copy()
+    for path in (Path(path).resolve() for path in extra_paths):
+        try:
+            name = path.relative_to(_PROJECT_ROOT).as_posix()
+        except ValueError:
+            name = path.name
+        digest.update(name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
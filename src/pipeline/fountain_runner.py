@@ -1,63 +1,118 @@
+from dataclasses import replace
+from typing import Sequence
+
 from src.encoding_schemes.fountain import FountainEncoded, fountain_decode, fountain_encode
 from src.encoding_schemes.peptide_mapping import bits_to_peptides, peptides_to_bits_fixed
 from src.error_correction.registry import get_fountain_overhead
 from src.error_model import apply_peptide_errors, apply_peptide_errors_scored
 from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool, encode_pool
+from src.pipeline.instrumentation import count, recording, span
+from src.pipeline.result import PipelineResult
 
 
-def encode_decode_file_fountain(data: bytes, cfg: PipelineConfig):
+def encode_fountain_pool(data: bytes, cfg: PipelineConfig) -> EncodedPool:
     """
-    Encode, corrupt and decode a single file with Fountain + peptide mapping.
-    Returns (original_peptides, corrupted_peptides, decoded_bytes).
+    Fountain-encode `data` into droplets and map them to fixed-size peptides.
     """
     overhead = get_fountain_overhead(cfg.ecc_profile, cfg.fountain_overhead)
-    encoded: FountainEncoded = fountain_encode(data, cfg, overhead=overhead)
-    payload_bits = encoded.bits
-    mapping = bits_to_peptides(
-        payload_bits,
-        peptide_length=cfg.peptide_length,
-        index_aa_length=cfg.index_aa_length,
-        pad_to_full_peptide=True,
-    )
-    original_peptides = mapping.peptides
-    total_peptides = len(mapping.peptides)
-
-    if cfg.error_model == "scored":
-        corrupted_peptides = apply_peptide_errors_scored(
-            original_peptides,
-            score_column=cfg.score_column,
-            score_label=cfg.score_label,
-            shuffle_passes=cfg.shuffle_passes,
-            drop_empty=(cfg.index_aa_length > 0),
-            # Fountain assumes an erasure channel. Interpret "loss" as whole-peptide
-            # dropout so a lost peptide wipes out its droplet segment cleanly.
-            loss_mode="peptide",
-            retry_sleep=cfg.score_retry_sleep,
-            max_sleep=cfg.score_max_sleep,
-            request_timeout=cfg.score_timeout,
-            score_batch_size=cfg.score_batch_size,
-            score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
+    with span("source_encode"):
+        encoded: FountainEncoded = fountain_encode(data, cfg, overhead=overhead)
+    with span("mapping"):
+        mapping = bits_to_peptides(
+            encoded.bits,
+            peptide_length=cfg.peptide_length,
+            index_aa_length=cfg.index_aa_length,
+            pad_to_full_peptide=True,
         )
-    else:
-        corrupted_peptides = apply_peptide_errors(
-            original_peptides,
-            loss_prob=cfg.loss_prob,
-            mutation_prob=cfg.mutation_prob,
-            insertion_prob=cfg.insertion_prob,
-            shuffle_prob=cfg.shuffle_prob,
-            shuffle_passes=cfg.shuffle_passes,
-            drop_empty=(cfg.index_aa_length > 0),
-            # Fountain assumes an erasure channel; use whole-peptide dropout.
-            loss_mode="peptide",
+    # Droplet bits are rebuilt from the received peptides before decoding.
+    encoded.bits = ""
+    return EncodedPool(
+        encoder="fountain",
+        peptides=mapping.peptides,
+        mapping=mapping,
+        source=encoded,
+        payload_bits=len(data) * 8,
+    )
+
+
+def decode_fountain_pool(pool: EncodedPool, peptides: Sequence[str], cfg: PipelineConfig) -> bytes:
+    """
+    Rebuild droplet bits from received `peptides` of a Fountain pool and
+    peel them back to bytes.
+    """
+    mapping = pool.mapping
+    encoded: FountainEncoded = pool.source
+    with span("demap"):
+        recovered_bits = peptides_to_bits_fixed(
+            list(peptides),
+            peptide_length=mapping.peptide_length,
+            index_aa_length=mapping.index_aa_length,
+            total_peptides=len(mapping.peptides),
+            pad_bits=mapping.pad_bits,
         )
 
-    recovered_bits = peptides_to_bits_fixed(
-        list(corrupted_peptides),
-        peptide_length=mapping.peptide_length,
-        index_aa_length=mapping.index_aa_length,
-        total_peptides=total_peptides,
-        pad_bits=mapping.pad_bits,
+    with span("source_decode"):
+        # Decode a copy: the pool may be reused or written out after decoding.
+        return fountain_decode(replace(encoded, bits=recovered_bits))
+
+
+def encode_decode_file_fountain(data: bytes, cfg: PipelineConfig) -> PipelineResult:
+    """
+    Encode, corrupt and decode a single file with Fountain + peptide mapping.
+    Returns a PipelineResult (unpacks as original/corrupted peptides and decoded bytes).
+    """
+    with recording(memory=cfg.track_memory) as stages:
+        with span("encode"):
+            pool = encode_pool(data, cfg, encoder="fountain")
+        original_peptides = pool.peptides
+
+        count("peptides_transmitted", len(original_peptides))
+        with span("corrupt"):
+            if cfg.error_model == "scored":
+                corrupted_peptides = apply_peptide_errors_scored(
+                    original_peptides,
+                    score_column=cfg.score_column,
+                    score_label=cfg.score_label,
+                    shuffle_passes=cfg.shuffle_passes,
+                    drop_empty=(cfg.index_aa_length > 0),
+                    # Fountain assumes an erasure channel. Interpret "loss" as whole-peptide
+                    # dropout so a lost peptide wipes out its droplet segment cleanly.
+                    loss_mode="peptide",
+                    retry_sleep=cfg.score_retry_sleep,
+                    max_sleep=cfg.score_max_sleep,
+                    request_timeout=cfg.score_timeout,
+                    score_batch_size=cfg.score_batch_size,
+                    score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
+                    score_cache_path=cfg.score_cache_path,
+                    score_concurrency=cfg.score_concurrency,
+                    score_provider=cfg.score_provider,
+                    score_provider_url=cfg.score_provider_url,
+                    event_level=cfg.error_event_level,
+                    trace_path=cfg.error_trace_path,
+                    trace_sample_rate=cfg.error_trace_sample_rate,
+                )
+            else:
+                corrupted_peptides = apply_peptide_errors(
+                    original_peptides,
+                    loss_prob=cfg.loss_prob,
+                    mutation_prob=cfg.mutation_prob,
+                    insertion_prob=cfg.insertion_prob,
+                    shuffle_prob=cfg.shuffle_prob,
+                    shuffle_passes=cfg.shuffle_passes,
+                    drop_empty=(cfg.index_aa_length > 0),
+                    # Fountain assumes an erasure channel; use whole-peptide dropout.
+                    loss_mode="peptide",
+                )
+        count("peptides_received", len(corrupted_peptides))
+
+        decoded = decode_fountain_pool(pool, corrupted_peptides, cfg)
+
+    return PipelineResult(
+        pool=pool,
+        corrupted_peptides=corrupted_peptides,
+        decoded=decoded,
+        timings=stages.timings(),
+        counters=dict(stages.counters),
+        memory=stages.memory_usage(),
     )
-    encoded.bits = recovered_bits
-    decoded = fountain_decode(encoded)
-    return original_peptides, corrupted_peptides, decoded
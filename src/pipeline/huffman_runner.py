@@ -1,5 +1,6 @@
+from typing import Sequence
 
-from src.encoding_schemes.huffman import huffman_encode, huffman_decode
+from src.encoding_schemes.huffman import HuffmanEncoded, huffman_encode, huffman_decode
 from src.encoding_schemes.peptide_mapping import bits_to_peptides, peptides_to_bits
 from src.error_correction import (
     ecc_encode_peptides,
@@ -8,59 +9,114 @@ from src.error_correction import (
 )
 from src.error_model import apply_peptide_errors, apply_peptide_errors_scored
 from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool, encode_pool
+from src.pipeline.instrumentation import count, recording, span
+from src.pipeline.result import PipelineResult
 
 
 IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp"}
 
 
-def encode_decode_file_huffman(data: bytes, cfg: PipelineConfig):
+def encode_huffman_pool(data: bytes, cfg: PipelineConfig) -> EncodedPool:
     """
-    Encode, corrupt and decode a single file with Huffman + peptide mapping.
-    Returns (original_peptides, corrupted_peptides, decoded_bytes).
+    Huffman-encode `data`, map it to peptides and add RS parity.
     """
-    enc = huffman_encode(data)
+    with span("source_encode"):
+        enc = huffman_encode(data)
+    payload_bits = len(enc.bits)
 
-    mapping = bits_to_peptides(
-        enc.bits,
-        peptide_length=cfg.peptide_length,
-        index_aa_length=cfg.index_aa_length,
+    with span("mapping"):
+        mapping = bits_to_peptides(
+            enc.bits,
+            peptide_length=cfg.peptide_length,
+            index_aa_length=cfg.index_aa_length,
+        )
+    with span("ecc_encode"):
+        ecc_packet: RSEncodedPeptides = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
+    # The bitstream is recovered from peptides at decode time; keep only the codec.
+    enc.bits = ""
+    return EncodedPool(
+        encoder="huffman",
+        peptides=ecc_packet.peptides,
+        mapping=mapping,
+        ecc_packet=ecc_packet,
+        source=enc,
+        payload_bits=payload_bits,
     )
-    ecc_packet: RSEncodedPeptides = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-    original_peptides = ecc_packet.peptides
 
-    if cfg.error_model == "scored":
-        corrupted_peptides = apply_peptide_errors_scored(
-            original_peptides,
-            score_column=cfg.score_column,
-            score_label=cfg.score_label,
-            shuffle_passes=cfg.shuffle_passes,
-            retry_sleep=cfg.score_retry_sleep,
-            max_sleep=cfg.score_max_sleep,
-            request_timeout=cfg.score_timeout,
-            score_batch_size=cfg.score_batch_size,
-            score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
-        )
-    else:
-        corrupted_peptides = apply_peptide_errors(
-            original_peptides,
-            loss_prob=cfg.loss_prob,
-            mutation_prob=cfg.mutation_prob,
-            insertion_prob=cfg.insertion_prob,
-            shuffle_prob=cfg.shuffle_prob,
-            shuffle_passes=cfg.shuffle_passes,
+
+def decode_huffman_pool(pool: EncodedPool, peptides: Sequence[str], cfg: PipelineConfig) -> bytes:
+    """
+    Decode received `peptides` of a Huffman pool back to bytes (b"" when the
+    recovered bitstream does not decode).
+    """
+    with span("ecc_decode"):
+        recovered_mapping = ecc_decode_peptides(
+            peptides,
+            encoded=pool.ecc_packet,
+            profile=cfg.ecc_profile,
         )
 
-    recovered_mapping = ecc_decode_peptides(
-        corrupted_peptides,
-        encoded=ecc_packet,
-        profile=cfg.ecc_profile,
-    )
+    with span("demap"):
+        recovered_bits = peptides_to_bits(recovered_mapping)
+
+    with span("source_decode"):
+        enc = HuffmanEncoded(bits=recovered_bits, codec=pool.source.codec)
+        try:
+            return huffman_decode(enc)
+        except Exception:
+            return b""
 
-    recovered_bits = peptides_to_bits(recovered_mapping)
-    enc.bits = recovered_bits
-    try:
-        decoded = huffman_decode(enc)
-    except Exception:
-        decoded = b""
 
-    return original_peptides, corrupted_peptides, decoded
+def encode_decode_file_huffman(data: bytes, cfg: PipelineConfig) -> PipelineResult:
+    """
+    Encode, corrupt and decode a single file with Huffman + peptide mapping.
+    Returns a PipelineResult (unpacks as original/corrupted peptides and decoded bytes).
+    """
+    with recording(memory=cfg.track_memory) as stages:
+        with span("encode"):
+            pool = encode_pool(data, cfg, encoder="huffman")
+        original_peptides = pool.peptides
+
+        count("peptides_transmitted", len(original_peptides))
+        with span("corrupt"):
+            if cfg.error_model == "scored":
+                corrupted_peptides = apply_peptide_errors_scored(
+                    original_peptides,
+                    score_column=cfg.score_column,
+                    score_label=cfg.score_label,
+                    shuffle_passes=cfg.shuffle_passes,
+                    retry_sleep=cfg.score_retry_sleep,
+                    max_sleep=cfg.score_max_sleep,
+                    request_timeout=cfg.score_timeout,
+                    score_batch_size=cfg.score_batch_size,
+                    score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
+                    score_cache_path=cfg.score_cache_path,
+                    score_concurrency=cfg.score_concurrency,
+                    score_provider=cfg.score_provider,
+                    score_provider_url=cfg.score_provider_url,
+                    event_level=cfg.error_event_level,
+                    trace_path=cfg.error_trace_path,
+                    trace_sample_rate=cfg.error_trace_sample_rate,
+                )
+            else:
+                corrupted_peptides = apply_peptide_errors(
+                    original_peptides,
+                    loss_prob=cfg.loss_prob,
+                    mutation_prob=cfg.mutation_prob,
+                    insertion_prob=cfg.insertion_prob,
+                    shuffle_prob=cfg.shuffle_prob,
+                    shuffle_passes=cfg.shuffle_passes,
+                )
+        count("peptides_received", len(corrupted_peptides))
+
+        decoded = decode_huffman_pool(pool, corrupted_peptides, cfg)
+
+    return PipelineResult(
+        pool=pool,
+        corrupted_peptides=corrupted_peptides,
+        decoded=decoded,
+        timings=stages.timings(),
+        counters=dict(stages.counters),
+        memory=stages.memory_usage(),
+    )
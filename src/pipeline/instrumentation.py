@@ -0,0 +1,227 @@
+"""
+Stage-level timing spans and counters for the pipeline.
+
+Code marks stages with `with span("ecc_decode"): ...` and `count("...", n)`.
+Both are no-ops (one context-variable lookup) unless a StageRecorder is
+active via `with recording() as stages:`. Nested recorders fold their
+totals into the enclosing one when they exit.
+
+With `recording(memory=True)` (inherited by nested recorders) each span
+also records its tracemalloc peak above the allocation level at span
+entry, and the process peak RSS (high-water mark) when the span ends.
+
+Spans may nest (`encode` encloses `source_encode`, `mapping`, ...), so span
+totals overlap; `leaf_timings()` keeps only spans that never enclosed
+another one, which add up without double counting.
+Memory tracking is opt-in: tracemalloc slows allocation-heavy stages
+down several times.
+"""
+
+import csv
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_ACTIVE: ContextVar[Optional["StageRecorder"]] = ContextVar("stage_recorder", default=None)
+_NULL_SPAN = nullcontext()
+
+
+_MIB = 1024 * 1024
+
+
+def peak_rss_bytes() -> int:
+    """Process peak resident set size so far (0 if unavailable)."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class StageRecorder:
+    """Accumulated seconds per span name plus integer counters (and, opt-in, memory)."""
+
+    def __init__(self, memory: bool = False):
+        self.spans: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.memory = memory
+        self.mem_peaks: Dict[str, int] = {}
+        self.rss_peaks: Dict[str, int] = {}
+        # Spans that enclosed another span, and the spans open right now.
+        self.parents: Set[str] = set()
+        self._open: List[str] = []
+
+    def open_span(self, name: str) -> None:
+        if self._open:
+            self.parents.add(self._open[-1])
+        self._open.append(name)
+
+    def close_span(self, name: str, seconds: float) -> None:
+        self._open.pop()
+        self.add_span(name, seconds)
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_memory(self, name: str, traced_peak: int, rss_peak: int) -> None:
+        self.mem_peaks[name] = max(self.mem_peaks.get(name, 0), traced_peak)
+        self.rss_peaks[name] = max(self.rss_peaks.get(name, 0), rss_peak)
+
+    def merge(self, other: "StageRecorder") -> None:
+        for name, seconds in other.spans.items():
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls.get(name, 0)
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name in other.mem_peaks:
+            self.add_memory(name, other.mem_peaks[name], other.rss_peaks.get(name, 0))
+        self.parents.update(other.parents)
+        if self._open and other.spans:
+            # The nested recorder's spans ran inside one of ours.
+            self.parents.add(self._open[-1])
+
+    def timings(self) -> Dict[str, float]:
+        """Span totals keyed as `<stage>_s`."""
+        return {f"{name}_s": seconds for name, seconds in self.spans.items()}
+
+    def leaf_timings(self) -> Dict[str, float]:
+        """`timings()` without spans that enclosed other spans, so the values can be summed."""
+        return {f"{name}_s": seconds for name, seconds in self.spans.items() if name not in self.parents}
+
+    def memory_usage(self) -> Dict[str, float]:
+        """Per-stage traced peak (`<stage>_mem_mib`) and process peak RSS (`<stage>_rss_mib`)."""
+        usage: Dict[str, float] = {}
+        for name, traced in self.mem_peaks.items():
+            usage[f"{name}_mem_mib"] = traced / _MIB
+            usage[f"{name}_rss_mib"] = self.rss_peaks.get(name, 0) / _MIB
+        return usage
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        payload = {
+            "spans": dict(self.spans),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+        }
+        if self.mem_peaks:
+            payload["memory"] = self.memory_usage()
+        return payload
+
+    def to_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2, sort_keys=True), encoding="utf-8")
+
+    def to_csv(self, path: Path) -> None:
+        with Path(path).open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["kind", "name", "value", "calls"])
+            for name in sorted(self.spans):
+                writer.writerow(["span", name, self.spans[name], self.calls.get(name, 0)])
+            for name in sorted(self.counters):
+                writer.writerow(["counter", name, self.counters[name], ""])
+            for name, value in sorted(self.memory_usage().items()):
+                writer.writerow(["memory", name, value, ""])
+
+
+# [traced bytes at span entry, highest traced peak seen] per open memory span,
+# shared by all recorders since tracemalloc's peak is process-wide.
+_MEM_STACK: List[List[int]] = []
+
+
+def _mem_enter() -> None:
+    current, peak = tracemalloc.get_traced_memory()
+    if _MEM_STACK:
+        # The reset below would lose the enclosing span's peak; carry it.
+        _MEM_STACK[-1][1] = max(_MEM_STACK[-1][1], peak)
+    tracemalloc.reset_peak()
+    _MEM_STACK.append([current, current])
+
+
+def _mem_exit() -> Tuple[int, int]:
+    """Close the innermost memory span; return (traced peak above entry, peak RSS)."""
+    _, peak = tracemalloc.get_traced_memory()
+    start, seen = _MEM_STACK.pop()
+    seen = max(seen, peak)
+    if _MEM_STACK:
+        _MEM_STACK[-1][1] = max(_MEM_STACK[-1][1], seen)
+    return seen - start, peak_rss_bytes()
+
+
+class _Span:
+    __slots__ = ("_recorder", "_name", "_start")
+
+    def __init__(self, recorder: StageRecorder, name: str):
+        self._recorder = recorder
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._recorder.open_span(self._name)
+        if self._recorder.memory:
+            _mem_enter()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._recorder.close_span(self._name, time.perf_counter() - self._start)
+        if self._recorder.memory:
+            self._recorder.add_memory(self._name, *_mem_exit())
+
+
+def span(name: str):
+    """Time the enclosed block as stage `name` on the active recorder."""
+    recorder = _ACTIVE.get()
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add `n` to counter `name` on the active recorder."""
+    recorder = _ACTIVE.get()
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+@contextmanager
+def recording(recorder: Optional[StageRecorder] = None, memory: bool = False) -> Iterator[StageRecorder]:
+    """
+    Activate `recorder` (or a new one) for the enclosed block. A new recorder
+    tracks memory if `memory` is set or the enclosing recorder does.
+    """
+    parent = _ACTIVE.get()
+    if recorder is None:
+        recorder = StageRecorder(memory=memory or (parent is not None and parent.memory))
+    # Only the recorder that started tracemalloc stops it.
+    started_tracing = recorder.memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _ACTIVE.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _ACTIVE.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+        if parent is not None:
+            parent.merge(recorder)
@@ -0,0 +1,531 @@
+"""
+Binary container for an encoded peptide pool.
+
+Layout (little-endian):
+
+    magic "PEPPOOL\\0" | version u16 | reserved u16 | meta_len u32 | columns_len u64 | crc32 u32
+    meta     zlib-compressed JSON: PipelineConfig, encoder, peptide counts,
+             mapping layout and pad bits, and the scalar decode parameters
+             of the source codec (Yin-Yang / Fountain fields) and RS packet
+    columns  zlib-compressed fixed-width arrays, in this order:
+             RS packet  data_lengths u32, block_id u32, index_in_block u32,
+                        is_parity u8, data_bits u32, padded_bits u32,
+                        pad_offset u32, pad bit counts u16, pad bits packed
+             Huffman    symbol u16 (256 = end of file), code length u16,
+                        code bits packed
+    (zero padding to an 8-byte boundary)
+    exceptions  u64 pairs (peptide index, length) for every peptide whose
+                length differs from the nominal one, in index order
+    positions   u32 per data peptide into the peptide table (only when the
+                mapping order can't be rebuilt from the RS metadata)
+    residues    all peptides back to back at 3 bits per residue
+                (BITS_TO_AA codes), big-endian, zero-padded at the front
+
+Peptide i starts at residue i * nominal + (sum of length deltas of earlier
+exceptions), so any peptide is read straight from the memory map without
+touching the others. Nothing is unpickled: a container holds only JSON and
+integer arrays, and the CRC over everything after the header is checked
+before a whole pool is rebuilt.
+"""
+
+import bisect
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from src.encoding_schemes.peptide_mapping import AA_TO_BITS, BITS_TO_AA, PeptideMappingResult
+from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool
+
+POOL_MAGIC = b"PEPPOOL\0"
+POOL_FORMAT_VERSION = 2
+POOL_SUFFIX = ".ppool"
+# PipelineConfig.pool_format values for batch output.
+POOL_FORMATS = ("text", "binary")
+_HEADER = struct.Struct("<8sHHIQI")
+_HUFFMAN_EOF = 256
+
+# Residue letter <-> octal digit (one 3-bit code each).
+_TO_DIGIT = str.maketrans({aa: str(int(bits, 2)) for aa, bits in AA_TO_BITS.items()})
+_TO_RESIDUE = str.maketrans({str(int(bits, 2)): aa for bits, aa in BITS_TO_AA.items()})
+
+# Per-encoder source field holding the payload, which decoders rebuild from
+# the received peptides and which is therefore never stored.
+_SOURCE_PAYLOAD = {"yin_yang": "peptides", "fountain": "bits"}
+# RSEncodedPeptides fields stored as columns rather than meta scalars.
+_RS_LIST_FIELDS = ("peptides", "data_lengths", "metadata", "padding")
+
+
+def _pack_residues(residues: str) -> bytes:
+    unknown = set(residues) - set(AA_TO_BITS)
+    if unknown:
+        raise ValueError(f"Residues outside the 3-bit alphabet: {''.join(sorted(unknown))}")
+    if not residues:
+        return b""
+    value = int(residues.translate(_TO_DIGIT), 8)
+    return value.to_bytes((3 * len(residues) + 7) // 8, "big")
+
+
+def _unpack_residues(packed, count: int, tail_bits: int = 0) -> str:
+    """The last `count` residues of `packed` once `tail_bits` trailing bits are dropped."""
+    if not count:
+        return ""
+    value = int.from_bytes(packed, "big") >> tail_bits
+    value &= (1 << (3 * count)) - 1
+    return format(value, f"0{count}o").translate(_TO_RESIDUE)
+
+
+class _ColumnWriter:
+    """Fixed-width little-endian arrays and packed bitstrings, appended in order."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def ints(self, typecode: str, values) -> None:
+        words = array(typecode, values)
+        if sys.byteorder != "little":
+            words.byteswap()
+        self._chunks.append(words.tobytes())
+
+    def bits(self, bitstring: str) -> None:
+        if bitstring:
+            self._chunks.append(int(bitstring, 2).to_bytes((len(bitstring) + 7) // 8, "big"))
+
+    def getvalue(self) -> bytes:
+        return zlib.compress(b"".join(self._chunks)) if self._chunks else b""
+
+
+class _ColumnReader:
+    """Reads back what _ColumnWriter wrote, given the same order and counts."""
+
+    def __init__(self, blob):
+        self._data = zlib.decompress(blob) if len(blob) else b""
+        self._offset = 0
+
+    def _take(self, size: int) -> bytes:
+        if self._offset + size > len(self._data):
+            raise ValueError("Pool container columns are truncated")
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += size
+        return chunk
+
+    def ints(self, typecode: str, count: int) -> array:
+        words = array(typecode)
+        words.frombytes(self._take(count * words.itemsize))
+        if sys.byteorder != "little":
+            words.byteswap()
+        return words
+
+    def bits(self, count: int) -> str:
+        if not count:
+            return ""
+        return format(int.from_bytes(self._take((count + 7) // 8), "big"), f"0{count}b")
+
+    def finish(self) -> None:
+        if self._offset != len(self._data):
+            raise ValueError("Pool container columns have trailing data")
+
+
+def _write_packet(packet, columns: _ColumnWriter) -> Optional[Dict[str, object]]:
+    """Scalar RS packet fields for the meta section; per-peptide lists go to `columns`."""
+    if packet is None:
+        return None
+    pad_bits = [pad.pad_bits for pad in packet.padding]
+    columns.ints("I", packet.data_lengths)
+    columns.ints("I", [meta.block_id for meta in packet.metadata])
+    columns.ints("I", [meta.index_in_block for meta in packet.metadata])
+    columns.ints("B", [meta.is_parity for meta in packet.metadata])
+    columns.ints("I", [pad.data_bits for pad in packet.padding])
+    columns.ints("I", [pad.padded_bits for pad in packet.padding])
+    columns.ints("I", [pad.pad_offset for pad in packet.padding])
+    columns.ints("H", [len(bits) for bits in pad_bits])
+    columns.bits("".join(pad_bits))
+    scalars = {f.name: getattr(packet, f.name) for f in fields(packet) if f.name not in _RS_LIST_FIELDS}
+    scalars.update(
+        data_lengths=len(packet.data_lengths),
+        metadata=len(packet.metadata),
+        padding=len(packet.padding),
+    )
+    return scalars
+
+
+def _read_packet(rs: Optional[Dict[str, object]], columns: _ColumnReader, peptides: List[str]):
+    if rs is None:
+        return None
+    from src.error_correction.reed_solomon import PeptideMeta, RSEncodedPeptides, SymbolPadding
+
+    rs = dict(rs)
+    n_data, n_meta, n_pad = rs.pop("data_lengths"), rs.pop("metadata"), rs.pop("padding")
+    data_lengths = columns.ints("I", n_data).tolist()
+    block_ids = columns.ints("I", n_meta)
+    indices = columns.ints("I", n_meta)
+    parity = columns.ints("B", n_meta)
+    data_bits = columns.ints("I", n_pad)
+    padded_bits = columns.ints("I", n_pad)
+    pad_offsets = columns.ints("I", n_pad)
+    pad_lengths = columns.ints("H", n_pad)
+    all_pad_bits = columns.bits(sum(pad_lengths))
+    padding = []
+    start = 0
+    for data, padded, offset, length in zip(data_bits, padded_bits, pad_offsets, pad_lengths):
+        padding.append(SymbolPadding(data, padded, offset, all_pad_bits[start:start + length]))
+        start += length
+    return RSEncodedPeptides(
+        peptides=peptides,
+        data_lengths=data_lengths,
+        metadata=[PeptideMeta(b, i, bool(p)) for b, i, p in zip(block_ids, indices, parity)],
+        padding=padding,
+        **rs,
+    )
+
+
+def _huffman_eof():
+    """dahuffman's end-of-file symbol (the one non-byte key of every code table)."""
+    from dahuffman import HuffmanCodec
+
+    return next(s for s in HuffmanCodec.from_frequencies({0: 1}).get_code_table() if not isinstance(s, int))
+
+
+def _write_source(encoder: str, source, columns: _ColumnWriter) -> Optional[Dict[str, object]]:
+    """Decode parameters of the source codec; the Huffman code table goes to `columns`."""
+    if source is None:
+        return None
+    if encoder == "huffman":
+        table = source.codec.get_code_table()
+        symbols = [_HUFFMAN_EOF if not isinstance(s, int) else s for s in table]
+        sizes = [size for size, _ in table.values()]
+        columns.ints("H", symbols)
+        columns.ints("H", sizes)
+        columns.bits("".join(format(value, f"0{size}b") if size else "" for size, value in table.values()))
+        return {"codes": len(table)}
+    if encoder in _SOURCE_PAYLOAD:
+        payload = _SOURCE_PAYLOAD[encoder]
+        return {f.name: getattr(source, f.name) for f in fields(source) if f.name != payload}
+    raise ValueError(f"Unsupported encoder: {encoder}")
+
+
+def _read_source(encoder: str, params: Optional[Dict[str, object]], columns: _ColumnReader):
+    if params is None:
+        return None
+    if encoder == "huffman":
+        from dahuffman import HuffmanCodec
+
+        from src.encoding_schemes.huffman import HuffmanEncoded
+
+        count = params["codes"]
+        symbols = columns.ints("H", count)
+        sizes = columns.ints("H", count)
+        code_bits = columns.bits(sum(sizes))
+        eof = _huffman_eof()
+        table = {}
+        start = 0
+        for symbol, size in zip(symbols, sizes):
+            value = int(code_bits[start:start + size], 2) if size else 0
+            table[eof if symbol == _HUFFMAN_EOF else symbol] = (size, value)
+            start += size
+        return HuffmanEncoded(bits="", codec=HuffmanCodec(table, concat=bytes, check=False))
+    if encoder == "yin_yang":
+        from src.encoding_schemes.yin_yang import YinYangEncoded
+
+        return YinYangEncoded(peptides=[], **params)
+    if encoder == "fountain":
+        from src.encoding_schemes.fountain import FountainEncoded
+
+        return FountainEncoded(bits="", **params)
+    raise ValueError(f"Unsupported encoder: {encoder}")
+
+
+def _rs_data_order(packet, count: int) -> Optional[List[int]]:
+    """Table positions of the data peptides in (block, index) order, or None without RS metadata."""
+    if packet is None or len(packet.metadata) != count:
+        return None
+    data = [
+        (meta.block_id, meta.index_in_block, pos)
+        for pos, meta in enumerate(packet.metadata)
+        if not meta.is_parity
+    ]
+    return [pos for _, _, pos in sorted(data)]
+
+
+def _encode_sections(pool: EncodedPool, cfg: Optional[PipelineConfig]) -> Iterator[bytes]:
+    """The container for `pool` as a sequence of byte chunks, header first."""
+    table = list(pool.peptides)
+    data_peptides = pool.mapping.peptides
+    positions: List[int] = []
+    if data_peptides is pool.peptides or data_peptides == pool.peptides:
+        layout = "pool"
+    else:
+        order = _rs_data_order(pool.ecc_packet, len(table))
+        if order is not None and [table[pos] for pos in order] == data_peptides:
+            layout = "rs_order"
+        else:
+            layout = "positions"
+            first_seen: Dict[str, int] = {}
+            for pos, peptide in enumerate(table):
+                first_seen.setdefault(peptide, pos)
+            for peptide in data_peptides:
+                if peptide not in first_seen:
+                    first_seen[peptide] = len(table)
+                    table.append(peptide)
+                positions.append(first_seen[peptide])
+
+    lengths = Counter(len(peptide) for peptide in table)
+    nominal = lengths.most_common(1)[0][0] if lengths else 0
+    exceptions = [(idx, len(pep)) for idx, pep in enumerate(table) if len(pep) != nominal]
+    residues = "".join(table)
+
+    columns = _ColumnWriter()
+    rs = _write_packet(pool.ecc_packet, columns)
+    source = _write_source(pool.encoder, pool.source, columns)
+    meta = {
+        "encoder": pool.encoder,
+        "config": asdict(cfg) if cfg is not None else None,
+        "transmitted": len(pool.peptides),
+        "peptides": len(table),
+        "residues": len(residues),
+        "nominal_length": nominal,
+        "exceptions": len(exceptions),
+        "positions": len(positions),
+        "mapping": {
+            "layout": layout,
+            "pad_bits": pool.mapping.pad_bits,
+            "peptide_length": pool.mapping.peptide_length,
+            "index_aa_length": pool.mapping.index_aa_length,
+        },
+        "payload_bits": pool.payload_bits,
+        "source": source,
+        "rs": rs,
+    }
+    meta_bytes = zlib.compress(json.dumps(meta, sort_keys=True).encode("utf-8"))
+    column_bytes = columns.getvalue()
+
+    exception_words = array("Q", [word for pair in exceptions for word in pair])
+    position_words = array("I", positions)
+    if sys.byteorder != "little":
+        exception_words.byteswap()
+        position_words.byteswap()
+
+    body = [
+        meta_bytes,
+        column_bytes,
+        b"\0" * (-(_HEADER.size + len(meta_bytes) + len(column_bytes)) % 8),
+        exception_words.tobytes(),
+        position_words.tobytes(),
+        _pack_residues(residues),
+    ]
+    crc = 0
+    for chunk in body:
+        crc = zlib.crc32(chunk, crc)
+    yield _HEADER.pack(POOL_MAGIC, POOL_FORMAT_VERSION, 0, len(meta_bytes), len(column_bytes), crc)
+    yield from body
+
+
+def pool_to_bytes(pool: EncodedPool, cfg: Optional[PipelineConfig] = None) -> bytes:
+    """`pool` (and optionally the config that produced it) as container bytes."""
+    return b"".join(_encode_sections(pool, cfg))
+
+
+def write_pool(path: Path, pool: EncodedPool, cfg: PipelineConfig) -> Path:
+    """Write `pool` (and the config that produced it) as a container at `path`."""
+    path = Path(path)
+    with path.open("wb") as handle:
+        for chunk in _encode_sections(pool, cfg):
+            handle.write(chunk)
+    return path
+
+
+class PoolReader:
+    """
+    Memory-mapped view of a pool container (or of container bytes already in
+    memory). `reader[i]` unpacks peptide i only; `peptides()` unpacks them all
+    and `pool()` rebuilds the EncodedPool.
+    """
+
+    def __init__(self, source: Union[Path, str, bytes]):
+        self._file = None
+        self._map = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.path = None
+            self._name = "<pool bytes>"
+            self._view = memoryview(source)
+        else:
+            self.path = Path(source)
+            self._name = str(self.path)
+            self._file = self.path.open("rb")
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                self._file.close()
+                raise ValueError(f"{self._name} is not a peptide pool container") from None
+            self._view = memoryview(self._map)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        if len(self._view) < _HEADER.size:
+            raise ValueError(f"{self._name} is not a peptide pool container")
+        magic, version, _, meta_len, columns_len, self._crc = _HEADER.unpack_from(self._view, 0)
+        if magic != POOL_MAGIC:
+            raise ValueError(f"{self._name} is not a peptide pool container")
+        if version != POOL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported pool container version {version} in {self._name}")
+        offset = _HEADER.size
+        try:
+            self.meta = json.loads(zlib.decompress(self._view[offset:offset + meta_len]).decode("utf-8"))
+        except (zlib.error, ValueError) as exc:
+            raise ValueError(f"{self._name} has a corrupt pool container header") from exc
+        offset += meta_len
+        self._columns_range = (offset, offset + columns_len)
+        offset += columns_len
+        offset += -offset % 8
+
+        exceptions = array("Q")
+        exceptions.frombytes(self._view[offset:offset + 16 * self.meta["exceptions"]])
+        offset += 16 * self.meta["exceptions"]
+        positions = array("I")
+        positions.frombytes(self._view[offset:offset + 4 * self.meta["positions"]])
+        offset += 4 * self.meta["positions"]
+        if sys.byteorder != "little":
+            exceptions.byteswap()
+            positions.byteswap()
+        self._positions = positions
+
+        self._nominal = self.meta["nominal_length"]
+        self._exception_index = list(exceptions[0::2])
+        self._exception_length = list(exceptions[1::2])
+        # Residue shift contributed by exceptions up to and including each one.
+        self._exception_shift: List[int] = []
+        shift = 0
+        for length in self._exception_length:
+            shift += length - self._nominal
+            self._exception_shift.append(shift)
+
+        self._residues_start = offset
+        total_bits = 3 * self.meta["residues"]
+        self._lead_bits = (len(self._view) - offset) * 8 - total_bits
+        if self._lead_bits < 0:
+            raise ValueError(f"{self._name} is truncated")
+
+    def __enter__(self) -> "PoolReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __len__(self) -> int:
+        """Number of transmitted peptides."""
+        return self.meta["transmitted"]
+
+    @property
+    def encoder(self) -> str:
+        return self.meta["encoder"]
+
+    @property
+    def config(self) -> Optional[PipelineConfig]:
+        """The stored PipelineConfig (None for containers written without one)."""
+        if self.meta["config"] is None:
+            return None
+        known = {f.name for f in fields(PipelineConfig)}
+        return PipelineConfig(**{k: v for k, v in self.meta["config"].items() if k in known})
+
+    def verify(self) -> None:
+        """Raise ValueError unless the CRC over everything after the header matches."""
+        if zlib.crc32(self._view[_HEADER.size:]) != self._crc:
+            raise ValueError(f"{self._name} failed its checksum")
+
+    def _span(self, idx: int) -> Tuple[int, int]:
+        """(first residue, length) of table entry `idx`."""
+        j = bisect.bisect_left(self._exception_index, idx)
+        start = idx * self._nominal + (self._exception_shift[j - 1] if j else 0)
+        if j < len(self._exception_index) and self._exception_index[j] == idx:
+            return start, self._exception_length[j]
+        return start, self._nominal
+
+    def _read(self, start: int, count: int) -> str:
+        first_bit = self._lead_bits + 3 * start
+        end_bit = first_bit + 3 * count
+        lo = self._residues_start + first_bit // 8
+        hi = self._residues_start + (end_bit + 7) // 8
+        return _unpack_residues(self._view[lo:hi], count, tail_bits=-end_bit % 8)
+
+    def __getitem__(self, idx: int) -> str:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("peptide index out of range")
+        return self._read(*self._span(idx))
+
+    def _table(self) -> List[str]:
+        residues = self._read(0, self.meta["residues"])
+        lengths = [self._nominal] * self.meta["peptides"]
+        for idx, length in zip(self._exception_index, self._exception_length):
+            lengths[idx] = length
+        table = []
+        start = 0
+        for length in lengths:
+            table.append(residues[start:start + length])
+            start += length
+        return table
+
+    def peptides(self) -> List[str]:
+        """All transmitted peptides, in order."""
+        return self._table()[: len(self)]
+
+    def pool(self) -> EncodedPool:
+        """The EncodedPool as written, peptide lists included (checksum verified first)."""
+        self.verify()
+        table = self._table()
+        peptides = table[: len(self)]
+        start, stop = self._columns_range
+        columns = _ColumnReader(self._view[start:stop])
+        packet = _read_packet(self.meta["rs"], columns, peptides)
+        source = _read_source(self.encoder, self.meta["source"], columns)
+        columns.finish()
+
+        mapping = dict(self.meta["mapping"])
+        layout = mapping.pop("layout")
+        if layout == "pool":
+            data_peptides = peptides
+        elif layout == "rs_order":
+            data_peptides = [peptides[pos] for pos in _rs_data_order(packet, len(peptides))]
+        else:
+            data_peptides = [table[pos] for pos in self._positions]
+        return EncodedPool(
+            encoder=self.encoder,
+            peptides=peptides,
+            mapping=PeptideMappingResult(peptides=data_peptides, **mapping),
+            ecc_packet=packet,
+            source=source,
+            payload_bits=self.meta["payload_bits"],
+        )
+
+
+def read_pool(path: Path) -> Tuple[Optional[PipelineConfig], EncodedPool]:
+    """Load the config and EncodedPool stored in a container."""
+    with PoolReader(path) as reader:
+        return reader.config, reader.pool()
+
+
+def pool_from_bytes(data: bytes) -> EncodedPool:
+    """Rebuild the EncodedPool from `pool_to_bytes` output."""
+    with PoolReader(data) as reader:
+        return reader.pool()
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from src.pipeline.encoded_pool import EncodedPool
+
+if TYPE_CHECKING:
+    from src.error_correction.reed_solomon import PeptideMeta, RSEncodedPeptides
+
+
+@dataclass
+class PipelineResult:
+    """
+    Outcome of one encode -> corrupt -> decode run.
+
+    - pool: encoded pool that was sent through the channel (packet + decode metadata)
+    - corrupted_peptides: pool after the error model
+    - decoded: recovered bytes (b"" when decoding failed)
+    - timings: wall-clock seconds per pipeline stage (`<stage>_s`)
+    - counters: stage counters (e.g. peptides_transmitted / peptides_received)
+    - memory: `<stage>_mem_mib` / `<stage>_rss_mib` when cfg.track_memory is set
+
+    Unpacks like the older `(original_peptides, corrupted_peptides, decoded)` tuple.
+    """
+    pool: EncodedPool
+    corrupted_peptides: List[str]
+    decoded: bytes
+    timings: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    memory: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def original_peptides(self) -> List[str]:
+        return self.pool.peptides
+
+    @property
+    def ecc_packet(self) -> Optional["RSEncodedPeptides"]:
+        return self.pool.ecc_packet
+
+    @property
+    def metadata(self) -> List["PeptideMeta"]:
+        return self.pool.ecc_packet.metadata if self.pool.ecc_packet is not None else []
+
+    def __iter__(self) -> Iterator[object]:
+        return iter((self.original_peptides, self.corrupted_peptides, self.decoded))
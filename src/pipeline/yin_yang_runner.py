@@ -1,16 +1,21 @@
+from typing import Sequence
+
 from src.encoding_schemes.yin_yang import YinYangEncoded, yin_yang_decode, yin_yang_encode
 from src.encoding_schemes.peptide_mapping import PeptideMappingResult
 from src.error_correction import ecc_decode_peptides, ecc_encode_peptides
 from src.error_model import apply_peptide_errors, apply_peptide_errors_scored
 from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool, encode_pool
+from src.pipeline.instrumentation import count, recording, span
+from src.pipeline.result import PipelineResult
 
 
-def encode_decode_file_yin_yang(data: bytes, cfg: PipelineConfig):
+def encode_yin_yang_pool(data: bytes, cfg: PipelineConfig) -> EncodedPool:
     """
-    Encode, corrupt and decode a single file with Yin-Yang + peptide-level RS.
-    Returns (original_peptides, corrupted_peptides, decoded_bytes).
+    Yin-Yang-encode `data` and add peptide-level RS parity.
     """
-    enc: YinYangEncoded = yin_yang_encode(data, cfg)
+    with span("source_encode"):
+        enc: YinYangEncoded = yin_yang_encode(data, cfg)
 
     mapping = PeptideMappingResult(
         peptides=enc.peptides,
@@ -18,36 +23,32 @@ def encode_decode_file_yin_yang(data: bytes, cfg: PipelineConfig):
         peptide_length=cfg.peptide_length,
         index_aa_length=cfg.index_aa_length,
     )
-    ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-    original_peptides = ecc_packet.peptides
+    with span("ecc_encode"):
+        ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
+    # Data peptides live in `mapping`; the source only carries decode metadata.
+    enc.peptides = []
+    return EncodedPool(
+        encoder="yin_yang",
+        peptides=ecc_packet.peptides,
+        mapping=mapping,
+        ecc_packet=ecc_packet,
+        source=enc,
+        payload_bits=len(data) * 8,
+    )
 
-    if cfg.error_model == "scored":
-        corrupted_peptides = apply_peptide_errors_scored(
-            original_peptides,
-            score_column=cfg.score_column,
-            score_label=cfg.score_label,
-            shuffle_passes=cfg.shuffle_passes,
-            retry_sleep=cfg.score_retry_sleep,
-            max_sleep=cfg.score_max_sleep,
-            request_timeout=cfg.score_timeout,
-            score_batch_size=cfg.score_batch_size,
-            score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
-        )
-    else:
-        corrupted_peptides = apply_peptide_errors(
-            original_peptides,
-            loss_prob=cfg.loss_prob,
-            mutation_prob=cfg.mutation_prob,
-            insertion_prob=cfg.insertion_prob,
-            shuffle_prob=cfg.shuffle_prob,
-            shuffle_passes=cfg.shuffle_passes,
-        )
 
-    recovered_mapping = ecc_decode_peptides(
-        corrupted_peptides,
-        encoded=ecc_packet,
-        profile=cfg.ecc_profile,
-    )
+def decode_yin_yang_pool(pool: EncodedPool, peptides: Sequence[str], cfg: PipelineConfig) -> bytes:
+    """
+    Decode received `peptides` of a Yin-Yang pool back to bytes (b"" when the
+    recovered residues do not decode).
+    """
+    enc: YinYangEncoded = pool.source
+    with span("ecc_decode"):
+        recovered_mapping = ecc_decode_peptides(
+            peptides,
+            encoded=pool.ecc_packet,
+            profile=cfg.ecc_profile,
+        )
 
     recovered = YinYangEncoded(
         peptides=recovered_mapping.peptides,
@@ -58,9 +59,64 @@ def encode_decode_file_yin_yang(data: bytes, cfg: PipelineConfig):
         scheme_id=enc.scheme_id,
     )
 
-    try:
-        decoded = yin_yang_decode(recovered)
-    except Exception:
-        decoded = b""
+    with span("source_decode"):
+        try:
+            return yin_yang_decode(recovered)
+        except Exception:
+            return b""
 
-    return original_peptides, corrupted_peptides, decoded
+
+def encode_decode_file_yin_yang(data: bytes, cfg: PipelineConfig) -> PipelineResult:
+    """
+    Encode, corrupt and decode a single file with Yin-Yang + peptide-level RS.
+    Returns a PipelineResult (unpacks as original/corrupted peptides and decoded bytes).
+    """
+    with recording(memory=cfg.track_memory) as stages:
+        with span("encode"):
+            pool = encode_pool(data, cfg, encoder="yin_yang")
+        enc: YinYangEncoded = pool.source
+        original_peptides = pool.peptides
+
+        count("constraint_violations", enc.violations)
+        count("peptides_transmitted", len(original_peptides))
+        with span("corrupt"):
+            if cfg.error_model == "scored":
+                corrupted_peptides = apply_peptide_errors_scored(
+                    original_peptides,
+                    score_column=cfg.score_column,
+                    score_label=cfg.score_label,
+                    shuffle_passes=cfg.shuffle_passes,
+                    retry_sleep=cfg.score_retry_sleep,
+                    max_sleep=cfg.score_max_sleep,
+                    request_timeout=cfg.score_timeout,
+                    score_batch_size=cfg.score_batch_size,
+                    score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
+                    score_cache_path=cfg.score_cache_path,
+                    score_concurrency=cfg.score_concurrency,
+                    score_provider=cfg.score_provider,
+                    score_provider_url=cfg.score_provider_url,
+                    event_level=cfg.error_event_level,
+                    trace_path=cfg.error_trace_path,
+                    trace_sample_rate=cfg.error_trace_sample_rate,
+                )
+            else:
+                corrupted_peptides = apply_peptide_errors(
+                    original_peptides,
+                    loss_prob=cfg.loss_prob,
+                    mutation_prob=cfg.mutation_prob,
+                    insertion_prob=cfg.insertion_prob,
+                    shuffle_prob=cfg.shuffle_prob,
+                    shuffle_passes=cfg.shuffle_passes,
+                )
+        count("peptides_received", len(corrupted_peptides))
+
+        decoded = decode_yin_yang_pool(pool, corrupted_peptides, cfg)
+
+    return PipelineResult(
+        pool=pool,
+        corrupted_peptides=corrupted_peptides,
+        decoded=decoded,
+        timings=stages.timings(),
+        counters=dict(stages.counters),
+        memory=stages.memory_usage(),
+    )
@@ -1,5 +1,17 @@
 """Reporting utilities for comparing encoded/decoded outputs."""
 
+from src.reporting.metrics import (
+    bit_error_count,
+    byte_error_count,
+    error_counts,
+    error_position_histogram,
+)
 from src.reporting.report import generate_report
 
-__all__ = ["generate_report"]
+__all__ = [
+    "bit_error_count",
+    "byte_error_count",
+    "error_counts",
+    "error_position_histogram",
+    "generate_report",
+]
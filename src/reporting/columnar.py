@@ -0,0 +1,167 @@
+"""
+Columnar (Parquet / Arrow IPC) datasets for sweep and report rows.
+
+Rows are buffered and flushed as new part files, Hive-partitioned by the
+`partition_by` columns (`encoder=huffman/ecc_profile=rs64/part-....parquet`),
+so appending never rewrites earlier parts and readers can prune whole
+partitions. String columns are dictionary-encoded.
+
+pyarrow is optional; it is only imported when a columnar format is used.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+COLUMN_KINDS = ("str", "int", "uint", "float", "bool")
+DEFAULT_BATCH_ROWS = 50_000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise RuntimeError(
+            "pyarrow is required for columnar output. Install 'pyarrow' to use the parquet/arrow formats."
+        ) from exc
+    return pyarrow
+
+
+def _check_format(fmt: str) -> str:
+    fmt = fmt.lower()
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format: {fmt}")
+    return fmt
+
+
+def _to_array(pa, values: List[object], kind: str):
+    # CSV-shaped rows use "" for "not recorded"; store it as null.
+    values = [None if value == "" else value for value in values]
+    if kind == "str":
+        return pa.array([None if v is None else str(v) for v in values], pa.string()).dictionary_encode()
+    if kind == "int":
+        return pa.array([None if v is None else int(v) for v in values], pa.int64())
+    if kind == "uint":
+        return pa.array([None if v is None else int(v) for v in values], pa.uint64())
+    if kind == "float":
+        return pa.array([None if v is None else float(v) for v in values], pa.float64())
+    if kind == "bool":
+        return pa.array([None if v is None else v in (True, "True", "true", "1") for v in values], pa.bool_())
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+class ColumnarWriter:
+    """
+    Append rows (dicts) to a partitioned dataset under `root`.
+
+    `column_kinds` maps every column to one of COLUMN_KINDS and fixes the
+    schema, so parts written by different runs always line up. Use as a
+    context manager or call `close()` to flush the last rows.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        column_kinds: Mapping[str, str],
+        fmt: str = "parquet",
+        partition_by: Sequence[str] = (),
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        overwrite: bool = False,
+    ):
+        self.fmt = _check_format(fmt)
+        self._pa = _require_pyarrow()
+        for column in partition_by:
+            if column not in column_kinds:
+                raise ValueError(f"Partition column {column!r} is not a dataset column")
+        self.root = Path(root)
+        self.column_kinds = dict(column_kinds)
+        self.partition_by = tuple(partition_by)
+        self.batch_rows = max(1, batch_rows)
+        self._columns = [c for c in self.column_kinds if c not in self.partition_by]
+        self._buffers: Dict[Tuple[str, ...], List[Mapping[str, object]]] = {}
+        self._pending = 0
+        self._parts = 0
+        # Unique per writer: two writers opened in the same second must not reuse part names.
+        self._prefix = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if overwrite and self.root.exists():
+            for old in self.root.rglob(f"*{_SUFFIXES[self.fmt]}"):
+                old.unlink()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, row: Mapping[str, object]) -> None:
+        key = tuple(str(row[column]) for column in self.partition_by)
+        self._buffers.setdefault(key, []).append(row)
+        self._pending += 1
+        if self._pending >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        for key, rows in self._buffers.items():
+            self._write_part(key, rows)
+        self._buffers.clear()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_part(self, key: Tuple[str, ...], rows: List[Mapping[str, object]]) -> None:
+        pa = self._pa
+        arrays = [
+            _to_array(pa, [row.get(column) for row in rows], self.column_kinds[column])
+            for column in self._columns
+        ]
+        table = pa.Table.from_arrays(arrays, names=self._columns)
+        directory = self.root.joinpath(
+            *(f"{column}={quote(value, safe='')}" for column, value in zip(self.partition_by, key))
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{self._prefix}-{self._parts:05d}{_SUFFIXES[self.fmt]}"
+        self._parts += 1
+        # Dataset readers skip dot-files, so a half-written part is never picked up.
+        tmp_path = directory / f".{name}"
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, tmp_path)
+        else:
+            with pa.ipc.new_file(str(tmp_path), table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, directory / name)
+
+
+def dataset_parts(root: Path, fmt: str = "parquet") -> List[Path]:
+    """Finished part files under `root` (half-written dot-files excluded)."""
+    fmt = _check_format(fmt)
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(path for path in root.rglob(f"*{_SUFFIXES[fmt]}") if not path.name.startswith("."))
+
+
+def read_dataset(root: Path, fmt: str = "parquet", columns: Optional[Sequence[str]] = None):
+    """
+    Load a dataset written by ColumnarWriter as one pyarrow Table (partition
+    columns included; call `.to_pandas()` for a DataFrame).
+    """
+    fmt = _check_format(fmt)
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        str(root),
+        format="parquet" if fmt == "parquet" else "ipc",
+        partitioning="hive",
+    )
+    return dataset.to_table(columns=list(columns) if columns is not None else None)
@@ -0,0 +1,141 @@
+"""
+Byte/bit error metrics between an original and a decoded buffer.
+
+Buffers are compared in CHUNK_BYTES slices: equal slices are skipped with
+a memcmp, differing ones are XORed as big integers so `bit_count()` and
+`bytes.count(0)` do the per-byte work in C. Bytes missing from (or added
+to) the shorter buffer count as 1 byte / 8 bit errors each.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+CHUNK_BYTES = 1 << 20
+_NONZERO_RUN = re.compile(rb"[^\x00]+")
+
+
+def _diff_counts(a: memoryview, b: memoryview, lo: int, hi: int) -> Tuple[int, int]:
+    """(differing bytes, differing bits) over a[lo:hi] vs b[lo:hi]."""
+    byte_errors = 0
+    bit_errors = 0
+    for start in range(lo, hi, CHUNK_BYTES):
+        stop = min(start + CHUNK_BYTES, hi)
+        left = a[start:stop]
+        right = b[start:stop]
+        if left == right:
+            continue
+        diff = int.from_bytes(left, "big") ^ int.from_bytes(right, "big")
+        bit_errors += diff.bit_count()
+        byte_errors += (stop - start) - diff.to_bytes(stop - start, "big").count(0)
+    return byte_errors, bit_errors
+
+
+def error_counts(a: bytes, b: bytes) -> Tuple[int, int]:
+    """(byte errors, bit errors) between `a` and `b`."""
+    common = min(len(a), len(b))
+    tail = abs(len(a) - len(b))
+    byte_errors, bit_errors = _diff_counts(memoryview(a), memoryview(b), 0, common)
+    return byte_errors + tail, bit_errors + 8 * tail
+
+
+def file_error_counts(a_path: Path, b_path: Path) -> Tuple[int, int]:
+    """
+    `error_counts` over two files read CHUNK_BYTES at a time, so memory stays
+    bounded and identical chunks cost one read and one memcmp each.
+    """
+    byte_errors = 0
+    bit_errors = 0
+    with open(a_path, "rb") as a_file, open(b_path, "rb") as b_file:
+        while True:
+            left = a_file.read(CHUNK_BYTES)
+            right = b_file.read(CHUNK_BYTES)
+            if not left and not right:
+                break
+            if left != right:
+                chunk_bytes, chunk_bits = error_counts(left, right)
+                byte_errors += chunk_bytes
+                bit_errors += chunk_bits
+    return byte_errors, bit_errors
+
+
+def file_error_runs(a_path: Path, b_path: Path) -> Iterator[Tuple[int, int]]:
+    """
+    Maximal runs `[start, end)` of differing bytes between two files, streamed
+    CHUNK_BYTES at a time (runs crossing a chunk edge are joined). Bytes past
+    the end of the shorter file form the final run.
+    """
+    open_run = None
+    offset = 0
+    with open(a_path, "rb") as a_file, open(b_path, "rb") as b_file:
+        while True:
+            left = a_file.read(CHUNK_BYTES)
+            right = b_file.read(CHUNK_BYTES)
+            if not left and not right:
+                break
+            chunk_runs: List[Tuple[int, int]] = []
+            if left != right:
+                common = min(len(left), len(right))
+                if left[:common] != right[:common]:
+                    diff = int.from_bytes(left[:common], "big") ^ int.from_bytes(right[:common], "big")
+                    chunk_runs = [
+                        (offset + m.start(), offset + m.end())
+                        for m in _NONZERO_RUN.finditer(diff.to_bytes(common, "big"))
+                    ]
+                if len(left) != len(right):
+                    chunk_runs.append((offset + common, offset + max(len(left), len(right))))
+            for start, end in chunk_runs:
+                if open_run is not None and open_run[1] == start:
+                    open_run = (open_run[0], end)
+                    continue
+                if open_run is not None:
+                    yield open_run
+                open_run = (start, end)
+            offset += max(len(left), len(right))
+    if open_run is not None:
+        yield open_run
+
+
+def burst_bucket(length: int) -> str:
+    """Power-of-two histogram bucket for a burst of `length` bytes: "1", "2-3", "4-7", ..."""
+    low = 1 << (length.bit_length() - 1)
+    high = (low << 1) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def burst_histogram(runs: List[Tuple[int, int]]) -> Dict[str, int]:
+    """Bursts per `burst_bucket`, smallest bucket first."""
+    counts: Dict[int, int] = {}
+    for start, end in runs:
+        bits = (end - start).bit_length()
+        counts[bits] = counts.get(bits, 0) + 1
+    return {burst_bucket(1 << (bits - 1)): counts[bits] for bits in sorted(counts)}
+
+
+def byte_error_count(a: bytes, b: bytes) -> int:
+    return error_counts(a, b)[0]
+
+
+def bit_error_count(a: bytes, b: bytes) -> int:
+    return error_counts(a, b)[1]
+
+
+def error_position_histogram(a: bytes, b: bytes, bins: int = 32) -> List[int]:
+    """
+    Differing bytes per equal-width bin over max(len(a), len(b)) positions,
+    so bin i covers byte offsets [i * n // bins, (i + 1) * n // bins).
+    """
+    if bins <= 0:
+        raise ValueError("bins must be positive")
+    total = max(len(a), len(b))
+    common = min(len(a), len(b))
+    view_a, view_b = memoryview(a), memoryview(b)
+    histogram: List[int] = []
+    for i in range(bins):
+        lo = i * total // bins
+        hi = (i + 1) * total // bins
+        errors = _diff_counts(view_a, view_b, lo, min(hi, common))[0] if lo < common else 0
+        histogram.append(errors + max(0, hi - max(lo, common)))
+    return histogram
@@ -3,12 +3,19 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import os
 import statistics
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from src.reporting.columnar import COLUMNAR_FORMATS, ColumnarWriter
+from src.reporting.metrics import burst_histogram, file_error_counts, file_error_runs
 from src.utils.file_utils import add_suffix_to_top_level, suffix_filename
+from src.utils.profiling import PROFILE_MODES, profile_run
 
 IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp"}
 
@@ -22,24 +29,24 @@ REPORT_COLUMNS = [
     "byte_errors",
     "bit_errors",
     "bit_error_rate",
+    "burst_count",
+    "max_burst_bytes",
+    "errored_blocks",
 ]
-
-
-def _byte_error_count(a: bytes, b: bytes) -> int:
-    min_len = min(len(a), len(b))
-    errors = sum(1 for i in range(min_len) if a[i] != b[i])
-    errors += abs(len(a) - len(b))
-    return errors
-
-
-def _bit_error_count(a: bytes, b: bytes) -> int:
-    min_len = min(len(a), len(b))
-    errors = 0
-    for i in range(min_len):
-        if a[i] != b[i]:
-            errors += (a[i] ^ b[i]).bit_count()
-    errors += abs(len(a) - len(b)) * 8
-    return errors
+REPORT_COLUMN_KINDS = {
+    "input_path": "str",
+    "status": "str",
+    "original_size_bytes": "int",
+    "decoded_size_bytes": "int",
+    "size_delta_bytes": "int",
+    "success": "bool",
+    "byte_errors": "int",
+    "bit_errors": "int",
+    "bit_error_rate": "float",
+    "burst_count": "int",
+    "max_burst_bytes": "int",
+    "errored_blocks": "int",
+}
 
 
 def _expected_decoded_path(input_file: Path, input_root: Path, output_root: Path) -> Path:
@@ -58,6 +65,58 @@ def _expected_decoded_path(input_file: Path, input_root: Path, output_root: Path
     return decoded_path
 
 
+def _expected_chunked_path(input_file: Path, input_root: Path, output_root: Path) -> Path:
+    rel_path = input_file.relative_to(input_root)
+    chunked_rel_dir = add_suffix_to_top_level(rel_path.parent, "_chunked")
+    chunked_rel_file = suffix_filename(Path(rel_path.name), "_chunked")
+    return output_root / "out_chunked" / chunked_rel_dir / chunked_rel_file.name
+
+
+def _data_peptide_layout(chunked_path: Path) -> List[Tuple[int, int]]:
+    """(block_id, index_in_block) of every data peptide in a `_chunked` file, in data order."""
+    if not chunked_path.exists():
+        return []
+    layout = []
+    with chunked_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            parts = line.split(",", 3)
+            # Fountain pools are written without block columns.
+            if len(parts) == 4 and parts[2] == "data":
+                layout.append((int(parts[0]), int(parts[1])))
+    return sorted(layout)
+
+
+def _error_profile(
+    runs: List[Tuple[int, int]],
+    original_size: int,
+    layout: List[Tuple[int, int]],
+) -> Dict[str, object]:
+    """
+    Burst-length histogram plus byte errors per RS block and per index within
+    a block. Data peptide k is taken to carry original bytes
+    [k * size / n, (k + 1) * size / n): exact for fixed-rate encoders
+    (Yin-Yang), proportional for compressed streams (Huffman).
+    """
+    profile: Dict[str, object] = {"burst_histogram": burst_histogram(runs)}
+    if not layout or not original_size:
+        return profile
+    n = len(layout)
+    block_errors: Dict[int, int] = {}
+    index_errors = [0] * (max(index for _, index in layout) + 1)
+    for start, end in runs:
+        end = min(end, original_size)
+        while start < end:
+            k = start * n // original_size
+            stop = min(end, -(-(k + 1) * original_size // n))
+            block, index = layout[k]
+            block_errors[block] = block_errors.get(block, 0) + stop - start
+            index_errors[index] += stop - start
+            start = stop
+    profile["block_errors"] = {str(block): block_errors[block] for block in sorted(block_errors)}
+    profile["index_errors"] = index_errors
+    return profile
+
+
 def _iter_files(root: Path) -> Iterable[Path]:
     return sorted(p for p in root.rglob("*") if p.is_file())
 
@@ -73,79 +132,180 @@ def generate_report(
     output_root: Path,
     report_dir: Path,
     formats: Sequence[str] = ("csv", "json"),
+    profile: Optional[str] = None,
+    profile_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    keep_rows: bool = True,
+) -> Dict[str, object]:
+    """
+    Compare every file under `input_root` with its decoded counterpart and
+    write `report.csv` / `report.json` under `report_dir`.
+
+    Files are compared on `workers` threads (default: ThreadPoolExecutor's)
+    and rows are streamed to the report files in input order, with at most
+    `workers * 4` files compared or waiting to be written at once. With
+    `keep_rows=False` the returned "files" list is left empty so memory
+    does not grow with the number of files.
+    """
+    with profile_run(profile, "report", profile_dir):
+        return _build_report(input_root, output_root, report_dir, formats, workers, keep_rows)
+
+
+def _compare_file(input_file: Path, input_root: Path, output_root: Path) -> Dict[str, object]:
+    decoded_path = _expected_decoded_path(input_file, input_root, output_root)
+    original_size = input_file.stat().st_size
+    row: Dict[str, object] = {
+        "input_path": str(input_file.relative_to(input_root)),
+        "status": "ok",
+        "original_size_bytes": original_size,
+    }
+    if not decoded_path.exists():
+        row.update(
+            decoded_size_bytes=None,
+            size_delta_bytes=None,
+            success=False,
+            byte_errors=None,
+            bit_errors=None,
+            bit_error_rate=None,
+            burst_count=None,
+            max_burst_bytes=None,
+            errored_blocks=None,
+            status="missing_decoded",
+        )
+        return row
+
+    decoded_size = decoded_path.stat().st_size
+    row["decoded_size_bytes"] = decoded_size
+    row["size_delta_bytes"] = decoded_size - original_size
+    if decoded_size != original_size:
+        # A truncated or padded decode already failed; don't read either file.
+        row.update(
+            success=False,
+            byte_errors=None,
+            bit_errors=None,
+            bit_error_rate=None,
+            burst_count=None,
+            max_burst_bytes=None,
+            errored_blocks=None,
+            status="size_mismatch",
+        )
+        return row
+
+    byte_errors, bit_errors = file_error_counts(input_file, decoded_path)
+    row["success"] = byte_errors == 0
+    row["byte_errors"] = byte_errors
+    row["bit_errors"] = bit_errors
+    if original_size:
+        row["bit_error_rate"] = bit_errors / (original_size * 8)
+    else:
+        row["bit_error_rate"] = 0.0 if bit_errors == 0 else None
+
+    row["burst_count"] = 0
+    row["max_burst_bytes"] = 0
+    row["errored_blocks"] = 0
+    if byte_errors:
+        # Only mismatching files pay for the location profile (a second, cached read).
+        runs = list(file_error_runs(input_file, decoded_path))
+        layout = _data_peptide_layout(_expected_chunked_path(input_file, input_root, output_root))
+        profile = _error_profile(runs, original_size, layout)
+        row["burst_count"] = len(runs)
+        row["max_burst_bytes"] = max(end - start for start, end in runs)
+        row["errored_blocks"] = len(profile["block_errors"]) if "block_errors" in profile else None
+        row["error_profile"] = profile
+    return row
+
+
+class _ReportWriter:
+    """
+    Streams rows into report.csv, the "files" array of report.json and
+    `report_<fmt>/` columnar datasets (rewritten on every run).
+    """
+
+    def __init__(self, report_dir: Path, formats: Sequence[str], meta: Dict[str, object]):
+        self._csv_file = None
+        self._csv_writer = None
+        self._json_file = None
+        self._json_rows = 0
+        self._datasets = [
+            ColumnarWriter(report_dir / f"report_{fmt}", REPORT_COLUMN_KINDS, fmt=fmt, overwrite=True)
+            for fmt in COLUMNAR_FORMATS
+            if fmt in formats
+        ]
+        if "csv" in formats:
+            self._csv_file = (report_dir / "report.csv").open("w", newline="", encoding="utf-8")
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=REPORT_COLUMNS)
+            self._csv_writer.writeheader()
+        if "json" in formats:
+            self._json_file = (report_dir / "report.json").open("w", encoding="utf-8")
+            self._json_file.write('{\n  "meta": ')
+            self._json_file.write(_indent_json(meta))
+            self._json_file.write(',\n  "files": [')
+
+    def write(self, row: Dict[str, object]) -> None:
+        if self._csv_writer is not None:
+            self._csv_writer.writerow({k: _format_csv_value(row.get(k)) for k in REPORT_COLUMNS})
+        if self._json_file is not None:
+            self._json_file.write(",\n    " if self._json_rows else "\n    ")
+            self._json_file.write(_indent_json(row, level=2))
+            self._json_rows += 1
+        for dataset in self._datasets:
+            dataset.write(row)
+
+    def finish(self, summary: Dict[str, object]) -> None:
+        if self._json_file is not None:
+            self._json_file.write("\n  ]" if self._json_rows else "]")
+            self._json_file.write(',\n  "summary": ')
+            self._json_file.write(_indent_json(summary))
+            self._json_file.write("\n}\n")
+
+    def close(self) -> None:
+        for dataset in self._datasets:
+            dataset.close()
+        for handle in (self._csv_file, self._json_file):
+            if handle is not None:
+                handle.close()
+
+
+def _indent_json(value: object, level: int = 1) -> str:
+    """`json.dumps(value, indent=2)` nested `level` objects deep."""
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * level)
+
+
+def _iter_compared(
+    compare: Callable[[Path], Dict[str, object]],
+    files: Iterable[Path],
+    workers: Optional[int],
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield `compare(file)` rows in input order. Only a window of `workers * 4`
+    files is submitted ahead of the next row to yield, so rows that finish
+    early wait in a bounded buffer instead of the whole tree being queued.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)  # ThreadPoolExecutor's default
+    window: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path in files:
+            window.append(pool.submit(compare, path))
+            if len(window) >= workers * 4:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def _build_report(
+    input_root: Path,
+    output_root: Path,
+    report_dir: Path,
+    formats: Sequence[str],
+    workers: Optional[int] = None,
+    keep_rows: bool = True,
 ) -> Dict[str, object]:
     input_root = input_root.resolve()
     output_root = output_root.resolve()
     report_dir = report_dir.resolve()
-
-    rows: List[Dict[str, object]] = []
-    total_original_bytes = 0
-    total_decoded_bytes = 0
-    decoded_present = 0
-    success_count = 0
-    bit_error_rates: List[float] = []
-
-    for input_file in _iter_files(input_root):
-        decoded_path = _expected_decoded_path(input_file, input_root, output_root)
-        rel_path = input_file.relative_to(input_root)
-        row: Dict[str, object] = {
-            "input_path": str(rel_path),
-            "status": "ok",
-        }
-
-        original_bytes = input_file.read_bytes()
-        original_size = len(original_bytes)
-        total_original_bytes += original_size
-        row["original_size_bytes"] = original_size
-
-        decoded_bytes: Optional[bytes] = None
-        if decoded_path.exists():
-            decoded_bytes = decoded_path.read_bytes()
-            decoded_present += 1
-            total_decoded_bytes += len(decoded_bytes)
-            row["decoded_size_bytes"] = len(decoded_bytes)
-            row["size_delta_bytes"] = len(decoded_bytes) - original_size
-
-            success = decoded_bytes == original_bytes
-            row["success"] = success
-            if success:
-                success_count += 1
-
-            byte_errors = _byte_error_count(original_bytes, decoded_bytes)
-            bit_errors = _bit_error_count(original_bytes, decoded_bytes)
-            row["byte_errors"] = byte_errors
-            row["bit_errors"] = bit_errors
-            if original_size:
-                bit_error_rate = bit_errors / (original_size * 8)
-                row["bit_error_rate"] = bit_error_rate
-                bit_error_rates.append(bit_error_rate)
-            else:
-                row["bit_error_rate"] = 0.0 if bit_errors == 0 else None
-        else:
-            row["decoded_size_bytes"] = None
-            row["size_delta_bytes"] = None
-            row["success"] = False
-            row["byte_errors"] = None
-            row["bit_errors"] = None
-            row["bit_error_rate"] = None
-            row["status"] = "missing_decoded"
-
-        rows.append(row)
-
     report_dir.mkdir(parents=True, exist_ok=True)
     formats = [fmt.lower() for fmt in formats]
 
-    summary = {
-        "total_files": len(rows),
-        "decoded_present": decoded_present,
-        "success_count": success_count,
-        "success_rate": (success_count / len(rows)) if rows else 0.0,
-        "total_original_bytes": total_original_bytes,
-        "total_decoded_bytes": total_decoded_bytes,
-        "avg_bit_error_rate": statistics.mean(bit_error_rates) if bit_error_rates else 0.0,
-        "median_bit_error_rate": statistics.median(bit_error_rates) if bit_error_rates else 0.0,
-    }
-
     meta = {
         "input_root": str(input_root),
         "output_root": str(output_root),
@@ -153,18 +313,45 @@ def generate_report(
         "generated_at_utc": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
     }
 
-    if "csv" in formats:
-        csv_path = report_dir / "report.csv"
-        with csv_path.open("w", newline="", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=REPORT_COLUMNS)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow({k: _format_csv_value(row.get(k)) for k in REPORT_COLUMNS})
+    rows: List[Dict[str, object]] = []
+    total_files = 0
+    total_original_bytes = 0
+    total_decoded_bytes = 0
+    decoded_present = 0
+    success_count = 0
+    bit_error_rates: List[float] = []
 
-    if "json" in formats:
-        json_path = report_dir / "report.json"
-        report_payload = {"meta": meta, "summary": summary, "files": rows}
-        json_path.write_text(json.dumps(report_payload, indent=2), encoding="utf-8")
+    compare = partial(_compare_file, input_root=input_root, output_root=output_root)
+    writer = _ReportWriter(report_dir, formats, meta)
+    try:
+        for row in _iter_compared(compare, _iter_files(input_root), workers):
+            total_files += 1
+            total_original_bytes += row["original_size_bytes"]
+            if row["status"] != "missing_decoded":
+                decoded_present += 1
+                total_decoded_bytes += row["decoded_size_bytes"]
+            if row["status"] == "ok":
+                if row["success"]:
+                    success_count += 1
+                if row["original_size_bytes"]:
+                    bit_error_rates.append(row["bit_error_rate"])
+            writer.write(row)
+            if keep_rows:
+                rows.append(row)
+
+        summary = {
+            "total_files": total_files,
+            "decoded_present": decoded_present,
+            "success_count": success_count,
+            "success_rate": (success_count / total_files) if total_files else 0.0,
+            "total_original_bytes": total_original_bytes,
+            "total_decoded_bytes": total_decoded_bytes,
+            "avg_bit_error_rate": statistics.mean(bit_error_rates) if bit_error_rates else 0.0,
+            "median_bit_error_rate": statistics.median(bit_error_rates) if bit_error_rates else 0.0,
+        }
+        writer.finish(summary)
+    finally:
+        writer.close()
 
     return {"meta": meta, "summary": summary, "files": rows}
 
@@ -183,7 +370,24 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--formats",
         default="csv,json",
-        help="Comma-separated list of formats: csv,json (default: csv,json).",
+        help="Comma-separated list of formats: csv,json,parquet,arrow (default: csv,json).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Threads comparing files (default: Python's ThreadPoolExecutor default).",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile report generation (cprofile: .prof, sample: collapsed stacks).",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="reports/profiles",
+        help="Directory for profile output (default: reports/profiles).",
     )
     return parser.parse_args()
 
@@ -199,6 +403,10 @@ def main() -> None:
         output_root=output_root,
         report_dir=report_dir,
         formats=formats,
+        profile=args.profile,
+        profile_dir=Path(args.profile_dir),
+        workers=args.workers,
+        keep_rows=False,
     )
     print(f"Report written to {report_dir}")
 
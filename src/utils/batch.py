@@ -1,11 +1,21 @@
+import hashlib
+import json
 import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from src.pipeline.huffman_runner import encode_decode_file_huffman
 from src.pipeline.fountain_runner import encode_decode_file_fountain
 from src.pipeline.yin_yang_runner import encode_decode_file_yin_yang
 
 from src.pipeline.config import PipelineConfig
+from src.pipeline import fingerprint
+from src.pipeline.instrumentation import recording
+from src.pipeline.pool_container import POOL_FORMATS, POOL_SUFFIX, write_pool
+from src.pipeline.result import PipelineResult
+from src.utils.profiling import profile_run, profile_worker_task, reset_inherited_profilers
 from src.utils import (
     convert_image_to_ppm_bytes,
     attach_image_header,
@@ -18,61 +28,257 @@ from src.utils import (
 IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp"}
 
 
+MANIFEST_NAME = "batch_manifest.jsonl"
+
+# Outputs written for one file, plus its leaf stage timings and (opt-in) memory usage.
+TaskOutcome = Tuple[List[Path], Dict[str, float], Dict[str, float]]
+
+
+@dataclass
+class BatchTask:
+    """One input file of a batch run."""
+    in_path: Path
+    rel_path: str
+    size: int
+    mtime_ns: int
+
+
 def run_batch_on_folder(
     input_root: Path,
     output_root: Path,
     cfg: PipelineConfig | None = None,
+    workers: int = 1,
+    incremental: bool = True,
+    profile: Optional[str] = None,
+    profile_dir: Optional[Path] = None,
 ) -> None:
+    """
+    Encode, corrupt and decode every file under `input_root` into `output_root`.
+
+    Files are processed largest-first on `workers` processes (0 = one per CPU core).
+    With `incremental`, a manifest in `output_root` records the input hash, config
+    hash and outputs of each finished file, and files whose entry still matches
+    are skipped on the next run.
+
+    `profile` ("cprofile" or "sample") profiles the run and every worker and
+    writes the merged result under `profile_dir` (default: reports/profiles).
+    """
     if cfg is None:
         cfg = PipelineConfig()
+    encoder = cfg.encoder.lower()
+    if encoder not in _PROCESSORS:
+        raise ValueError(f"Unsupported encoder: {cfg.encoder}")
+    if cfg.pool_format not in POOL_FORMATS:
+        raise ValueError(f"Unsupported pool format: {cfg.pool_format}")
 
     input_root = input_root.resolve()
     output_root = output_root.resolve()
-
-    out_encoded_root = output_root / "out_encoded"
-    out_decoded_root = output_root / "out_decoded"
-    out_chunked_root = output_root / "out_chunked"
-
+    output_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_root / MANIFEST_NAME
+
+    tasks = _collect_tasks(input_root, output_root)
+    config_hash = fingerprint.config_hash(cfg)
+    code_version = fingerprint.code_version()
+    previous = _load_manifest(manifest_path) if incremental else {}
+
+    entries: Dict[str, dict] = {}
+    pending: List[Tuple[BatchTask, str]] = []
+    for task in tasks:
+        entry = previous.get(task.rel_path)
+        input_hash = _input_hash(task, entry)
+        if (
+            entry is not None
+            and entry.get("input_sha256") == input_hash
+            and entry.get("config_hash") == config_hash
+            and entry.get("code_version") == code_version
+            and all((output_root / out).exists() for out in entry.get("outputs", []))
+        ):
+            entries[task.rel_path] = entry
+            continue
+        pending.append((task, input_hash))
+
+    skipped = len(tasks) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} unchanged file(s) (manifest: {manifest_path})")
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, max(1, len(pending)))
+
+    with profile_run(profile, "batch", profile_dir) as profile_label, manifest_path.open(
+        "a", encoding="utf-8"
+    ) as manifest:
+        worker_profile = (profile, profile_dir, profile_label) if profile_label and workers > 1 else None
+        for task, input_hash, (outputs, timings, memory) in _iter_batch(
+            pending, input_root, output_root, cfg, workers, worker_profile
+        ):
+            entry = {
+                "path": task.rel_path,
+                "size": task.size,
+                "mtime_ns": task.mtime_ns,
+                "input_sha256": input_hash,
+                "config_hash": config_hash,
+                "code_version": code_version,
+                "outputs": [out.relative_to(output_root).as_posix() for out in outputs],
+                "timings": timings,
+            }
+            if memory:
+                entry["memory"] = memory
+            entries[task.rel_path] = entry
+            manifest.write(json.dumps(entry, sort_keys=True) + "\n")
+            manifest.flush()
+
+    # Compact: one line per current input file.
+    _write_manifest(manifest_path, [entries[task.rel_path] for task in tasks])
+
+
+def _collect_tasks(input_root: Path, output_root: Path) -> List[BatchTask]:
+    tasks = []
     for root, _, files in os.walk(input_root):
         root_path = Path(root)
-        rel_root = root_path.relative_to(input_root)
-
+        if root_path == output_root or output_root in root_path.parents:
+            continue
         for filename in files:
             in_path = root_path / filename
-            print("Processing:", in_path)
-
-            encoder = cfg.encoder.lower()
-            if encoder == "huffman":
-                process_file(
-                    in_path=in_path,
-                    rel_root=rel_root,
-                    out_encoded_root=out_encoded_root,
-                    out_decoded_root=out_decoded_root,
-                    out_chunked_root=out_chunked_root,
-                    cfg=cfg,
-                )
-            elif encoder == "yin_yang":
-                process_file_yin_yang(
+            stat = in_path.stat()
+            tasks.append(
+                BatchTask(
                     in_path=in_path,
-                    rel_root=rel_root,
-                    out_encoded_root=out_encoded_root,
-                    out_decoded_root=out_decoded_root,
-                    out_chunked_root=out_chunked_root,
-                    cfg=cfg,
+                    rel_path=in_path.relative_to(input_root).as_posix(),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
                 )
-            elif encoder == "fountain":
-                process_file_fountain(
-                    in_path=in_path,
-                    rel_root=rel_root,
-                    out_encoded_root=out_encoded_root,
-                    out_decoded_root=out_decoded_root,
-                    out_chunked_root=out_chunked_root,
-                    cfg=cfg,
-                )
-            else:
-                raise ValueError(f"Unsupported encoder: {cfg.encoder}")
+            )
+    # Largest first so the long files do not end up as stragglers.
+    tasks.sort(key=lambda task: (-task.size, task.rel_path))
+    return tasks
 
 
+def _iter_batch(
+    pending: List[Tuple[BatchTask, str]],
+    input_root: Path,
+    output_root: Path,
+    cfg: PipelineConfig,
+    workers: int,
+    worker_profile: Optional[Tuple[str, Path, str]] = None,
+) -> Iterator[Tuple[BatchTask, str, TaskOutcome]]:
+    if workers <= 1:
+        for task, input_hash in pending:
+            yield task, input_hash, _process_task(task, input_root, output_root, cfg)
+        return
+
+    pending_iter = iter(pending)
+    with ProcessPoolExecutor(max_workers=workers, initializer=reset_inherited_profilers) as pool:
+        in_flight = {}
+
+        def submit_next() -> None:
+            item = next(pending_iter, None)
+            if item is not None:
+                task, _ = item
+                in_flight[pool.submit(_process_task, task, input_root, output_root, cfg, worker_profile)] = item
+
+        # Keep a bounded number of files queued so huge folders don't pickle
+        # every task up front.
+        for _ in range(workers * 4):
+            submit_next()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, input_hash = in_flight.pop(future)
+                submit_next()
+                yield task, input_hash, future.result()
+
+
+def _process_task(
+    task: BatchTask,
+    input_root: Path,
+    output_root: Path,
+    cfg: PipelineConfig,
+    worker_profile: Optional[Tuple[str, Path, str]] = None,
+) -> TaskOutcome:
+    print("Processing:", task.in_path)
+    processor = _PROCESSORS[cfg.encoder.lower()]
+    mode, profile_dir, label = worker_profile or (None, None, "")
+    with profile_worker_task(mode, profile_dir, label), recording(memory=cfg.track_memory) as stages:
+        outputs = processor(
+            in_path=task.in_path,
+            rel_root=task.in_path.parent.relative_to(input_root),
+            out_encoded_root=output_root / "out_encoded",
+            out_decoded_root=output_root / "out_decoded",
+            out_chunked_root=output_root / "out_chunked",
+            cfg=cfg,
+        )
+    return outputs, stages.leaf_timings(), stages.memory_usage()
+
+
+def _input_hash(task: BatchTask, entry: Optional[dict]) -> str:
+    # Trust the recorded hash while size and mtime are unchanged.
+    if entry is not None and entry.get("size") == task.size and entry.get("mtime_ns") == task.mtime_ns:
+        return entry.get("input_sha256", "")
+    digest = hashlib.sha256()
+    with task.in_path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path: Path) -> Dict[str, dict]:
+    entries: Dict[str, dict] = {}
+    if not manifest_path.exists():
+        return entries
+    with manifest_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial line from an interrupted run.
+                continue
+            if isinstance(entry, dict) and "path" in entry:
+                entries[entry["path"]] = entry
+    return entries
+
+
+def _write_manifest(manifest_path: Path, entries: List[dict]) -> None:
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for entry in entries:
+            handle.write(json.dumps(entry, sort_keys=True) + "\n")
+    os.replace(tmp_path, manifest_path)
+
+
+def _write_chunked(chunk_out_path: Path, result: PipelineResult) -> None:
+    """
+    Write the transmitted pool as `block,index,role,peptide` lines, reusing the
+    packet the runner actually corrupted. Fountain pools have no RS packet and
+    are written one peptide per line.
+    """
+    ecc_packet = result.ecc_packet
+    if ecc_packet is None:
+        chunk_out_path.write_text("\n".join(result.original_peptides), encoding="utf-8")
+        return
+
+    lines = []
+    for pep, meta in zip(ecc_packet.peptides, ecc_packet.metadata):
+        role = "parity" if meta.is_parity else "data"
+        lines.append(f"{meta.block_id},{meta.index_in_block},{role},{pep}")
+
+    if not lines:
+        lines = [f"0,{idx},data,{pep}" for idx, pep in enumerate(ecc_packet.peptides)]
+
+    chunk_out_path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def _write_encoded(encoded_out_path: Path, result: PipelineResult, cfg: PipelineConfig) -> Path:
+    """
+    Write the transmitted pool one peptide per line, or with
+    cfg.pool_format="binary" as a `<name>.ppool` container.
+    """
+    if cfg.pool_format == "binary":
+        container_path = encoded_out_path.with_name(encoded_out_path.name + POOL_SUFFIX)
+        return write_pool(container_path, result.pool, cfg)
+    encoded_out_path.write_text("\n".join(result.original_peptides), encoding="utf-8")
+    return encoded_out_path
+
 
 def process_file(
     in_path: Path,
@@ -81,7 +287,7 @@ def process_file(
     out_decoded_root: Path,
     out_chunked_root: Path,
     cfg: PipelineConfig,
-):
+) -> List[Path]:
     data = in_path.read_bytes()
     cfg.score_label = in_path.name
 
@@ -104,18 +310,15 @@ def process_file(
     """
 
     # Use the imported Huffman encoder/decoder
-    original_peptides, _, decoded_bytes = encode_decode_file_huffman(data, cfg)
+    result = encode_decode_file_huffman(data, cfg)
+    decoded_bytes = result.decoded
 
     encoded_rel_dir = add_suffix_to_top_level(rel_root, "_encoded")
     encoded_rel_file = suffix_filename(Path(in_path.name), "_encoded")
     encoded_out_dir = out_encoded_root / encoded_rel_dir
     encoded_out_dir.mkdir(parents=True, exist_ok=True)
-    encoded_out_path = encoded_out_dir / encoded_rel_file.name
     print("Encoded output dir:", encoded_out_dir)
-    encoded_out_path.write_text(
-        "\n".join(original_peptides),
-        encoding="utf-8",
-    )
+    encoded_out_path = _write_encoded(encoded_out_dir / encoded_rel_file.name, result, cfg)
 
     # Write chunked peptides (with block/index/role) to a sibling folder.
     chunk_rel_dir = add_suffix_to_top_level(rel_root, "_chunked")
@@ -123,30 +326,7 @@ def process_file(
     chunk_out_dir = out_chunked_root / chunk_rel_dir
     chunk_out_dir.mkdir(parents=True, exist_ok=True)
     chunk_out_path = chunk_out_dir / chunk_rel_file.name
-    try:
-        from src.encoding_schemes.huffman import huffman_encode
-        from src.encoding_schemes.peptide_mapping import bits_to_peptides
-        from src.error_correction.registry import ecc_encode_peptides
-
-        reenc = huffman_encode(data)
-        mapping = bits_to_peptides(
-            reenc.bits,
-            peptide_length=cfg.peptide_length,
-            index_aa_length=cfg.index_aa_length,
-        )
-        ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-
-        lines = []
-        for pep, meta in zip(ecc_packet.peptides, ecc_packet.metadata):
-            role = "parity" if meta.is_parity else "data"
-            lines.append(f"{meta.block_id},{meta.index_in_block},{role},{pep}")
-
-        if not lines:
-            lines = [f"0,{idx},data,{pep}" for idx, pep in enumerate(ecc_packet.peptides)]
-
-        chunk_out_path.write_text("\n".join(lines), encoding="utf-8")
-    except Exception as exc:
-        chunk_out_path.write_text(f"chunk_export_failed: {exc}", encoding="utf-8")
+    _write_chunked(chunk_out_path, result)
 
     # If we embedded header, strip it before writing out and use dimensions for visualization.
     header_meta = {}
@@ -163,6 +343,7 @@ def process_file(
     decoded_out_path = decoded_out_dir / decoded_rel_file.name
     print("Decoded output dir:", decoded_out_dir)
     decoded_out_path.write_bytes(decoded_bytes)
+    outputs = [encoded_out_path, chunk_out_path, decoded_out_path]
 
     if cfg.visualize_as_pgm and in_path.suffix.lower() in IMAGE_EXTS:
         pgm_width = cfg.visualize_width
@@ -176,6 +357,9 @@ def process_file(
         visual_out_path = visual_out_dir / visual_rel_file.name
         print("Decoded PGM output dir:", visual_out_dir)
         visual_out_path.write_bytes(pgm_bytes)
+        outputs.append(visual_out_path)
+
+    return outputs
 
 
 def process_file_fountain(
@@ -185,28 +369,25 @@ def process_file_fountain(
     out_decoded_root: Path,
     out_chunked_root: Path,
     cfg: PipelineConfig,
-):
+) -> List[Path]:
     data = in_path.read_bytes()
     cfg.score_label = in_path.name
 
-    original_peptides, _, decoded_bytes = encode_decode_file_fountain(data, cfg)
+    result = encode_decode_file_fountain(data, cfg)
+    decoded_bytes = result.decoded
 
     encoded_rel_dir = add_suffix_to_top_level(rel_root, "_encoded")
     encoded_rel_file = suffix_filename(Path(in_path.name), "_encoded")
     encoded_out_dir = out_encoded_root / encoded_rel_dir
     encoded_out_dir.mkdir(parents=True, exist_ok=True)
-    encoded_out_path = encoded_out_dir / encoded_rel_file.name
-    encoded_out_path.write_text(
-        "\n".join(original_peptides),
-        encoding="utf-8",
-    )
+    encoded_out_path = _write_encoded(encoded_out_dir / encoded_rel_file.name, result, cfg)
 
     chunk_rel_dir = add_suffix_to_top_level(rel_root, "_chunked")
     chunk_rel_file = suffix_filename(Path(in_path.name), "_chunked")
     chunk_out_dir = out_chunked_root / chunk_rel_dir
     chunk_out_dir.mkdir(parents=True, exist_ok=True)
     chunk_out_path = chunk_out_dir / chunk_rel_file.name
-    chunk_out_path.write_text("\n".join(original_peptides), encoding="utf-8")
+    _write_chunked(chunk_out_path, result)
 
     decoded_rel_dir = add_suffix_to_top_level(rel_root, "_decoded")
     decoded_rel_file = suffix_filename(Path(in_path.name), "_decoded")
@@ -215,6 +396,8 @@ def process_file_fountain(
     decoded_out_path = decoded_out_dir / decoded_rel_file.name
     decoded_out_path.write_bytes(decoded_bytes)
 
+    return [encoded_out_path, chunk_out_path, decoded_out_path]
+
 
 def process_file_yin_yang(
     in_path: Path,
@@ -223,49 +406,25 @@ def process_file_yin_yang(
     out_decoded_root: Path,
     out_chunked_root: Path,
     cfg: PipelineConfig,
-):
+) -> List[Path]:
     data = in_path.read_bytes()
     cfg.score_label = in_path.name
 
-    original_peptides, _, decoded_bytes = encode_decode_file_yin_yang(data, cfg)
+    result = encode_decode_file_yin_yang(data, cfg)
+    decoded_bytes = result.decoded
 
     encoded_rel_dir = add_suffix_to_top_level(rel_root, "_encoded")
     encoded_rel_file = suffix_filename(Path(in_path.name), "_encoded")
     encoded_out_dir = out_encoded_root / encoded_rel_dir
     encoded_out_dir.mkdir(parents=True, exist_ok=True)
-    encoded_out_path = encoded_out_dir / encoded_rel_file.name
-    encoded_out_path.write_text("\n".join(original_peptides), encoding="utf-8")
+    encoded_out_path = _write_encoded(encoded_out_dir / encoded_rel_file.name, result, cfg)
 
     chunk_rel_dir = add_suffix_to_top_level(rel_root, "_chunked")
     chunk_rel_file = suffix_filename(Path(in_path.name), "_chunked")
     chunk_out_dir = out_chunked_root / chunk_rel_dir
     chunk_out_dir.mkdir(parents=True, exist_ok=True)
     chunk_out_path = chunk_out_dir / chunk_rel_file.name
-    try:
-        from src.encoding_schemes.yin_yang import yin_yang_encode
-        from src.encoding_schemes.peptide_mapping import PeptideMappingResult
-        from src.error_correction.registry import ecc_encode_peptides
-
-        reenc = yin_yang_encode(data, cfg)
-        mapping = PeptideMappingResult(
-            peptides=reenc.peptides,
-            pad_bits=reenc.pad_bits,
-            peptide_length=cfg.peptide_length,
-            index_aa_length=cfg.index_aa_length,
-        )
-        ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-
-        lines = []
-        for pep, meta in zip(ecc_packet.peptides, ecc_packet.metadata):
-            role = "parity" if meta.is_parity else "data"
-            lines.append(f"{meta.block_id},{meta.index_in_block},{role},{pep}")
-
-        if not lines:
-            lines = [f"0,{idx},data,{pep}" for idx, pep in enumerate(ecc_packet.peptides)]
-
-        chunk_out_path.write_text("\n".join(lines), encoding="utf-8")
-    except Exception as exc:
-        chunk_out_path.write_text(f"chunk_export_failed: {exc}", encoding="utf-8")
+    _write_chunked(chunk_out_path, result)
 
     decoded_rel_dir = add_suffix_to_top_level(rel_root, "_decoded")
     decoded_rel_file = suffix_filename(Path(in_path.name), "_decoded")
@@ -273,3 +432,12 @@ def process_file_yin_yang(
     decoded_out_dir.mkdir(parents=True, exist_ok=True)
     decoded_out_path = decoded_out_dir / decoded_rel_file.name
     decoded_out_path.write_bytes(decoded_bytes)
+
+    return [encoded_out_path, chunk_out_path, decoded_out_path]
+
+
+_PROCESSORS = {
+    "huffman": process_file,
+    "yin_yang": process_file_yin_yang,
+    "fountain": process_file_fountain,
+}
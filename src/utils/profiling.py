@@ -0,0 +1,331 @@
+"""
+Opt-in profiling for whole pipeline runs.
+
+Two modes:
+- "cprofile": deterministic cProfile, written as `<label>.prof` (load with
+  `pstats` or snakeviz) plus a `<label>.txt` top-functions summary. The
+  merged run also gets a `<label>.collapsed` file rebuilt from the call
+  graph (counts are microseconds), so both modes feed flamegraph.pl.
+- "sample": a low-overhead stack sampler, written as `<label>.collapsed`
+  (one `frame;frame;frame count` line per stack, ready for flamegraph.pl
+  or speedscope).
+
+Worker processes keep one profiler each (`worker_profiler`) and write
+their `<label>_worker<pid>.*` files once, when the worker exits;
+`merge_profiles` folds them into one `<label>.*` set when the run
+finishes. Process pools created while a profile is running must pass
+`initializer=reset_inherited_profilers`: forked workers otherwise inherit
+the parent's enabled cProfile, and on Python 3.12+ their own profiler then
+fails to start.
+"""
+
+import cProfile
+import io
+import multiprocessing.util
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_PROFILE_DIR = Path("reports") / "profiles"
+SAMPLE_INTERVAL_S = 0.005
+SUMMARY_LIMIT = 40
+
+# cProfile profilers enabled in this process (inherited by forked children).
+_ENABLED_CPROFILERS: List[cProfile.Profile] = []
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", Path(code.co_filename).stem)
+    return f"{module}:{code.co_name}"
+
+
+class _StackSampler:
+    """Samples one thread's stack on a timer into collapsed-stack counts."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enable(self) -> None:
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class RunProfiler:
+    """
+    Accumulating profiler for one run or one worker process.
+
+    Use as a context manager (re-entrant across tasks: totals accumulate) and
+    call `dump()` to (re)write its files under `output_dir`.
+    """
+
+    def __init__(self, mode: str, output_dir: Path, label: str):
+        mode = mode.lower()
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.label = label
+        self._profiler = cProfile.Profile() if mode == "cprofile" else _StackSampler()
+
+    def __enter__(self) -> "RunProfiler":
+        self._profiler.enable()
+        if self.mode == "cprofile":
+            _ENABLED_CPROFILERS.append(self._profiler)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._profiler.disable()
+        if self.mode == "cprofile":
+            _ENABLED_CPROFILERS.remove(self._profiler)
+
+    def dump(self) -> List[Path]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cprofile":
+            prof_path = self.output_dir / f"{self.label}.prof"
+            self._profiler.dump_stats(str(prof_path))
+            return [prof_path]
+        collapsed_path = self.output_dir / f"{self.label}.collapsed"
+        _write_collapsed(collapsed_path, self._profiler.stacks)
+        return [collapsed_path]
+
+
+def _write_collapsed(path: Path, stacks: Counter) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        for stack, samples in sorted(stacks.items()):
+            handle.write(f"{stack} {samples}\n")
+
+
+def _read_collapsed(path: Path) -> Counter:
+    stacks: Counter = Counter()
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            stack, _, samples = line.rstrip("\n").rpartition(" ")
+            if stack and samples.isdigit():
+                stacks[stack] += int(samples)
+    return stacks
+
+
+def _pstats_frame_name(func: Tuple[str, int, str]) -> str:
+    filename, _, name = func
+    if filename == "~":  # built-ins carry no file
+        return name
+    return f"{Path(filename).stem}:{name}"
+
+
+def _pstats_to_collapsed(stats: pstats.Stats) -> Counter:
+    """
+    Approximate collapsed stacks from a cProfile call graph. cProfile only
+    records caller/callee pairs, so each function's own time is split across
+    its call paths in proportion to the cumulative time each caller spent
+    in it. Recursive edges are cut, as are subtrees under 1e-5 of the run.
+    """
+    callees: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    stacks: Counter = Counter()
+    min_subtree = max(1e-6, 1e-5 * sum(stat[2] for stat in stats.stats.values()))
+
+    def walk(func: tuple, path: List[str], on_path: set, share: float) -> None:
+        _, _, tottime, cumtime, _ = stats.stats[func]
+        path.append(_pstats_frame_name(func))
+        on_path.add(func)
+        own_us = int(tottime * share * 1e6)
+        if own_us > 0:
+            stacks[";".join(path)] += own_us
+        for callee in callees.get(func, ()):
+            callee_cumtime = stats.stats[callee][3]
+            edge_cumtime = stats.stats[callee][4][func][3]
+            child_share = share * edge_cumtime / callee_cumtime if callee_cumtime else 0.0
+            if callee not in on_path and child_share * callee_cumtime >= min_subtree:
+                walk(callee, path, on_path, child_share)
+        on_path.discard(func)
+        path.pop()
+
+    # Time not attributed to a recorded caller (entry points, and calls made
+    # before the profiler was enabled) starts a stack of its own.
+    for func, (_, _, _, cumtime, callers) in stats.stats.items():
+        attributed = sum(edge[3] for caller, edge in callers.items() if caller in stats.stats)
+        if cumtime > 0 and attributed < cumtime:
+            walk(func, [], set(), 1.0 - attributed / cumtime)
+    return stacks
+
+
+def _write_summary(prof_path: Path) -> Path:
+    buf = io.StringIO()
+    stats = pstats.Stats(str(prof_path), stream=buf)
+    stats.sort_stats("cumulative").print_stats(SUMMARY_LIMIT)
+    stats.sort_stats("tottime").print_stats(SUMMARY_LIMIT)
+    summary_path = prof_path.with_suffix(".txt")
+    summary_path.write_text(buf.getvalue(), encoding="utf-8")
+    return summary_path
+
+
+def reset_inherited_profilers() -> None:
+    """
+    Process-pool initializer: stop cProfile profilers a forked worker
+    inherited from its parent, so the worker can profile itself. The sampler
+    thread does not survive a fork, so sample mode needs no reset.
+    """
+    while _ENABLED_CPROFILERS:
+        _ENABLED_CPROFILERS.pop().disable()
+
+
+_WORKER_PROFILERS: Dict[Tuple[int, str, str, str], RunProfiler] = {}
+# Exit-time dumps of the profilers above; calling one dumps and unregisters it.
+_WORKER_DUMPS: Dict[Tuple[int, str, str, str], multiprocessing.util.Finalize] = {}
+
+
+def worker_profiler(mode: str, output_dir: Optional[Path], label: str) -> RunProfiler:
+    """
+    Return this process's profiler for `label`, labelled `<label>_worker<pid>`.
+    A new profiler is dumped when the process exits: multiprocessing workers
+    leave through `os._exit`, which skips `atexit` but runs multiprocessing
+    finalizers, so pool shutdown writes every worker's file.
+    """
+    output_dir = Path(output_dir) if output_dir is not None else DEFAULT_PROFILE_DIR
+    pid = os.getpid()
+    key = (pid, mode, str(output_dir), label)
+    profiler = _WORKER_PROFILERS.get(key)
+    if profiler is None:
+        profiler = RunProfiler(mode, output_dir, f"{label}_worker{pid}")
+        _WORKER_PROFILERS[key] = profiler
+        _WORKER_DUMPS[key] = multiprocessing.util.Finalize(None, profiler.dump, exitpriority=10)
+    return profiler
+
+
+def _dump_local_worker_profiles(label: str) -> None:
+    """Write worker profiles for `label` that ran in this process, which has not exited yet."""
+    pid = os.getpid()
+    for key in [key for key in _WORKER_DUMPS if key[0] == pid and key[3] == label]:
+        del _WORKER_PROFILERS[key]
+        _WORKER_DUMPS.pop(key)()
+
+
+@contextmanager
+def profile_worker_task(
+    mode: Optional[str],
+    output_dir: Optional[Path],
+    label: str,
+    dump_every_task: bool = False,
+) -> Iterator[None]:
+    """
+    Profile one task into this worker's accumulating profile (no-op if `mode`
+    is None). The profile is written when the worker exits; set
+    `dump_every_task` to rewrite it after each task instead, e.g. to inspect
+    a long run while it is going or to keep data from workers that get killed.
+    """
+    if not mode:
+        yield
+        return
+    profiler = worker_profiler(mode, output_dir, label)
+    try:
+        with profiler:
+            yield
+    finally:
+        if dump_every_task:
+            profiler.dump()
+
+
+def merge_profiles(mode: str, output_dir: Path, label: str) -> List[Path]:
+    """
+    Fold `<label>_*` profiles under `output_dir` into `<label>.prof` (plus a
+    text summary and call-graph `<label>.collapsed`) or `<label>.collapsed`.
+    The per-process files are kept.
+    """
+    output_dir = Path(output_dir)
+    if mode == "cprofile":
+        parts = sorted(output_dir.glob(f"{label}_*.prof"))
+        if not parts:
+            return []
+        stats = None
+        for part in parts:
+            try:
+                part_stats = pstats.Stats(str(part))
+            except (OSError, TypeError, ValueError, EOFError) as exc:
+                # A worker that died mid-dump leaves a truncated or empty file.
+                print(f"Skipping unreadable profile {part}: {exc}")
+                continue
+            if stats is None:
+                stats = part_stats
+            else:
+                stats.add(part_stats)
+        if stats is None:
+            return []
+        merged = output_dir / f"{label}.prof"
+        stats.dump_stats(str(merged))
+        collapsed = output_dir / f"{label}.collapsed"
+        _write_collapsed(collapsed, _pstats_to_collapsed(stats))
+        return [merged, _write_summary(merged), collapsed]
+
+    parts = sorted(output_dir.glob(f"{label}_*.collapsed"))
+    if not parts:
+        return []
+    stacks: Counter = Counter()
+    for part in parts:
+        stacks.update(_read_collapsed(part))
+    merged = output_dir / f"{label}.collapsed"
+    _write_collapsed(merged, stacks)
+    return [merged]
+
+
+def run_label(name: str) -> str:
+    return f"{name}_{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+
+
+@contextmanager
+def profile_run(
+    mode: Optional[str],
+    name: str,
+    output_dir: Optional[Path] = None,
+) -> Iterator[Optional[str]]:
+    """
+    Profile the calling process for the enclosed run and merge in any worker
+    profiles written under the same label. Yields the label (None when off),
+    which callers hand to `profile_worker_task` in their workers.
+    """
+    if not mode:
+        yield None
+        return
+    output_dir = Path(output_dir) if output_dir is not None else DEFAULT_PROFILE_DIR
+    label = run_label(name)
+    profiler = RunProfiler(mode, output_dir, f"{label}_main")
+    try:
+        with profiler:
+            yield label
+    finally:
+        profiler.dump()
+        _dump_local_worker_profiles(label)
+        merged = merge_profiles(profiler.mode, output_dir, label)
+        if merged:
+            print(f"Profile written to {merged[0]}")
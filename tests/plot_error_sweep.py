@@ -1,9 +1,13 @@
 # save as scripts/plot_error_sweep.py or run inline with python3 - <<'PY'
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
-df = pd.read_csv("reports/error_sweep.csv")
+# A sweep CSV, or a --output-dataset directory (parquet, needs pyarrow).
+source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("reports/error_sweep.csv")
+df = pd.read_parquet(source) if source.is_dir() else pd.read_csv(source)
 
 # Aggregate error level (works for grid or equal mode)
 df["error_level"] = df[["loss_prob", "mutation_prob", "insertion_prob", "shuffle_prob"]].sum(axis=1)
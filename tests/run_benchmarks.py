@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import encode_pool
+from src.encoding_schemes.fountain import fountain_decode, fountain_encode
+from src.encoding_schemes.huffman import huffman_decode, huffman_encode
+from src.encoding_schemes.peptide_mapping import bits_to_peptides
+from src.encoding_schemes.yin_yang import yin_yang_encode
+from src.error_correction import ecc_decode_peptides, ecc_encode_peptides
+from src.error_correction.registry import get_fountain_overhead
+from src.error_model import apply_peptide_errors
+from src.pipeline.fountain_runner import encode_decode_file_fountain
+from src.pipeline.huffman_runner import encode_decode_file_huffman
+from src.pipeline.yin_yang_runner import encode_decode_file_yin_yang
+
+# A prepared benchmark: the timed call and the number of peptides it handles.
+Prepared = Tuple[Callable[[], object], int]
+
+RESULT_COLUMNS = [
+    "benchmark",
+    "kind",
+    "input",
+    "input_bytes",
+    "peptides",
+    "repeat",
+    "best_s",
+    "median_s",
+    "mb_per_s",
+    "peptides_per_s",
+    "peak_mem_mib",
+]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    kind: str  # "micro" (one function) or "macro" (full runner)
+    prepare: Callable[[bytes, PipelineConfig], Prepared]
+    encoder: str = "huffman"  # picks the RS or the Fountain config
+
+
+def _prepare_bits_to_peptides(data: bytes, cfg: PipelineConfig) -> Prepared:
+    bits = huffman_encode(data).bits
+    peptides = len(bits_to_peptides(bits, cfg.peptide_length, cfg.index_aa_length).peptides)
+    return (lambda: bits_to_peptides(bits, cfg.peptide_length, cfg.index_aa_length)), peptides
+
+
+def _prepare_huffman_encode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    return (lambda: huffman_encode(data)), 0
+
+
+def _prepare_huffman_decode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    encoded = huffman_encode(data)
+    return (lambda: huffman_decode(encoded)), 0
+
+
+def _prepare_yin_yang_encode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    peptides = len(yin_yang_encode(data, cfg).peptides)
+    return (lambda: yin_yang_encode(data, cfg)), peptides
+
+
+def _prepare_fountain_encode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    overhead = get_fountain_overhead(cfg.ecc_profile, cfg.fountain_overhead)
+    return (lambda: fountain_encode(data, cfg, overhead=overhead)), 0
+
+
+def _prepare_fountain_decode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    overhead = get_fountain_overhead(cfg.ecc_profile, cfg.fountain_overhead)
+    encoded = fountain_encode(data, cfg, overhead=overhead)
+    return (lambda: fountain_decode(encoded)), 0
+
+
+def _rs_mapping(data: bytes, cfg: PipelineConfig):
+    bits = huffman_encode(data).bits
+    return bits_to_peptides(bits, cfg.peptide_length, cfg.index_aa_length)
+
+
+def _prepare_rs_encode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    mapping = _rs_mapping(data, cfg)
+    return (lambda: ecc_encode_peptides(mapping, profile=cfg.ecc_profile)), len(mapping.peptides)
+
+
+def _prepare_rs_decode(data: bytes, cfg: PipelineConfig) -> Prepared:
+    mapping = _rs_mapping(data, cfg)
+    packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
+    received = apply_peptide_errors(
+        packet.peptides,
+        loss_prob=cfg.loss_prob,
+        mutation_prob=cfg.mutation_prob,
+        insertion_prob=cfg.insertion_prob,
+        shuffle_prob=cfg.shuffle_prob,
+        seed=0,
+    )
+    return (
+        lambda: ecc_decode_peptides(received, packet, profile=cfg.ecc_profile),
+        len(packet.peptides),
+    )
+
+
+def _prepare_apply_errors(data: bytes, cfg: PipelineConfig) -> Prepared:
+    peptides = _rs_mapping(data, cfg).peptides
+    return (
+        lambda: apply_peptide_errors(
+            peptides,
+            loss_prob=cfg.loss_prob,
+            mutation_prob=cfg.mutation_prob,
+            insertion_prob=cfg.insertion_prob,
+            shuffle_prob=cfg.shuffle_prob,
+            shuffle_passes=cfg.shuffle_passes,
+            seed=0,
+        ),
+        len(peptides),
+    )
+
+
+def _prepare_runner(runner, encoder: str) -> Callable[[bytes, PipelineConfig], Prepared]:
+    def prepare(data: bytes, cfg: PipelineConfig) -> Prepared:
+        run_cfg = replace(cfg, encoder=encoder)
+        peptides = len(encode_pool(data, run_cfg).peptides)
+        return (lambda: runner(data, run_cfg)), peptides
+
+    return prepare
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    bench.name: bench
+    for bench in [
+        Benchmark("bits_to_peptides", "micro", _prepare_bits_to_peptides),
+        Benchmark("huffman_encode", "micro", _prepare_huffman_encode),
+        Benchmark("huffman_decode", "micro", _prepare_huffman_decode),
+        Benchmark("yin_yang_encode", "micro", _prepare_yin_yang_encode),
+        Benchmark("fountain_encode", "micro", _prepare_fountain_encode, encoder="fountain"),
+        Benchmark("fountain_decode", "micro", _prepare_fountain_decode, encoder="fountain"),
+        Benchmark("rs_encode_peptides", "micro", _prepare_rs_encode),
+        Benchmark("rs_decode_peptides", "micro", _prepare_rs_decode),
+        Benchmark("apply_peptide_errors", "micro", _prepare_apply_errors),
+        Benchmark("pipeline_huffman", "macro", _prepare_runner(encode_decode_file_huffman, "huffman")),
+        Benchmark("pipeline_yin_yang", "macro", _prepare_runner(encode_decode_file_yin_yang, "yin_yang")),
+        Benchmark(
+            "pipeline_fountain",
+            "macro",
+            _prepare_runner(encode_decode_file_fountain, "fountain"),
+            encoder="fountain",
+        ),
+    ]
+}
+
+
+def _synthetic_input(size_bytes: int, seed: int = 0) -> bytes:
+    """Text-like bytes: words drawn from a small skewed vocabulary (Huffman-friendly)."""
+    rng = random.Random(seed)
+    vocab = [
+        "".join(rng.choice("etaoinshrdlucmfwypvbgkjqxz") for _ in range(rng.randint(2, 9)))
+        for _ in range(512)
+    ]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    chunk = " ".join(rng.choices(vocab, weights=weights, k=4096)).encode("ascii") + b"\n"
+    repeats = size_bytes // len(chunk) + 1
+    return (chunk * repeats)[:size_bytes]
+
+
+def collect_inputs(
+    input_root: Optional[Path],
+    max_size_bytes: int,
+    synthetic_mb: Sequence[float],
+) -> List[Tuple[str, bytes]]:
+    """The size ladder under `input_root` up to `max_size_bytes`, then synthetic inputs."""
+    inputs: List[Tuple[str, bytes]] = []
+    if input_root is not None and input_root.exists():
+        for path in sorted(p for p in input_root.rglob("*") if p.is_file()):
+            if path.stat().st_size <= max_size_bytes:
+                inputs.append((path.name, path.read_bytes()))
+    for mb in synthetic_mb:
+        size = int(mb * 1024 * 1024)
+        inputs.append((f"synthetic_{mb:g}MB", _synthetic_input(size)))
+    return inputs
+
+
+def run_benchmark(bench: Benchmark, label: str, data: bytes, cfg: PipelineConfig, repeat: int) -> Dict[str, object]:
+    """Time `repeat` calls, then one more under tracemalloc for peak memory."""
+    fn, peptides = bench.prepare(data, cfg)
+    durations = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    # tracemalloc slows the call down, so memory is measured on a separate run.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    durations.sort()
+    best = durations[0]
+    return {
+        "benchmark": bench.name,
+        "kind": bench.kind,
+        "input": label,
+        "input_bytes": len(data),
+        "peptides": peptides,
+        "repeat": repeat,
+        "best_s": best,
+        "median_s": durations[len(durations) // 2],
+        "mb_per_s": (len(data) / (1024 * 1024)) / best if best > 0 else 0.0,
+        "peptides_per_s": peptides / best if best > 0 and peptides else 0.0,
+        "peak_mem_mib": peak / (1024 * 1024),
+    }
+
+
+def compare_to_baseline(
+    results: Sequence[Dict[str, object]],
+    baseline: Sequence[Dict[str, object]],
+    threshold: float,
+    min_seconds: float = 0.005,
+) -> List[Dict[str, object]]:
+    """
+    Pair results with baseline rows by (benchmark, input) and return those
+    whose best time or peak memory grew by more than `threshold` (0.2 = 20%).
+    Timings below `min_seconds` in the baseline are too noisy to compare.
+    """
+    previous = {(row["benchmark"], row["input"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        base = previous.get((row["benchmark"], row["input"]))
+        if base is None:
+            continue
+        for metric in ("best_s", "peak_mem_mib"):
+            old, new = float(base[metric]), float(row[metric])
+            if metric == "best_s" and old < min_seconds:
+                continue
+            if old > 0 and new > old * (1.0 + threshold):
+                regressions.append(
+                    {
+                        "benchmark": row["benchmark"],
+                        "input": row["input"],
+                        "metric": metric,
+                        "baseline": old,
+                        "current": new,
+                        "ratio": new / old,
+                    }
+                )
+    return regressions
+
+
+def _load_results(path: Path) -> List[Dict[str, object]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return payload["results"] if isinstance(payload, dict) else payload
+
+
+def _write_results(path: Path, results: Sequence[Dict[str, object]], meta: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".csv":
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        path.write_text(json.dumps({"meta": meta, "results": list(results)}, indent=2), encoding="utf-8")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark codecs, ECC and error models; compare against a saved baseline.",
+    )
+    parser.add_argument(
+        "--input-root",
+        default="resources/test/data_test",
+        help="Size-ladder input root (size_00_1B ...).",
+    )
+    parser.add_argument(
+        "--max-size-bytes",
+        type=int,
+        default=65536,
+        help="Skip ladder files larger than this (pure-Python codecs get slow past ~64 KiB).",
+    )
+    parser.add_argument(
+        "--synthetic-mb",
+        default="",
+        help="Comma-separated synthetic input sizes in MB, e.g. 1,10,100.",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        default="",
+        help=f"Comma-separated subset of: {', '.join(BENCHMARKS)} (default: all).",
+    )
+    parser.add_argument("--kind", choices=["all", "micro", "macro"], default="all")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per benchmark and input.")
+    parser.add_argument("--ecc-profile", default="rs32", help="RS profile for RS and Huffman/Yin-Yang runs.")
+    parser.add_argument("--fountain-profile", default="fountain_default")
+    parser.add_argument(
+        "--error-prob",
+        type=float,
+        default=1.0,
+        help="Loss/mutation/insertion probability (percent) for error-model and decode benchmarks.",
+    )
+    parser.add_argument(
+        "--output",
+        default="",
+        help="Results file (.json or .csv; default: reports/benchmarks/bench_<timestamp>.json).",
+    )
+    parser.add_argument("--save-baseline", default="", help="Also write the results as this baseline JSON.")
+    parser.add_argument("--compare", default="", help="Baseline JSON to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown/memory growth flagged as a regression (default: 0.2).",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.005,
+        help="Ignore timing regressions where the baseline took less than this.",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit non-zero when --compare finds a regression.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    selected = [b.strip() for b in args.benchmarks.split(",") if b.strip()] or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}")
+    benches = [BENCHMARKS[name] for name in selected if args.kind in ("all", BENCHMARKS[name].kind)]
+
+    prob = args.error_prob / 100.0
+    cfg = PipelineConfig(
+        ecc_profile=args.ecc_profile,
+        loss_prob=prob,
+        mutation_prob=prob,
+        insertion_prob=prob,
+        shuffle_prob=0.0,
+        error_event_level="quiet",
+    )
+    fountain_cfg = replace(cfg, ecc_profile=args.fountain_profile)
+
+    synthetic_mb = [float(x) for x in args.synthetic_mb.split(",") if x.strip()]
+    inputs = collect_inputs(Path(args.input_root), args.max_size_bytes, synthetic_mb)
+    if not inputs:
+        raise ValueError("No benchmark inputs found.")
+
+    results = []
+    for bench in benches:
+        for label, data in inputs:
+            bench_cfg = fountain_cfg if bench.encoder == "fountain" else cfg
+            row = run_benchmark(bench, label, data, bench_cfg, max(1, args.repeat))
+            results.append(row)
+            print(
+                f"{bench.name:<22} {label:<24} {row['best_s']*1000:10.2f} ms "
+                f"{row['mb_per_s']:9.3f} MB/s {row['peptides_per_s']:12.0f} pep/s "
+                f"{row['peak_mem_mib']:8.2f} MiB"
+            )
+
+    meta = {
+        "generated_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ecc_profile": args.ecc_profile,
+        "fountain_profile": args.fountain_profile,
+        "error_prob": args.error_prob,
+        "repeat": args.repeat,
+    }
+    output = Path(args.output) if args.output else (
+        PROJECT_ROOT / "reports" / "benchmarks" / f"bench_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    _write_results(output, results, meta)
+    print(f"Wrote {len(results)} results to {output}")
+    if args.save_baseline:
+        _write_results(Path(args.save_baseline), results, meta)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare_to_baseline(
+            results, _load_results(Path(args.compare)), args.threshold, args.min_seconds
+        )
+        for reg in regressions:
+            print(
+                f"REGRESSION {reg['benchmark']} {reg['input']} {reg['metric']}: "
+                f"{reg['baseline']:.4g} -> {reg['current']:.4g} (x{reg['ratio']:.2f})"
+            )
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+        elif args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
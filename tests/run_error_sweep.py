@@ -2,49 +2,40 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import json
+import os
+import random
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from itertools import product
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.pipeline import fingerprint
 from src.pipeline.config import PipelineConfig
-from src.encoding_schemes.peptide_mapping import (
-    PeptideMappingResult,
-    bits_to_peptides,
-    peptides_to_bits,
-    peptides_to_bits_fixed,
-)
-from src.error_correction import ecc_encode_peptides, ecc_decode_peptides
+from src.pipeline.encoded_pool import encode_pool
+from src.pipeline.instrumentation import StageRecorder, recording, span
+from src.encoding_schemes.peptide_mapping import peptides_to_bits, peptides_to_bits_fixed
+from src.error_correction import ecc_decode_peptides
 from src.error_model import apply_peptide_errors, apply_peptide_errors_scored
-from src.error_correction.registry import FOUNTAIN_PROFILES, PEPTIDE_RS_PROFILES, get_fountain_overhead
+from src.error_correction.registry import FOUNTAIN_PROFILES, PEPTIDE_RS_PROFILES
 from src.error_model.scored_errors import get_last_score_stats
+from src.reporting.columnar import COLUMNAR_FORMATS, ColumnarWriter, dataset_parts, read_dataset
+from src.reporting.metrics import error_counts
+from src.utils.profiling import PROFILE_MODES, profile_run, profile_worker_task, reset_inherited_profilers
 
 
 def _iter_files(root: Path) -> Iterable[Path]:
     return sorted(p for p in root.rglob("*") if p.is_file())
 
 
-def _byte_error_count(a: bytes, b: bytes) -> int:
-    min_len = min(len(a), len(b))
-    errors = sum(1 for i in range(min_len) if a[i] != b[i])
-    errors += abs(len(a) - len(b))
-    return errors
-
-
-def _bit_error_count(a: bytes, b: bytes) -> int:
-    min_len = min(len(a), len(b))
-    errors = 0
-    for i in range(min_len):
-        if a[i] != b[i]:
-            errors += (a[i] ^ b[i]).bit_count()
-    errors += abs(len(a) - len(b)) * 8
-    return errors
-
-
 def _parse_prob_values(raw: str) -> List[float]:
     values = []
     for chunk in raw.split(","):
@@ -136,20 +127,346 @@ def _parse_args() -> argparse.Namespace:
         default="huffman",
         help="Encoding scheme to evaluate.",
     )
+    parser.add_argument(
+        "--yin-yang-mode",
+        choices=["greedy", "optimal"],
+        default="greedy",
+        help="Yin-Yang variant choice: greedy per residue or minimum total penalty per peptide.",
+    )
+    parser.add_argument(
+        "--yin-yang-beam-width",
+        type=int,
+        default=0,
+        help="Beam width for --yin-yang-mode optimal (0 = exact Viterbi).",
+    )
     parser.add_argument(
         "--error-model",
         choices=["basic", "scored"],
         default="basic",
         help="Error model to use (basic or scored).",
     )
+    parser.add_argument(
+        "--score-provider",
+        choices=["pepsysco", "local", "heuristic"],
+        default="pepsysco",
+        help="Scorer for --error-model scored (remote Pepsysco, local stand-in server, or offline heuristic).",
+    )
+    parser.add_argument(
+        "--score-provider-url",
+        default=None,
+        help="Base URL of the scoring server (default: IEDB for pepsysco, http://127.0.0.1:8765 for local).",
+    )
     parser.add_argument(
         "--score-column",
         default=None,
         help="Score column name for the scored error model.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the sweep (0 = one per CPU core, 1 = serial).",
+    )
+    parser.add_argument(
+        "--trials",
+        type=int,
+        default=1,
+        help="Repetitions of every (scenario, profile, file) cell with distinct seeds.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Base seed for per-task error seeds (default: random, printed at start).",
+    )
+    parser.add_argument(
+        "--encode-cache",
+        default=None,
+        help="Directory for the encoded-pool cache (default: $PEPTIDE_ENCODE_CACHE_DIR, else off).",
+    )
+    parser.add_argument(
+        "--score-cache",
+        default=None,
+        help="SQLite file for cached Pepsysco scores (default: $PEPSYSCO_SCORE_CACHE, else off).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to an existing --output-csv and skip tasks already recorded there.",
+    )
+    parser.add_argument(
+        "--ordered",
+        action="store_true",
+        help="Write rows in task order instead of completion order.",
+    )
+    parser.add_argument(
+        "--stage-report",
+        default=None,
+        help="Write per-profile stage timing totals to this .json or .csv file.",
+    )
+    parser.add_argument(
+        "--output-dataset",
+        default=None,
+        help="Also append rows to this columnar dataset directory, partitioned by encoder/ecc_profile.",
+    )
+    parser.add_argument(
+        "--dataset-format",
+        choices=COLUMNAR_FORMATS,
+        default="parquet",
+        help="File format for --output-dataset (needs pyarrow).",
+    )
+    parser.add_argument(
+        "--track-memory",
+        action="store_true",
+        help="Record per-stage tracemalloc peaks and peak RSS (slows the sweep down).",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile the sweep and each worker (cprofile: .prof, sample: collapsed stacks).",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="reports/profiles",
+        help="Directory for profile output.",
+    )
     return parser.parse_args()
 
 
+# Per-stage seconds recorded by src.pipeline.instrumentation spans.
+STAGE_COLUMNS = [
+    "source_encode_s",
+    "mapping_s",
+    "ecc_encode_s",
+    "corrupt_s",
+    "ecc_decode_s",
+    "demap_s",
+    "source_decode_s",
+]
+
+# Per-stage memory, filled only with --track-memory: tracemalloc peak above the
+# stage's starting allocation level, and the process peak RSS when it ended.
+MEMORY_COLUMNS = [
+    f"{column[:-2]}_{suffix}" for column in STAGE_COLUMNS for suffix in ("mem_mib", "rss_mib")
+]
+
+FIELDNAMES = [
+    "run_id",
+    "input_path",
+    "trial",
+    "seed",
+    "base_seed",
+    "task_hash",
+    "ecc_profile",
+    "peptide_length",
+    "index_aa_length",
+    "loss_prob",
+    "mutation_prob",
+    "insertion_prob",
+    "shuffle_prob",
+    "prob_mean",
+    "shuffle_passes",
+    "original_size_bytes",
+    "encoded_size_bytes",
+    "decoded_size_bytes",
+    "size_delta_bytes",
+    "success",
+    "byte_errors",
+    "bit_errors",
+    "bit_error_rate",
+    "failure_mode",
+    "data_units",
+    "parity_units",
+    "tx_units",
+    "tx_residues_total",
+    "payload_bits_capacity",
+    "payload_bits_useful",
+    "constraint_violations",
+    "encode_time_s",
+    "decode_time_s",
+    "total_time_s",
+    *STAGE_COLUMNS,
+    *MEMORY_COLUMNS,
+    "score_mean",
+    "score_p10",
+    "score_p90",
+    "score_dedup_ratio",
+    "base_error_mean",
+    "base_error_p10",
+    "base_error_p90",
+    "encoder",
+]
+
+# Column types for --output-dataset; columns not listed are integers.
+_STRING_COLUMNS = {"run_id", "input_path", "task_hash", "ecc_profile", "failure_mode", "encoder"}
+_FLOAT_COLUMNS = {
+    "loss_prob",
+    "mutation_prob",
+    "insertion_prob",
+    "shuffle_prob",
+    "prob_mean",
+    "bit_error_rate",
+    "encode_time_s",
+    "decode_time_s",
+    "total_time_s",
+    *STAGE_COLUMNS,
+    *MEMORY_COLUMNS,
+    "score_mean",
+    "score_p10",
+    "score_p90",
+    "score_dedup_ratio",
+    "base_error_mean",
+    "base_error_p10",
+    "base_error_p90",
+}
+COLUMN_KINDS = {
+    name: (
+        "str" if name in _STRING_COLUMNS
+        else "float" if name in _FLOAT_COLUMNS
+        else "bool" if name == "success"
+        else "uint" if name == "seed"  # 64-bit hash-derived
+        else "int"
+    )
+    for name in FIELDNAMES
+}
+DATASET_PARTITIONS = ("encoder", "ecc_profile")
+
+
+@dataclass
+class SweepTask:
+    """One (scenario, profile, file, trial) cell of the sweep."""
+    index: int
+    run_id: int
+    input_file: Path
+    trial: int
+    seed: int
+    cfg: PipelineConfig
+    base_seed: int = 0
+    task_hash: str = ""
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _task_seed(base_seed: int, cfg: PipelineConfig, input_file: Path, trial: int) -> int:
+    # Derived from the cell identity (not submission order or run_id) so a cell
+    # keeps its seed regardless of worker count or which other cells are swept.
+    key = (
+        f"{base_seed}:{cfg.ecc_profile}:{cfg.loss_prob}:{cfg.mutation_prob}:"
+        f"{cfg.insertion_prob}:{cfg.shuffle_prob}:{input_file}:{trial}"
+    ).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+def _task_hash(input_digest: str, cfg: PipelineConfig, seed: int, code_version: str) -> str:
+    config = fingerprint.hashed_config_fields(cfg)
+    payload = json.dumps(
+        {
+            "input": input_digest,
+            "config": config,
+            "seed": seed,
+            "code_version": code_version,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_tasks(
+    base_cfg: PipelineConfig,
+    scenarios: Sequence[Dict[str, float]],
+    profiles: Sequence[str],
+    input_files: Sequence[Path],
+    trials: int,
+    base_seed: int,
+    code_version: str = "",
+) -> List[SweepTask]:
+    tasks: List[SweepTask] = []
+    digests = {path: _file_digest(path) for path in input_files}
+    run_id = 0
+    for scenario in scenarios:
+        for profile in profiles:
+            cfg = replace(base_cfg, ecc_profile=profile, **scenario)
+            for input_file in input_files:
+                task_cfg = replace(cfg, score_label=input_file.name)
+                for trial in range(trials):
+                    seed = _task_seed(base_seed, task_cfg, input_file, trial)
+                    tasks.append(
+                        SweepTask(
+                            index=len(tasks),
+                            run_id=run_id,
+                            input_file=input_file,
+                            trial=trial,
+                            seed=seed,
+                            cfg=task_cfg,
+                            base_seed=base_seed,
+                            task_hash=_task_hash(digests[input_file], task_cfg, seed, code_version),
+                        )
+                    )
+            run_id += 1
+    return tasks
+
+
+def _load_checkpoint(output_csv: Path) -> Tuple[Set[str], Optional[int]]:
+    """
+    Read task hashes (and the base seed) of rows already in `output_csv`.
+
+    A row cut short by a crash is truncated away so appended rows stay valid.
+    """
+    if not output_csv.exists() or output_csv.stat().st_size == 0:
+        return set(), None
+
+    raw = output_csv.read_bytes()
+    if not raw.endswith(b"\n"):
+        keep = raw.rfind(b"\n") + 1
+        with output_csv.open("r+b") as handle:
+            handle.truncate(keep)
+
+    with output_csv.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        if reader.fieldnames != FIELDNAMES:
+            raise ValueError(
+                f"{output_csv} has a different column layout; "
+                "resume needs a CSV written by the same sweep version."
+            )
+        done: Set[str] = set()
+        base_seed: Optional[int] = None
+        for row in reader:
+            done.add(row["task_hash"])
+            if base_seed is None and row.get("base_seed"):
+                base_seed = int(row["base_seed"])
+    return done, base_seed
+
+
+def _backfill_dataset(output_csv: Path, dataset: ColumnarWriter) -> int:
+    """
+    Write rows of `output_csv` that `dataset` is missing and return how many.
+
+    The CSV checkpoint is flushed per row but the dataset only per batch, so
+    a killed run leaves checkpointed rows that never reached the dataset;
+    --resume would skip their tasks and lose them for good.
+    """
+    present: Set[str] = set()
+    if dataset_parts(dataset.root, dataset.fmt):
+        table = read_dataset(dataset.root, dataset.fmt, columns=["task_hash"])
+        present = set(table.column("task_hash").to_pylist())
+    added = 0
+    with output_csv.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            if row["task_hash"] not in present:
+                dataset.write(row)
+                present.add(row["task_hash"])
+                added += 1
+    dataset.flush()
+    return added
+
+
 def _compute_failure_mode(
     success: bool,
     decoded_len: int,
@@ -167,6 +484,336 @@ def _compute_failure_mode(
     return "mismatch"
 
 
+def _run_task(
+    task: SweepTask,
+    worker_profile: Optional[Tuple[str, str, str]] = None,
+) -> Dict[str, object]:
+    mode, profile_dir, label = worker_profile or (None, None, "")
+    with profile_worker_task(mode, profile_dir, label), recording(memory=task.cfg.track_memory) as stages:
+        row = _execute_task(task)
+    timings = stages.timings()
+    for column in STAGE_COLUMNS:
+        row[column] = timings.get(column, 0.0)
+    memory = stages.memory_usage()
+    for column in MEMORY_COLUMNS:
+        row[column] = memory.get(column, "")
+    return row
+
+
+def _execute_task(task: SweepTask) -> Dict[str, object]:
+    cfg = task.cfg
+    encoder = cfg.encoder
+    input_file = task.input_file
+    data = input_file.read_bytes()
+    outer_failed = False
+    source_failed = False
+    useful_bits = 0
+    mapping = None
+    ecc_packet = None
+    fountain_encoded = None
+    total_peptides = 0
+    yin_yang_original_size_bytes = len(data)
+    decoded = b""
+    score_stats = None
+    constraint_violations = None
+
+    encode_start = time.perf_counter()
+    try:
+        pool = encode_pool(data, cfg)
+        useful_bits = pool.payload_bits  # bits
+        mapping = pool.mapping
+        ecc_packet = pool.ecc_packet
+        original_peptides = pool.peptides
+        if encoder == "huffman":
+            enc = pool.source
+        elif encoder == "yin_yang":
+            yin_yang_original_size_bytes = pool.source.original_size_bytes
+            constraint_violations = pool.source.violations
+        else:
+            fountain_encoded = pool.source
+            total_peptides = len(mapping.peptides)
+    except Exception:
+        outer_failed = True
+        original_peptides = []
+    encode_time_s = time.perf_counter() - encode_start  # seconds
+
+    corrupted_peptides = []
+    if not outer_failed:
+        try:
+            drop_empty = True
+            if encoder == "fountain":
+                # Without an index prefix, we must preserve peptide positions for alignment.
+                drop_empty = cfg.index_aa_length > 0
+
+            with span("corrupt"):
+                if cfg.error_model == "scored":
+                    corrupted_peptides = apply_peptide_errors_scored(
+                        original_peptides,
+                        score_column=cfg.score_column,
+                        score_label=cfg.score_label,
+                        shuffle_passes=cfg.shuffle_passes,
+                        drop_empty=drop_empty,
+                        loss_mode="peptide" if encoder == "fountain" else "aa",
+                        retry_sleep=cfg.score_retry_sleep,
+                        max_sleep=cfg.score_max_sleep,
+                        request_timeout=cfg.score_timeout,
+                        score_batch_size=cfg.score_batch_size,
+                        score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
+                        score_cache_path=cfg.score_cache_path,
+                        score_concurrency=cfg.score_concurrency,
+                        score_provider=cfg.score_provider,
+                        score_provider_url=cfg.score_provider_url,
+                        event_level=cfg.error_event_level,
+                        trace_path=cfg.error_trace_path,
+                        trace_sample_rate=cfg.error_trace_sample_rate,
+                        seed=task.seed,
+                    )
+                    score_stats = get_last_score_stats()
+                else:
+                    corrupted_peptides = apply_peptide_errors(
+                        original_peptides,
+                        loss_prob=cfg.loss_prob,
+                        mutation_prob=cfg.mutation_prob,
+                        insertion_prob=cfg.insertion_prob,
+                        shuffle_prob=cfg.shuffle_prob,
+                        shuffle_passes=cfg.shuffle_passes,
+                        drop_empty=drop_empty,
+                        loss_mode="peptide" if encoder == "fountain" else "aa",
+                        seed=task.seed,
+                    )
+        except Exception:
+            outer_failed = True
+
+    decode_start = time.perf_counter()
+    recovered_mapping = None
+
+    if encoder in {"huffman", "yin_yang"}:
+        if not outer_failed and ecc_packet is not None:
+            try:
+                with span("ecc_decode"):
+                    recovered_mapping = ecc_decode_peptides(
+                        corrupted_peptides,
+                        encoded=ecc_packet,
+                        profile=cfg.ecc_profile,
+                    )
+                if not recovered_mapping.peptides:
+                    outer_failed = True
+            except Exception:
+                outer_failed = True
+                recovered_mapping = None
+
+        if not outer_failed and recovered_mapping is not None:
+            try:
+                if encoder == "huffman":
+                    from src.encoding_schemes.huffman import huffman_decode
+
+                    with span("demap"):
+                        recovered_bits = peptides_to_bits(recovered_mapping)
+                    with span("source_decode"):
+                        enc.bits = recovered_bits
+                        decoded = huffman_decode(enc)
+                else:
+                    from src.encoding_schemes.yin_yang import YinYangEncoded, yin_yang_decode
+
+                    recovered = YinYangEncoded(
+                        peptides=recovered_mapping.peptides,
+                        pad_bits=recovered_mapping.pad_bits,
+                        peptide_length=recovered_mapping.peptide_length,
+                        index_aa_length=recovered_mapping.index_aa_length,
+                        original_size_bytes=yin_yang_original_size_bytes,
+                    )
+                    with span("source_decode"):
+                        decoded = yin_yang_decode(recovered)
+            except Exception:
+                source_failed = True
+                decoded = b""
+    else:
+        if not outer_failed and fountain_encoded is not None and mapping is not None:
+            try:
+                with span("demap"):
+                    recovered_bits = peptides_to_bits_fixed(
+                        list(corrupted_peptides),
+                        peptide_length=mapping.peptide_length,
+                        index_aa_length=mapping.index_aa_length,
+                        total_peptides=total_peptides,
+                        pad_bits=mapping.pad_bits,
+                    )
+                from src.encoding_schemes.fountain import fountain_decode
+
+                with span("source_decode"):
+                    decoded = fountain_decode(replace(fountain_encoded, bits=recovered_bits))
+                if not decoded and fountain_encoded.original_size > 0:
+                    outer_failed = True
+            except Exception:
+                outer_failed = True
+                decoded = b""
+
+    decode_time_s = time.perf_counter() - decode_start  # seconds
+
+    loss_prob = score_stats["avg_loss_prob"] if score_stats else cfg.loss_prob
+    mutation_prob = score_stats["avg_mutation_prob"] if score_stats else cfg.mutation_prob
+    insertion_prob = score_stats["avg_insertion_prob"] if score_stats else cfg.insertion_prob
+    shuffle_prob = score_stats["avg_shuffle_prob"] if score_stats else cfg.shuffle_prob
+    prob_mean = (loss_prob + mutation_prob + insertion_prob + shuffle_prob) / 4.0
+
+    byte_errors, bit_errors = error_counts(data, decoded)
+    total_bits = len(data) * 8
+    bit_error_rate = (bit_errors / total_bits) if total_bits else 0.0
+
+    success = decoded == data
+    failure_mode = _compute_failure_mode(
+        success=success,
+        decoded_len=len(decoded),
+        outer_failed=outer_failed,
+        source_failed=source_failed,
+    )
+
+    payload_residues_per_peptide = cfg.peptide_length - cfg.index_aa_length
+    tx_peptides = len(original_peptides)
+    tx_residues_total = tx_peptides * cfg.peptide_length  # residues
+    encoded_size_bytes = (tx_residues_total * 3 + 7) // 8  # bytes (3 bits per residue capacity)
+
+    if encoder == "fountain":
+        data_units = fountain_encoded.k if fountain_encoded else 0  # source packets
+        parity_units = 0
+        tx_units = fountain_encoded.droplet_count if fountain_encoded else 0  # droplets
+        payload_bits_capacity = tx_peptides * payload_residues_per_peptide * 3  # bits
+        payload_bits_useful = useful_bits  # bits
+    elif encoder == "yin_yang":
+        data_units = len(mapping.peptides) if mapping else 0  # data peptides
+        parity_units = (len(ecc_packet.peptides) - data_units) if ecc_packet else 0
+        tx_units = len(ecc_packet.peptides) if ecc_packet else 0  # transmitted peptides
+        payload_bits_capacity = data_units * payload_residues_per_peptide * 2  # bits (YY rate)
+        payload_bits_useful = useful_bits  # bits
+    else:
+        data_units = len(mapping.peptides) if mapping else 0  # data peptides
+        parity_units = (len(ecc_packet.peptides) - data_units) if ecc_packet else 0
+        tx_units = len(ecc_packet.peptides) if ecc_packet else 0  # transmitted peptides
+        payload_bits_capacity = data_units * payload_residues_per_peptide * 3  # bits
+        payload_bits_useful = useful_bits  # bits
+
+    return (
+        {
+            "run_id": task.run_id,
+            "input_path": str(input_file),
+            "trial": task.trial,
+            "seed": task.seed,
+            "base_seed": task.base_seed,
+            "task_hash": task.task_hash,
+            "ecc_profile": cfg.ecc_profile,
+            "peptide_length": cfg.peptide_length,
+            "index_aa_length": cfg.index_aa_length,
+            "loss_prob": loss_prob,
+            "mutation_prob": mutation_prob,
+            "insertion_prob": insertion_prob,
+            "shuffle_prob": shuffle_prob,
+            "prob_mean": prob_mean,
+            "shuffle_passes": cfg.shuffle_passes,
+            "original_size_bytes": len(data),
+            "encoded_size_bytes": encoded_size_bytes,
+            "decoded_size_bytes": len(decoded),
+            "size_delta_bytes": len(decoded) - len(data),
+            "success": success,
+            "byte_errors": byte_errors,
+            "bit_errors": bit_errors,
+            "bit_error_rate": bit_error_rate,
+            "failure_mode": failure_mode,
+            "data_units": data_units,
+            "parity_units": parity_units,
+            "tx_units": tx_units,
+            "tx_residues_total": tx_residues_total,
+            "payload_bits_capacity": payload_bits_capacity,
+            "payload_bits_useful": payload_bits_useful,
+            "constraint_violations": constraint_violations,
+            "encode_time_s": encode_time_s,
+            "decode_time_s": decode_time_s,
+            "total_time_s": encode_time_s + decode_time_s,
+            "score_mean": score_stats["score_mean"] if score_stats else None,
+            "score_p10": score_stats["score_p10"] if score_stats else None,
+            "score_p90": score_stats["score_p90"] if score_stats else None,
+            "score_dedup_ratio": score_stats["score_dedup_ratio"] if score_stats else None,
+            "base_error_mean": score_stats["base_error_mean"] if score_stats else None,
+            "base_error_p10": score_stats["base_error_p10"] if score_stats else None,
+            "base_error_p90": score_stats["base_error_p90"] if score_stats else None,
+            "encoder": encoder,
+        }
+    )
+
+
+def _iter_results(
+    tasks: Sequence[SweepTask],
+    workers: int,
+    ordered: bool,
+    worker_profile: Optional[Tuple[str, str, str]] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield finished rows, in completion order unless `ordered` is set.
+
+    Ordered mode buffers only the rows that finish ahead of the next expected
+    task, so rows still stream to disk as the sweep progresses.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield _run_task(task)
+        return
+
+    pending_rows: Dict[int, Dict[str, object]] = {}
+    next_position = 0
+    task_iter = enumerate(tasks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=reset_inherited_profilers) as pool:
+        in_flight = {}
+        # Keep a bounded number of tasks queued so huge grids don't pickle
+        # every task up front.
+        for position, task in task_iter:
+            in_flight[pool.submit(_run_task, task, worker_profile)] = position
+            if len(in_flight) >= workers * 4:
+                break
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = in_flight.pop(future)
+                row = future.result()
+                if not ordered:
+                    yield row
+                else:
+                    pending_rows[position] = row
+                next_item = next(task_iter, None)
+                if next_item is not None:
+                    next_position_submitted, next_task = next_item
+                    in_flight[pool.submit(_run_task, next_task, worker_profile)] = next_position_submitted
+
+            while next_position in pending_rows:
+                yield pending_rows.pop(next_position)
+                next_position += 1
+
+
+def _write_stage_report(path: Path, stage_totals: Dict[str, StageRecorder]) -> None:
+    """Write per-profile stage totals (seconds and share of the profile's total)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for profile, recorder in sorted(stage_totals.items()):
+        total = sum(recorder.spans.values())
+        for stage, seconds in recorder.spans.items():
+            rows.append(
+                {
+                    "ecc_profile": profile,
+                    "stage": stage,
+                    "total_s": seconds,
+                    "share": (seconds / total) if total else 0.0,
+                    "tasks": recorder.calls[stage],
+                }
+            )
+    if path.suffix.lower() == ".json":
+        path.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    else:
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=["ecc_profile", "stage", "total_s", "share", "tasks"])
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"Wrote stage report to {path}")
+
+
 def main() -> None:
     args = _parse_args()
     input_root = Path(args.input_root)
@@ -202,318 +849,88 @@ def main() -> None:
             }
         ]
 
-
-    rows: List[Dict[str, object]] = []
-    run_id = 0
-
-    for scenario in scenarios:
-        for profile in profiles:
-            cfg = PipelineConfig(
-                peptide_length=args.peptide_length,
-                ecc_profile=profile,
-                loss_prob=scenario["loss_prob"],
-                mutation_prob=scenario["mutation_prob"],
-                insertion_prob=scenario["insertion_prob"],
-                shuffle_prob=scenario["shuffle_prob"],
-                shuffle_passes=args.shuffle_passes,
-                encoder=encoder,
-                index_aa_length=args.index_aa_length,
-                error_model=args.error_model,
-                score_column=args.score_column,
-            )
-
-            for input_file in _iter_files(input_root):
-                cfg.score_label = input_file.name
-                data = input_file.read_bytes()
-                outer_failed = False
-                source_failed = False
-                useful_bits = 0
-                mapping = None
-                ecc_packet = None
-                fountain_encoded = None
-                total_peptides = 0
-                yin_yang_original_size_bytes = len(data)
-                decoded = b""
-                score_stats = None
-
-                encode_start = time.perf_counter()
-                try:
-                    if encoder == "huffman":
-                        from src.encoding_schemes.huffman import huffman_encode
-
-                        enc = huffman_encode(data)
-                        useful_bits = len(enc.bits)  # bits
-                        mapping = bits_to_peptides(
-                            enc.bits,
-                            peptide_length=cfg.peptide_length,
-                            index_aa_length=cfg.index_aa_length,
-                        )
-                        ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-                        original_peptides = ecc_packet.peptides
-                    elif encoder == "yin_yang":
-                        from src.encoding_schemes.yin_yang import yin_yang_encode
-
-                        yy = yin_yang_encode(data, cfg)
-                        yin_yang_original_size_bytes = yy.original_size_bytes
-                        useful_bits = len(data) * 8  # bits (no compression)
-                        mapping = PeptideMappingResult(
-                            peptides=yy.peptides,
-                            pad_bits=yy.pad_bits,
-                            peptide_length=cfg.peptide_length,
-                            index_aa_length=cfg.index_aa_length,
-                        )
-                        ecc_packet = ecc_encode_peptides(mapping, profile=cfg.ecc_profile)
-                        original_peptides = ecc_packet.peptides
-                    elif encoder == "fountain":
-                        from src.encoding_schemes.fountain import fountain_encode
-
-                        overhead = get_fountain_overhead(cfg.ecc_profile, cfg.fountain_overhead)
-                        fountain_encoded = fountain_encode(data, cfg, overhead=overhead)
-                        useful_bits = len(data) * 8  # bits (original payload)
-                        mapping = bits_to_peptides(
-                            fountain_encoded.bits,
-                            peptide_length=cfg.peptide_length,
-                            index_aa_length=cfg.index_aa_length,
-                            pad_to_full_peptide=True,
-                        )
-                        original_peptides = mapping.peptides
-                        total_peptides = len(mapping.peptides)
-                    else:
-                        raise ValueError(f"Unsupported encoder: {encoder}")
-                except Exception:
-                    outer_failed = True
-                    original_peptides = []
-                encode_time_s = time.perf_counter() - encode_start  # seconds
-
-                corrupted_peptides = []
-                if not outer_failed:
-                    try:
-                        drop_empty = True
-                        if encoder == "fountain":
-                            # Without an index prefix, we must preserve peptide positions for alignment.
-                            drop_empty = cfg.index_aa_length > 0
-
-                        if cfg.error_model == "scored":
-                            corrupted_peptides = apply_peptide_errors_scored(
-                                original_peptides,
-                                score_column=cfg.score_column,
-                                score_label=cfg.score_label,
-                                shuffle_passes=cfg.shuffle_passes,
-                                drop_empty=drop_empty,
-                                loss_mode="peptide" if encoder == "fountain" else "aa",
-                                retry_sleep=cfg.score_retry_sleep,
-                                max_sleep=cfg.score_max_sleep,
-                                request_timeout=cfg.score_timeout,
-                                score_batch_size=cfg.score_batch_size,
-                                score_batch_max_payload_bytes=cfg.score_batch_max_payload_bytes,
-                            )
-                            score_stats = get_last_score_stats()
-                        else:
-                            corrupted_peptides = apply_peptide_errors(
-                                original_peptides,
-                                loss_prob=cfg.loss_prob,
-                                mutation_prob=cfg.mutation_prob,
-                                insertion_prob=cfg.insertion_prob,
-                                shuffle_prob=cfg.shuffle_prob,
-                                shuffle_passes=cfg.shuffle_passes,
-                                drop_empty=drop_empty,
-                                loss_mode="peptide" if encoder == "fountain" else "aa",
-                            )
-                    except Exception:
-                        outer_failed = True
-
-                decode_start = time.perf_counter()
-                recovered_mapping = None
-
-                if encoder in {"huffman", "yin_yang"}:
-                    if not outer_failed and ecc_packet is not None:
-                        try:
-                            recovered_mapping = ecc_decode_peptides(
-                                corrupted_peptides,
-                                encoded=ecc_packet,
-                                profile=cfg.ecc_profile,
-                            )
-                            if not recovered_mapping.peptides:
-                                outer_failed = True
-                        except Exception:
-                            outer_failed = True
-                            recovered_mapping = None
-
-                    if not outer_failed and recovered_mapping is not None:
-                        try:
-                            if encoder == "huffman":
-                                from src.encoding_schemes.huffman import huffman_decode
-
-                                recovered_bits = peptides_to_bits(recovered_mapping)
-                                enc.bits = recovered_bits
-                                decoded = huffman_decode(enc)
-                            else:
-                                from src.encoding_schemes.yin_yang import YinYangEncoded, yin_yang_decode
-
-                                recovered = YinYangEncoded(
-                                    peptides=recovered_mapping.peptides,
-                                    pad_bits=recovered_mapping.pad_bits,
-                                    peptide_length=recovered_mapping.peptide_length,
-                                    index_aa_length=recovered_mapping.index_aa_length,
-                                    original_size_bytes=yin_yang_original_size_bytes,
-                                )
-                                decoded = yin_yang_decode(recovered)
-                        except Exception:
-                            source_failed = True
-                            decoded = b""
-                else:
-                    if not outer_failed and fountain_encoded is not None and mapping is not None:
-                        try:
-                            recovered_bits = peptides_to_bits_fixed(
-                                list(corrupted_peptides),
-                                peptide_length=mapping.peptide_length,
-                                index_aa_length=mapping.index_aa_length,
-                                total_peptides=total_peptides,
-                                pad_bits=mapping.pad_bits,
-                            )
-                            fountain_encoded.bits = recovered_bits
-                            from src.encoding_schemes.fountain import fountain_decode
-
-                            decoded = fountain_decode(fountain_encoded)
-                            if not decoded and fountain_encoded.original_size > 0:
-                                outer_failed = True
-                        except Exception:
-                            outer_failed = True
-                            decoded = b""
-
-                decode_time_s = time.perf_counter() - decode_start  # seconds
-
-                loss_prob = score_stats["avg_loss_prob"] if score_stats else scenario["loss_prob"]
-                mutation_prob = score_stats["avg_mutation_prob"] if score_stats else scenario["mutation_prob"]
-                insertion_prob = score_stats["avg_insertion_prob"] if score_stats else scenario["insertion_prob"]
-                shuffle_prob = score_stats["avg_shuffle_prob"] if score_stats else scenario["shuffle_prob"]
-                prob_mean = (loss_prob + mutation_prob + insertion_prob + shuffle_prob) / 4.0
-
-                byte_errors = _byte_error_count(data, decoded)
-                bit_errors = _bit_error_count(data, decoded)
-                total_bits = len(data) * 8
-                bit_error_rate = (bit_errors / total_bits) if total_bits else 0.0
-
-                success = decoded == data
-                failure_mode = _compute_failure_mode(
-                    success=success,
-                    decoded_len=len(decoded),
-                    outer_failed=outer_failed,
-                    source_failed=source_failed,
-                )
-
-                payload_residues_per_peptide = cfg.peptide_length - cfg.index_aa_length
-                tx_peptides = len(original_peptides)
-                tx_residues_total = tx_peptides * cfg.peptide_length  # residues
-                encoded_size_bytes = (tx_residues_total * 3 + 7) // 8  # bytes (3 bits per residue capacity)
-
-                if encoder == "fountain":
-                    data_units = fountain_encoded.k if fountain_encoded else 0  # source packets
-                    parity_units = 0
-                    tx_units = fountain_encoded.droplet_count if fountain_encoded else 0  # droplets
-                    payload_bits_capacity = tx_peptides * payload_residues_per_peptide * 3  # bits
-                    payload_bits_useful = useful_bits  # bits
-                elif encoder == "yin_yang":
-                    data_units = len(mapping.peptides) if mapping else 0  # data peptides
-                    parity_units = (len(ecc_packet.peptides) - data_units) if ecc_packet else 0
-                    tx_units = len(ecc_packet.peptides) if ecc_packet else 0  # transmitted peptides
-                    payload_bits_capacity = data_units * payload_residues_per_peptide * 2  # bits (YY rate)
-                    payload_bits_useful = useful_bits  # bits
-                else:
-                    data_units = len(mapping.peptides) if mapping else 0  # data peptides
-                    parity_units = (len(ecc_packet.peptides) - data_units) if ecc_packet else 0
-                    tx_units = len(ecc_packet.peptides) if ecc_packet else 0  # transmitted peptides
-                    payload_bits_capacity = data_units * payload_residues_per_peptide * 3  # bits
-                    payload_bits_useful = useful_bits  # bits
-
-                rows.append(
-                    {
-                        "run_id": run_id,
-                        "input_path": str(input_file),
-                        "ecc_profile": profile,
-                        "peptide_length": args.peptide_length,
-                        "index_aa_length": args.index_aa_length,
-                        "loss_prob": loss_prob,
-                        "mutation_prob": mutation_prob,
-                        "insertion_prob": insertion_prob,
-                        "shuffle_prob": shuffle_prob,
-                        "prob_mean": prob_mean,
-                        "shuffle_passes": args.shuffle_passes,
-                        "original_size_bytes": len(data),
-                        "encoded_size_bytes": encoded_size_bytes,
-                        "decoded_size_bytes": len(decoded),
-                        "size_delta_bytes": len(decoded) - len(data),
-                        "success": success,
-                        "byte_errors": byte_errors,
-                        "bit_errors": bit_errors,
-                        "bit_error_rate": bit_error_rate,
-                        "failure_mode": failure_mode,
-                        "data_units": data_units,
-                        "parity_units": parity_units,
-                        "tx_units": tx_units,
-                        "tx_residues_total": tx_residues_total,
-                        "payload_bits_capacity": payload_bits_capacity,
-                        "payload_bits_useful": payload_bits_useful,
-                        "encode_time_s": encode_time_s,
-                        "decode_time_s": decode_time_s,
-                        "total_time_s": encode_time_s + decode_time_s,
-                        "score_mean": score_stats["score_mean"] if score_stats else None,
-                        "score_p10": score_stats["score_p10"] if score_stats else None,
-                        "score_p90": score_stats["score_p90"] if score_stats else None,
-                        "base_error_mean": score_stats["base_error_mean"] if score_stats else None,
-                        "base_error_p10": score_stats["base_error_p10"] if score_stats else None,
-                        "base_error_p90": score_stats["base_error_p90"] if score_stats else None,
-                        "encoder": encoder,
-                    }
-                )
-            run_id += 1
-
-    fieldnames = [
-        "run_id",
-        "input_path",
-        "ecc_profile",
-        "peptide_length",
-        "index_aa_length",
-        "loss_prob",
-        "mutation_prob",
-        "insertion_prob",
-        "shuffle_prob",
-        "prob_mean",
-        "shuffle_passes",
-        "original_size_bytes",
-        "encoded_size_bytes",
-        "decoded_size_bytes",
-        "size_delta_bytes",
-        "success",
-        "byte_errors",
-        "bit_errors",
-        "bit_error_rate",
-        "failure_mode",
-        "data_units",
-        "parity_units",
-        "tx_units",
-        "tx_residues_total",
-        "payload_bits_capacity",
-        "payload_bits_useful",
-        "encode_time_s",
-        "decode_time_s",
-        "total_time_s",
-        "score_mean",
-        "score_p10",
-        "score_p90",
-        "base_error_mean",
-        "base_error_p10",
-        "base_error_p90",
-        "encoder",
-    ]
-
-    with output_csv.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
+    if args.trials < 1:
+        raise ValueError("--trials must be >= 1")
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    done_hashes: Set[str] = set()
+    base_seed = args.seed
+    if args.resume:
+        done_hashes, previous_seed = _load_checkpoint(output_csv)
+        if base_seed is None:
+            base_seed = previous_seed
+    if base_seed is None:
+        base_seed = random.SystemRandom().getrandbits(32)
+    print(f"Sweep base seed: {base_seed}")
+
+    base_cfg = PipelineConfig(
+        peptide_length=args.peptide_length,
+        shuffle_passes=args.shuffle_passes,
+        encoder=encoder,
+        index_aa_length=args.index_aa_length,
+        yin_yang_mode=args.yin_yang_mode,
+        yin_yang_beam_width=args.yin_yang_beam_width,
+        error_model=args.error_model,
+        score_column=args.score_column,
+        score_provider=args.score_provider,
+        score_provider_url=args.score_provider_url,
+        encode_cache_dir=args.encode_cache,
+        score_cache_path=args.score_cache,
+        track_memory=args.track_memory,
+    )
+    tasks = _build_tasks(
+        base_cfg,
+        scenarios,
+        profiles,
+        list(_iter_files(input_root)),
+        trials=args.trials,
+        base_seed=base_seed,
+        code_version=fingerprint.code_version(Path(__file__)),
+    )
+    if done_hashes:
+        total = len(tasks)
+        tasks = [task for task in tasks if task.task_hash not in done_hashes]
+        print(f"Resuming: {total - len(tasks)} of {total} tasks already in {output_csv}")
+    print(f"Running {len(tasks)} tasks with {workers} worker(s)")
+
+    append = args.resume and output_csv.exists() and output_csv.stat().st_size > 0
+    written = 0
+    stage_totals: Dict[str, StageRecorder] = {}
+    dataset: Optional[ColumnarWriter] = (
+        ColumnarWriter(
+            Path(args.output_dataset),
+            COLUMN_KINDS,
+            fmt=args.dataset_format,
+            partition_by=DATASET_PARTITIONS,
+        )
+        if args.output_dataset
+        else None
+    )
+    with profile_run(args.profile, "sweep", args.profile_dir) as profile_label, output_csv.open(
+        "a" if append else "w", newline="", encoding="utf-8"
+    ) as handle, dataset or nullcontext():
+        worker_profile = (args.profile, args.profile_dir, profile_label) if profile_label and workers > 1 else None
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
+        if not append:
+            writer.writeheader()
+            handle.flush()
+        elif dataset is not None:
+            backfilled = _backfill_dataset(output_csv, dataset)
+            if backfilled:
+                print(f"Backfilled {backfilled} checkpointed rows into {dataset.root}")
+        for row in _iter_results(tasks, workers=workers, ordered=args.ordered, worker_profile=worker_profile):
             writer.writerow(row)
-
-    print(f"Wrote {len(rows)} rows to {output_csv}")
+            handle.flush()
+            if dataset is not None:
+                dataset.write(row)
+            written += 1
+            stage_totals.setdefault(str(row["ecc_profile"]), StageRecorder())
+            for column in STAGE_COLUMNS:
+                stage_totals[str(row["ecc_profile"])].add_span(column[:-2], float(row[column]))
+
+    print(f"Wrote {written} rows to {output_csv}")
+    if args.stage_report:
+        _write_stage_report(Path(args.stage_report), stage_totals)
 
 
 if __name__ == "__main__":
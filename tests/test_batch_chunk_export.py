@@ -0,0 +1,69 @@
+import src.pipeline.huffman_runner as huffman_runner
+from src.pipeline.config import PipelineConfig
+from src.utils.batch import process_file
+
+
+def test_chunk_export_reuses_runner_packet(tmp_path, monkeypatch):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    in_path = in_dir / "sample.txt"
+    in_path.write_bytes(b"chunk export should not re-encode " * 10)
+    cfg = PipelineConfig(
+        ecc_profile="rs8",
+        loss_prob=0.0,
+        mutation_prob=0.0,
+        insertion_prob=0.0,
+        shuffle_prob=0.0,
+    )
+
+    calls = []
+    original = huffman_runner.huffman_encode
+
+    def counting_encode(payload):
+        calls.append(payload)
+        return original(payload)
+
+    monkeypatch.setattr(huffman_runner, "huffman_encode", counting_encode)
+
+    results = []
+    original_runner = huffman_runner.encode_decode_file_huffman
+
+    def recording_runner(payload, config):
+        result = original_runner(payload, config)
+        results.append(result)
+        return result
+
+    monkeypatch.setattr("src.utils.batch.encode_decode_file_huffman", recording_runner)
+
+    out_root = tmp_path / "out"
+    process_file(
+        in_path=in_path,
+        rel_root=in_path.parent.relative_to(in_dir),
+        out_encoded_root=out_root / "out_encoded",
+        out_decoded_root=out_root / "out_decoded",
+        out_chunked_root=out_root / "out_chunked",
+        cfg=cfg,
+    )
+
+    assert len(calls) == 1
+    (result,) = results
+    assert set(result.timings) == {
+        "encode_s",
+        "source_encode_s",
+        "mapping_s",
+        "ecc_encode_s",
+        "corrupt_s",
+        "ecc_decode_s",
+        "demap_s",
+        "source_decode_s",
+    }
+    assert result.counters["peptides_transmitted"] == len(result.original_peptides)
+
+    original_peptides, corrupted_peptides, decoded = result
+    assert decoded == in_path.read_bytes()
+    assert corrupted_peptides == original_peptides
+
+    chunk_file = next((out_root / "out_chunked").rglob("*_chunked*"))
+    rows = [line.split(",") for line in chunk_file.read_text(encoding="utf-8").splitlines()]
+    assert [row[3] for row in rows] == result.ecc_packet.peptides
+    assert [row[2] == "parity" for row in rows] == [m.is_parity for m in result.metadata]
@@ -0,0 +1,109 @@
+import json
+from concurrent.futures import Future
+
+import src.utils.batch as batch
+from src.pipeline.config import PipelineConfig
+from src.utils.batch import MANIFEST_NAME, run_batch_on_folder
+
+
+def _cfg():
+    return PipelineConfig(
+        ecc_profile="rs8",
+        loss_prob=0.0,
+        mutation_prob=0.0,
+        insertion_prob=0.0,
+        shuffle_prob=0.0,
+    )
+
+
+def test_parallel_batch_then_incremental_rerun(tmp_path, monkeypatch):
+    input_root = tmp_path / "in"
+    (input_root / "docs").mkdir(parents=True)
+    (input_root / "docs" / "a.txt").write_bytes(b"alpha " * 40)
+    (input_root / "docs" / "b.txt").write_bytes(b"beta " * 10)
+    output_root = tmp_path / "out"
+
+    run_batch_on_folder(input_root, output_root, cfg=_cfg(), workers=2)
+
+    manifest = [
+        json.loads(line)
+        for line in (output_root / MANIFEST_NAME).read_text(encoding="utf-8").splitlines()
+    ]
+    assert [entry["path"] for entry in manifest] == ["docs/a.txt", "docs/b.txt"]
+    for entry in manifest:
+        decoded = next(out for out in entry["outputs"] if out.startswith("out_decoded/"))
+        assert (output_root / decoded).read_bytes() == (input_root / entry["path"]).read_bytes()
+
+    calls = []
+    original = batch._PROCESSORS["huffman"]
+
+    def counting_process(**kwargs):
+        calls.append(kwargs["in_path"].name)
+        return original(**kwargs)
+
+    monkeypatch.setitem(batch._PROCESSORS, "huffman", counting_process)
+
+    run_batch_on_folder(input_root, output_root, cfg=_cfg())
+    assert calls == []
+
+    (input_root / "docs" / "b.txt").write_bytes(b"changed " * 10)
+    run_batch_on_folder(input_root, output_root, cfg=_cfg())
+    assert calls == ["b.txt"]
+
+    cfg = _cfg()
+    cfg.ecc_profile = "rs16"
+    run_batch_on_folder(input_root, output_root, cfg=cfg)
+    assert sorted(calls[1:]) == ["a.txt", "b.txt"]
+
+
+def test_manifest_records_stage_timings_and_opt_in_memory(tmp_path):
+    input_root = tmp_path / "in"
+    input_root.mkdir()
+    (input_root / "a.txt").write_bytes(b"memory " * 50)
+
+    plain_root = tmp_path / "plain"
+    run_batch_on_folder(input_root, plain_root, cfg=_cfg())
+    (entry,) = [json.loads(line) for line in (plain_root / MANIFEST_NAME).read_text(encoding="utf-8").splitlines()]
+    assert entry["timings"]["ecc_decode_s"] >= 0.0
+    assert entry["timings"]["source_encode_s"] >= 0.0
+    assert "encode_s" not in entry["timings"]
+    assert "memory" not in entry
+
+    cfg = _cfg()
+    cfg.track_memory = True
+    tracked_root = tmp_path / "tracked"
+    run_batch_on_folder(input_root, tracked_root, cfg=cfg)
+    (entry,) = [json.loads(line) for line in (tracked_root / MANIFEST_NAME).read_text(encoding="utf-8").splitlines()]
+    assert entry["memory"]["encode_mem_mib"] > 0.0
+    assert entry["memory"]["ecc_decode_rss_mib"] > 0.0
+
+
+def test_parallel_batch_bounds_in_flight_tasks(monkeypatch):
+    submitted = []
+
+    class InlineExecutor:
+        def __init__(self, max_workers, initializer=None):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, *args):
+            future = Future()
+            submitted.append(args[0])
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(batch, "_process_task", lambda task, *args: task)
+
+    pending = [(index, f"hash{index}") for index in range(20)]
+    results = batch._iter_batch(pending, None, None, _cfg(), workers=2)
+    first, first_hash, _ = next(results)
+    assert first < 8 and first_hash == f"hash{first}"
+    assert len(submitted) == 9
+    assert sorted([first] + [task for task, _, _ in results]) == list(range(20))
+    assert submitted == list(range(20))
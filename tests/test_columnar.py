@@ -0,0 +1,71 @@
+import pytest
+
+from src.pipeline.config import PipelineConfig
+from src.reporting.columnar import ColumnarWriter, read_dataset
+from src.reporting.report import generate_report
+from tests import run_error_sweep as sweep
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_sweep_rows_round_trip_through_partitioned_dataset(tmp_path, fmt):
+    cfg = PipelineConfig(ecc_profile="rs8", encoder="huffman")
+    inputs = []
+    for idx, payload in enumerate([b"columnar-a" * 5, b"columnar-bb" * 9]):
+        path = tmp_path / f"in_{idx}.txt"
+        path.write_bytes(payload)
+        inputs.append(path)
+    tasks = sweep._build_tasks(cfg, sweep._build_scenarios([0.01], "equal"), ["rs8", "rs16"], inputs, 1, 3)
+    rows = list(sweep._iter_results(tasks, workers=1, ordered=True))
+
+    root = tmp_path / "dataset"
+    # Two runs appending, the first flushing every row into its own part.
+    with ColumnarWriter(root, sweep.COLUMN_KINDS, fmt=fmt, partition_by=sweep.DATASET_PARTITIONS, batch_rows=1) as w:
+        for row in rows[:2]:
+            w.write(row)
+    with ColumnarWriter(root, sweep.COLUMN_KINDS, fmt=fmt, partition_by=sweep.DATASET_PARTITIONS) as w:
+        for row in rows[2:]:
+            w.write(row)
+
+    assert sorted(p.name for p in root.iterdir()) == ["encoder=huffman"]
+    assert sorted(p.name for p in (root / "encoder=huffman").iterdir()) == ["ecc_profile=rs16", "ecc_profile=rs8"]
+    table = read_dataset(root, fmt=fmt)
+    assert table.num_rows == len(rows)
+    assert pa.types.is_dictionary(table.schema.field("failure_mode").type)
+    assert table.schema.field("seed").type == pa.uint64()
+    loaded = {(r["task_hash"]): r for r in table.to_pylist()}
+    for row in rows:
+        got = loaded[row["task_hash"]]
+        assert got["seed"] == row["seed"] and got["success"] == row["success"]
+        assert got["bit_error_rate"] == pytest.approx(row["bit_error_rate"])
+        assert got["source_encode_mem_mib"] is None  # "" (not tracked) -> null
+
+
+def test_report_writes_and_replaces_parquet_dataset(tmp_path):
+    data = tmp_path / "data" / "set"
+    data.mkdir(parents=True)
+    (data / "a.bin").write_bytes(b"abc")
+    decoded = tmp_path / "out" / "out_decoded" / "set_decoded"
+    decoded.mkdir(parents=True)
+    (decoded / "a_decoded.bin").write_bytes(b"abd")
+
+    for _ in range(2):
+        generate_report(tmp_path / "data", tmp_path / "out", tmp_path / "report", formats=("parquet",))
+    table = read_dataset(tmp_path / "report" / "report_parquet")
+    assert table.to_pylist() == [
+        {
+            "input_path": "set/a.bin",
+            "status": "ok",
+            "original_size_bytes": 3,
+            "decoded_size_bytes": 3,
+            "size_delta_bytes": 0,
+            "success": False,
+            "byte_errors": 1,
+            "bit_errors": 3,
+            "bit_error_rate": 3 / 24,
+            "burst_count": 1,
+            "max_burst_bytes": 1,
+            "errored_blocks": None,
+        }
+    ]
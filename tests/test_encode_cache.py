@@ -0,0 +1,106 @@
+import os
+
+from src.pipeline.config import PipelineConfig
+from src.pipeline.encode_cache import EncodeCache, get_encode_cache
+from src.pipeline.encoded_pool import encode_pool
+from src.pipeline.fountain_runner import encode_decode_file_fountain
+from src.pipeline.huffman_runner import encode_decode_file_huffman
+
+
+def test_encode_pool_round_trips_through_cache(tmp_path, monkeypatch):
+    data = b"cache me if you can " * 20
+    cfg = PipelineConfig(ecc_profile="rs8", encode_cache_dir=str(tmp_path))
+
+    calls = []
+    import src.pipeline.huffman_runner as huffman_runner
+
+    original = huffman_runner.encode_huffman_pool
+
+    def counting_encode(payload, config):
+        calls.append(payload)
+        return original(payload, config)
+
+    monkeypatch.setattr(huffman_runner, "encode_huffman_pool", counting_encode)
+
+    first = encode_pool(data, cfg)
+    second = encode_pool(data, cfg)
+
+    assert len(calls) == 1
+    assert second.peptides == first.peptides
+    assert second.ecc_packet.metadata == first.ecc_packet.metadata
+    _, _, decoded = encode_decode_file_huffman(data, cfg)
+    assert decoded == data
+
+    encode_pool(data, PipelineConfig(ecc_profile="rs16", encode_cache_dir=str(tmp_path)))
+    assert len(calls) == 2
+
+
+def test_fountain_without_seed_bypasses_cache(tmp_path):
+    data = b"fountain-no-seed" * 4
+    cfg = PipelineConfig(
+        encoder="fountain",
+        ecc_profile="fnt10",
+        fountain_symbol_size=8,
+        encode_cache_dir=str(tmp_path),
+    )
+    cache = get_encode_cache(cfg)
+    assert cache.key_for(data, cfg, "fountain") is None
+
+    cfg.fountain_seed = 7
+    _, _, decoded = encode_decode_file_fountain(data, cfg)
+    assert decoded == data
+    assert len(list(tmp_path.glob("*/*.bin"))) == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cfg = PipelineConfig(ecc_profile="rs8")
+    cache = EncodeCache(tmp_path, max_bytes=10**9)
+    keys = []
+    for idx in range(3):
+        data = bytes([idx]) * 200
+        key = cache.key_for(data, cfg, "huffman")
+        cache.put(key, encode_pool(data, cfg))
+        os.utime(cache._path(key), (1000 + idx, 1000 + idx))
+        keys.append(key)
+
+    assert cache.get(keys[0]) is not None  # refreshes keys[0]
+    sizes = {key: cache._path(key).stat().st_size for key in keys}
+    cache.max_bytes = sizes[keys[0]] + sizes[keys[2]]
+    cache.evict()
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_cache_key_follows_code_version(tmp_path, monkeypatch):
+    from src.pipeline import fingerprint
+
+    cfg = PipelineConfig(ecc_profile="rs8")
+    cache = EncodeCache(tmp_path, max_bytes=10**9)
+    key = cache.key_for(b"versioned", cfg, "huffman")
+
+    monkeypatch.setattr(fingerprint, "code_version", lambda *paths: "0123456789abcdef")
+    assert cache.key_for(b"versioned", cfg, "huffman") != key
+
+
+def test_tampered_entries_are_dropped(tmp_path):
+    import pickle
+
+    cfg = PipelineConfig(ecc_profile="rs8")
+    cache = EncodeCache(tmp_path, max_bytes=10**9)
+    data = b"tamper" * 50
+    key = cache.key_for(data, cfg, "huffman")
+    cache.put(key, encode_pool(data, cfg))
+    path = cache._path(key)
+
+    blob = bytearray(path.read_bytes())
+    blob[-1] ^= 0xFF
+    path.write_bytes(bytes(blob))
+    assert cache.get(key) is None
+    assert not path.exists()
+
+    # Pickles planted in a shared cache directory are never loaded.
+    path.write_bytes(pickle.dumps(encode_pool(data, cfg)))
+    assert cache.get(key) is None
+    assert not path.exists()
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import src.reporting.metrics as metrics
+from src.reporting.metrics import burst_histogram, error_counts, error_position_histogram, file_error_runs
+
+
+def _reference_counts(a, b):
+    common = min(len(a), len(b))
+    tail = abs(len(a) - len(b))
+    byte_errors = sum(1 for i in range(common) if a[i] != b[i]) + tail
+    bit_errors = sum((a[i] ^ b[i]).bit_count() for i in range(common)) + 8 * tail
+    return byte_errors, bit_errors
+
+
+@pytest.mark.parametrize("trim", [0, 1, 37])
+def test_error_counts_match_bytewise_reference(monkeypatch, trim):
+    monkeypatch.setattr(metrics, "CHUNK_BYTES", 64)  # exercise chunk edges and equal-chunk skips
+    rng = random.Random(trim)
+    original = rng.randbytes(1000)
+    decoded = bytearray(original)
+    for pos in rng.sample(range(len(decoded)), 50):
+        decoded[pos] ^= rng.randrange(1, 256)
+    decoded = bytes(decoded[: len(decoded) - trim])
+
+    assert error_counts(original, decoded) == _reference_counts(original, decoded)
+    assert error_counts(decoded, original) == _reference_counts(decoded, original)
+    assert error_counts(original, original) == (0, 0)
+    assert error_counts(b"", original) == (len(original), 8 * len(original))
+
+
+def test_error_position_histogram():
+    original = bytes(100)
+    decoded = bytearray(original)
+    decoded[3] = 1
+    decoded[55] = 0xFF
+    assert error_position_histogram(original, bytes(decoded[:90]), bins=4) == [1, 0, 1, 10]
+    assert sum(error_position_histogram(original, bytes(decoded), bins=7)) == 2
+    assert error_position_histogram(b"", b"", bins=3) == [0, 0, 0]
+    with pytest.raises(ValueError):
+        error_position_histogram(original, original, bins=0)
+
+
+def test_file_error_runs_join_across_chunks_and_include_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "CHUNK_BYTES", 8)
+    original = bytes(40)
+    decoded = bytearray(original)
+    for pos in (3, 6, 7, 8, 9, 20):
+        decoded[pos] = 0xAA
+    (tmp_path / "a").write_bytes(original)
+    (tmp_path / "b").write_bytes(bytes(decoded[:30]))
+
+    runs = list(file_error_runs(tmp_path / "a", tmp_path / "b"))
+    assert runs == [(3, 4), (6, 10), (20, 21), (30, 40)]
+    assert sum(end - start for start, end in runs) == error_counts(original, bytes(decoded[:30]))[0]
+    assert burst_histogram(runs) == {"1": 2, "4-7": 1, "8-15": 1}
+    assert list(file_error_runs(tmp_path / "a", tmp_path / "a")) == []
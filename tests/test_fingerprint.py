@@ -0,0 +1,24 @@
+from dataclasses import replace
+
+from src.pipeline import fingerprint
+from src.pipeline.config import PipelineConfig
+
+
+def test_config_hash_ignores_run_knobs_only():
+    cfg = PipelineConfig(ecc_profile="rs8")
+    base = fingerprint.config_hash(cfg)
+
+    assert fingerprint.config_hash(replace(cfg, score_label="a.txt", yin_yang_workers=4)) == base
+    assert fingerprint.config_hash(replace(cfg, encoder="HUFFMAN")) == base
+    assert fingerprint.config_hash(replace(cfg, pool_format="binary")) != base
+    assert fingerprint.config_hash(replace(cfg, ecc_profile="rs16")) != base
+
+
+def test_code_version_covers_extra_sources(tmp_path):
+    script = tmp_path / "driver.py"
+    script.write_text("x = 1\n", encoding="utf-8")
+    with_script = fingerprint.code_version(script)
+
+    assert fingerprint.code_version() != with_script
+    script.write_text("x = 2\n", encoding="utf-8")
+    assert fingerprint.code_version(script) != with_script
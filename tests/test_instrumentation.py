@@ -0,0 +1,60 @@
+import tracemalloc
+
+from src.pipeline.instrumentation import count, recording, span
+
+
+def test_spans_and_counts_are_no_ops_without_a_recorder():
+    with span("encode"):
+        count("peptides_transmitted", 3)
+
+
+def test_nested_recorders_fold_into_the_parent():
+    with recording() as outer:
+        with recording() as inner:
+            with span("encode"):
+                count("peptides_transmitted", 3)
+        with span("encode"):
+            pass
+
+    assert inner.calls == {"encode": 1}
+    assert outer.calls == {"encode": 2}
+    assert outer.counters == {"peptides_transmitted": 3}
+    assert outer.memory_usage() == {}
+
+
+def test_leaf_timings_drop_enclosing_spans():
+    with recording() as stages:
+        with span("encode"):
+            with span("source_encode"):
+                pass
+            with recording():
+                with span("ecc_encode"):
+                    pass
+        with span("corrupt"):
+            pass
+
+    assert set(stages.timings()) == {"encode_s", "source_encode_s", "ecc_encode_s", "corrupt_s"}
+    assert set(stages.leaf_timings()) == {"source_encode_s", "ecc_encode_s", "corrupt_s"}
+
+
+def test_memory_spans_keep_the_enclosing_peak():
+    assert not tracemalloc.is_tracing()
+    with recording(memory=True) as stages:
+        with span("outer"):
+            big = bytearray(8 * 1024 * 1024)
+            with span("inner"):
+                small = bytearray(1024 * 1024)
+                del small
+            del big
+        # Nested recorders inherit memory tracking.
+        with recording() as nested:
+            with span("later"):
+                pass
+    assert not tracemalloc.is_tracing()
+
+    usage = stages.memory_usage()
+    assert 1.0 <= usage["inner_mem_mib"] < 2.0
+    # The inner span's reset must not hide the 8 MiB allocated before it.
+    assert usage["outer_mem_mib"] >= 9.0
+    assert usage["outer_rss_mib"] > 0.0
+    assert nested.memory and "later_mem_mib" in usage
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from src.encoding_schemes.peptide_mapping import PeptideMappingResult
+from src.pipeline.config import PipelineConfig
+from src.pipeline.encoded_pool import EncodedPool, decode_pool, encode_pool
+from src.pipeline.pool_container import PoolReader, read_pool, write_pool
+from src.utils.batch import MANIFEST_NAME, run_batch_on_folder
+
+
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        PipelineConfig(encoder="huffman", ecc_profile="rs8"),
+        PipelineConfig(encoder="yin_yang", ecc_profile="rs16"),
+        PipelineConfig(encoder="fountain", ecc_profile="fnt20", fountain_seed=5),
+    ],
+)
+def test_container_round_trip_and_random_access(tmp_path, cfg):
+    data = random.Random(1).randbytes(600)
+    pool = encode_pool(data, cfg)
+    path = write_pool(tmp_path / "pool.ppool", pool, cfg)
+
+    with PoolReader(path) as reader:
+        assert len(reader) == len(pool.peptides)
+        assert reader.encoder == cfg.encoder
+        for idx in random.Random(2).sample(range(len(pool.peptides)), 25) + [0, -1]:
+            assert reader[idx] == pool.peptides[idx]
+        with pytest.raises(IndexError):
+            reader[len(pool.peptides)]
+
+    loaded_cfg, loaded = read_pool(path)
+    assert loaded_cfg == cfg
+    assert loaded.peptides == pool.peptides
+    assert loaded.mapping == pool.mapping
+    assert loaded.ecc_packet == pool.ecc_packet
+    assert decode_pool(loaded, loaded.peptides, loaded_cfg) == data
+    # Decoding works on a copy of the source payload.
+    assert getattr(loaded.source, "bits", "") == ""
+
+
+def test_container_keeps_a_mapping_it_cannot_derive(tmp_path):
+    pool = EncodedPool(
+        encoder="huffman",
+        peptides=["AVLSTFYE", "EEEE", "AVLSTFYE"],
+        mapping=PeptideMappingResult(peptides=["EEEE", "AVLSTFYE", "LLL"], pad_bits=1, peptide_length=8),
+    )
+    path = write_pool(tmp_path / "odd.ppool", pool, PipelineConfig())
+    with PoolReader(path) as reader:
+        assert reader.meta["mapping"]["layout"] == "positions"
+        assert len(reader) == 3 and reader[1] == "EEEE"
+        assert reader.peptides() == pool.peptides
+    _, loaded = read_pool(path)
+    assert loaded.mapping == pool.mapping
+
+    with pytest.raises(ValueError):
+        write_pool(tmp_path / "bad.ppool", EncodedPool("huffman", ["AXA"], pool.mapping), PipelineConfig())
+    (tmp_path / "text.ppool").write_text("AVLS\nTFYE", encoding="utf-8")
+    with pytest.raises(ValueError):
+        PoolReader(tmp_path / "text.ppool")
+
+
+@pytest.mark.parametrize(
+    "cfg",
+    [
+        PipelineConfig(ecc_profile="rs8", pool_format="binary"),
+        PipelineConfig(encoder="fountain", ecc_profile="fnt20", fountain_seed=7, pool_format="binary"),
+    ],
+)
+def test_batch_writes_binary_pools(tmp_path, cfg):
+    input_root = tmp_path / "in"
+    input_root.mkdir()
+    (input_root / "a.txt").write_bytes(b"binary pool output " * 30)
+
+    run_batch_on_folder(input_root, tmp_path / "out", cfg=cfg)
+
+    (container,) = (tmp_path / "out" / "out_encoded").rglob("*.ppool")
+    assert container.name == "a_encoded.txt.ppool"
+    assert container.relative_to(tmp_path / "out").as_posix() in (tmp_path / "out" / MANIFEST_NAME).read_text()
+    loaded_cfg, pool = read_pool(container)
+    # The batch decodes before writing; the decoder's recovered bits must not end up in the file.
+    assert getattr(pool.source, "bits", "") == ""
+    fresh = write_pool(tmp_path / "fresh.ppool", encode_pool(b"binary pool output " * 30, loaded_cfg), loaded_cfg)
+    assert container.stat().st_size == fresh.stat().st_size
+    assert decode_pool(pool, pool.peptides, loaded_cfg) == (input_root / "a.txt").read_bytes()
+
+    with pytest.raises(ValueError):
+        run_batch_on_folder(input_root, tmp_path / "out2", cfg=PipelineConfig(pool_format="zip"))
@@ -0,0 +1,92 @@
+import multiprocessing
+import pstats
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.utils.profiling import merge_profiles, profile_run, profile_worker_task, reset_inherited_profilers
+
+
+def _busy_decode(n):
+    return sum(i * i for i in range(n))
+
+
+def _profiled_task(label, profile_dir):
+    with profile_worker_task("cprofile", profile_dir, label):
+        return _busy_decode(10_000)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_cprofile_run_merges_worker_profiles(tmp_path):
+    # Forked workers inherit the parent's enabled profiler; the initializer must clear it.
+    context = multiprocessing.get_context("fork")
+    with profile_run("cprofile", "unit", tmp_path) as label:
+        with ProcessPoolExecutor(2, mp_context=context, initializer=reset_inherited_profilers) as pool:
+            assert list(pool.map(_profiled_task, [label] * 4, [tmp_path] * 4)) == [_busy_decode(10_000)] * 4
+        _busy_decode(10_000)
+
+    assert (tmp_path / f"{label}_main.prof").exists()
+    workers = list(tmp_path.glob(f"{label}_worker*.prof"))
+    assert workers
+    assert any(func[2] == "_busy_decode" for func in pstats.Stats(str(workers[0])).stats)
+    merged = pstats.Stats(str(tmp_path / f"{label}.prof"))
+    assert any(func[2] == "_busy_decode" for func in merged.stats)
+    assert "_busy_decode" in (tmp_path / f"{label}.txt").read_text(encoding="utf-8")
+    collapsed = (tmp_path / f"{label}.collapsed").read_text(encoding="utf-8").splitlines()
+    assert any(line.rsplit(" ", 1)[0].endswith(":_busy_decode") for line in collapsed)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in collapsed)
+
+
+def _profiled_task_dumped(label, profile_dir):
+    with profile_worker_task("cprofile", profile_dir, label, dump_every_task=True):
+        return _busy_decode(10_000)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+@pytest.mark.parametrize("task, dump_every_task", [(_profiled_task, False), (_profiled_task_dumped, True)])
+def test_worker_profiles_are_written_at_worker_exit_unless_dumping_every_task(tmp_path, task, dump_every_task):
+    context = multiprocessing.get_context("fork")
+    with profile_run("cprofile", "unit", tmp_path) as label:
+        with ProcessPoolExecutor(1, mp_context=context, initializer=reset_inherited_profilers) as pool:
+            assert list(pool.map(task, [label] * 3, [tmp_path] * 3)) == [_busy_decode(10_000)] * 3
+            written_before_exit = bool(list(tmp_path.glob(f"{label}_worker*.prof")))
+        assert written_before_exit == dump_every_task
+        (worker,) = tmp_path.glob(f"{label}_worker*.prof")
+        busy = [stat for func, stat in pstats.Stats(str(worker)).stats.items() if func[2] == "_busy_decode"]
+        assert busy[0][1] == 3
+
+
+def test_merge_skips_unreadable_worker_profiles(tmp_path):
+    with profile_run("cprofile", "unit", tmp_path) as label:
+        (tmp_path / f"{label}_worker1.prof").write_bytes(b"")
+        (tmp_path / f"{label}_worker2.prof").write_text("not a profile", encoding="utf-8")
+        _busy_decode(1_000)
+
+    merged = pstats.Stats(str(tmp_path / f"{label}.prof"))
+    assert any(func[2] == "_busy_decode" for func in merged.stats)
+
+
+def test_sample_mode_writes_collapsed_stacks(tmp_path):
+    with profile_run("sample", "unit", tmp_path) as label:
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            _busy_decode(1_000)
+
+    lines = (tmp_path / f"{label}.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines
+    stack, samples = lines[0].rsplit(" ", 1)
+    assert int(samples) > 0
+    assert any("test_sample_mode_writes_collapsed_stacks" in line for line in lines)
+
+
+def test_profiling_off_and_unknown_mode(tmp_path):
+    with profile_run(None, "unit", tmp_path) as label:
+        pass
+    assert label is None
+    assert not list(tmp_path.iterdir())
+    assert merge_profiles("cprofile", tmp_path, "missing") == []
+
+    with pytest.raises(ValueError):
+        with profile_run("perf", "unit", tmp_path):
+            pass
@@ -0,0 +1,106 @@
+import csv
+import json
+from pathlib import Path
+
+import src.reporting.metrics as metrics
+import src.reporting.report as report_module
+from src.reporting.report import REPORT_COLUMNS, generate_report
+
+
+def _write_case(tmp_path):
+    in_root = tmp_path / "data" / "set"
+    decoded_root = tmp_path / "out" / "out_decoded" / "set_decoded"
+    in_root.mkdir(parents=True)
+    decoded_root.mkdir(parents=True)
+    files = {
+        "same.bin": (b"identical payload" * 100, b"identical payload" * 100),
+        "flip.bin": (bytes(64), bytes(10) + b"\x03" + bytes(53)),
+        "short.bin": (b"abcdef", b"abc"),
+        "empty.bin": (b"", b""),
+        "missing.bin": (b"never decoded", None),
+        "burst.bin": (bytes(64), bytes(10) + b"\xff" * 3 + bytes(27) + b"\x01" + bytes(23)),
+    }
+    for name, (original, decoded) in files.items():
+        (in_root / name).write_bytes(original)
+        if decoded is not None:
+            (decoded_root / f"{name[:-4]}_decoded.bin").write_bytes(decoded)
+    # Two RS blocks of two data peptides each, transmitted interleaved with parity.
+    chunked_root = tmp_path / "out" / "out_chunked" / "set_chunked"
+    chunked_root.mkdir(parents=True)
+    (chunked_root / "burst_chunked.bin").write_text(
+        "0,0,data,AAA\n1,0,data,AAA\n0,1,data,AAA\n1,1,data,AAA\n0,2,parity,AAA\n1,2,parity,AAA",
+        encoding="utf-8",
+    )
+    return in_root.parent, tmp_path / "out"
+
+
+def test_report_rows_summary_and_streamed_files(tmp_path, monkeypatch):
+    in_root, out_root = _write_case(tmp_path)
+    report_dir = tmp_path / "report"
+    compared = []
+    counts = metrics.file_error_counts
+
+    def counting_error_counts(a_path, b_path):
+        compared.append(a_path.name)
+        return counts(a_path, b_path)
+
+    monkeypatch.setattr(report_module, "file_error_counts", counting_error_counts)
+    report = generate_report(in_root, out_root, report_dir, workers=3)
+
+    rows = {Path(row["input_path"]).name: row for row in report["files"]}
+    assert [row["input_path"] for row in report["files"]] == sorted(str(Path("set") / name) for name in rows)
+    assert rows["same.bin"]["success"] and rows["same.bin"]["bit_errors"] == 0
+    assert (rows["flip.bin"]["byte_errors"], rows["flip.bin"]["bit_errors"]) == (1, 2)
+    assert (rows["short.bin"]["status"], rows["short.bin"]["size_delta_bytes"]) == ("size_mismatch", -3)
+    assert not rows["short.bin"]["success"] and rows["short.bin"]["byte_errors"] is None
+    assert "short.bin" not in compared and "missing.bin" not in compared
+    assert rows["empty.bin"]["success"] and rows["empty.bin"]["bit_error_rate"] == 0.0
+    assert rows["missing.bin"]["status"] == "missing_decoded"
+    assert (rows["burst.bin"]["burst_count"], rows["burst.bin"]["max_burst_bytes"]) == (2, 3)
+    assert rows["burst.bin"]["errored_blocks"] == 2
+    assert rows["burst.bin"]["error_profile"] == {
+        "burst_histogram": {"1": 1, "2-3": 1},
+        "block_errors": {"0": 3, "1": 1},
+        "index_errors": [4, 0],
+    }
+    # No _chunked file: bursts only.
+    assert rows["flip.bin"]["errored_blocks"] is None
+    assert rows["flip.bin"]["error_profile"] == {"burst_histogram": {"1": 1}}
+    assert "error_profile" not in rows["same.bin"]
+
+    summary = report["summary"]
+    assert (summary["total_files"], summary["decoded_present"], summary["success_count"]) == (6, 5, 2)
+
+    saved = json.loads((report_dir / "report.json").read_text(encoding="utf-8"))
+    assert saved["files"] == report["files"]
+    assert saved["summary"] == summary
+    with (report_dir / "report.csv").open(newline="", encoding="utf-8") as handle:
+        csv_rows = list(csv.DictReader(handle))
+    assert [row["input_path"] for row in csv_rows] == [row["input_path"] for row in report["files"]]
+    assert list(csv_rows[0]) == REPORT_COLUMNS
+
+    lean = generate_report(in_root, out_root, tmp_path / "lean", formats=("json",), keep_rows=False)
+    assert lean["files"] == [] and lean["summary"] == summary
+    assert len(json.loads((tmp_path / "lean" / "report.json").read_text(encoding="utf-8"))["files"]) == 6
+
+
+def test_compared_rows_keep_input_order_within_a_bounded_window():
+    submitted = []
+    yielded = []
+
+    def compare(path):
+        submitted.append(path)
+        return path
+
+    rows = report_module._iter_compared(compare, iter(range(50)), workers=2)
+    for row in rows:
+        yielded.append(row)
+        assert len(submitted) - len(yielded) < 8
+    assert yielded == list(range(50))
+
+
+def test_report_on_empty_tree(tmp_path):
+    (tmp_path / "data").mkdir()
+    report = generate_report(tmp_path / "data", tmp_path / "out", tmp_path / "report")
+    assert report["summary"]["total_files"] == 0
+    assert json.loads((tmp_path / "report" / "report.json").read_text(encoding="utf-8"))["files"] == []
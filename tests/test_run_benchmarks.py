@@ -0,0 +1,40 @@
+from src.pipeline.config import PipelineConfig
+from tests import run_benchmarks as bench
+
+
+def test_each_benchmark_runs_on_a_small_input():
+    cfg = PipelineConfig(ecc_profile="rs8", loss_prob=0.0, mutation_prob=0.0, insertion_prob=0.0)
+    fountain_cfg = PipelineConfig(ecc_profile="fountain_default")
+    data = bench._synthetic_input(300)
+    assert len(data) == 300
+
+    for benchmark in bench.BENCHMARKS.values():
+        run_cfg = fountain_cfg if benchmark.encoder == "fountain" else cfg
+        row = bench.run_benchmark(benchmark, "tiny", data, run_cfg, repeat=1)
+        assert set(row) == set(bench.RESULT_COLUMNS)
+        assert row["best_s"] > 0 and row["mb_per_s"] > 0
+        assert row["peak_mem_mib"] > 0
+        if benchmark.kind == "macro" or benchmark.name.startswith("rs_"):
+            assert row["peptides"] > 0 and row["peptides_per_s"] > 0
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = [
+        {"benchmark": "huffman_encode", "input": "a", "best_s": 0.10, "peak_mem_mib": 1.0},
+        {"benchmark": "huffman_encode", "input": "b", "best_s": 0.001, "peak_mem_mib": 1.0},
+        {"benchmark": "huffman_decode", "input": "a", "best_s": 0.10, "peak_mem_mib": 1.0},
+    ]
+    current = [
+        {"benchmark": "huffman_encode", "input": "a", "best_s": 0.15, "peak_mem_mib": 1.05},
+        # Sub-threshold baseline timing is noise, not a regression.
+        {"benchmark": "huffman_encode", "input": "b", "best_s": 0.004, "peak_mem_mib": 1.0},
+        {"benchmark": "huffman_decode", "input": "a", "best_s": 0.09, "peak_mem_mib": 2.0},
+        {"benchmark": "fountain_encode", "input": "a", "best_s": 9.0, "peak_mem_mib": 9.0},
+    ]
+
+    regressions = bench.compare_to_baseline(current, baseline, threshold=0.2)
+
+    assert [(r["benchmark"], r["input"], r["metric"]) for r in regressions] == [
+        ("huffman_encode", "a", "best_s"),
+        ("huffman_decode", "a", "peak_mem_mib"),
+    ]
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+from src.pipeline.config import PipelineConfig
+from tests import run_error_sweep as sweep
+
+
+def _make_inputs(tmp_path: Path):
+    files = []
+    for idx, payload in enumerate([b"sweep-a" * 5, b"sweep-bb" * 9]):
+        path = tmp_path / f"in_{idx}.txt"
+        path.write_bytes(payload)
+        files.append(path)
+    return files
+
+
+def test_task_seeds_depend_on_task_identity_only(tmp_path):
+    cfg = PipelineConfig(ecc_profile="rs8")
+    scenarios = [{"loss_prob": 0.01, "mutation_prob": 0.0, "insertion_prob": 0.0, "shuffle_prob": 0.0}]
+    files = _make_inputs(tmp_path)
+
+    both = sweep._build_tasks(cfg, scenarios, ["rs8", "rs16"], files, trials=2, base_seed=5)
+    only_b = sweep._build_tasks(cfg, scenarios, ["rs16"], files[1:], trials=2, base_seed=5)
+
+    assert len({task.seed for task in both}) == len(both)
+    assert len({task.task_hash for task in both}) == len(both)
+    later_cell = [t for t in both if t.cfg.ecc_profile == "rs16" and t.input_file == files[1]]
+    assert [t.seed for t in later_cell] == [t.seed for t in only_b]
+    assert [t.task_hash for t in later_cell] == [t.task_hash for t in only_b]
+    assert [t.cfg.score_label for t in both[:4]] == ["in_0.txt", "in_0.txt", "in_1.txt", "in_1.txt"]
+
+
+def test_parallel_ordered_rows_match_serial(tmp_path):
+    cfg = PipelineConfig(ecc_profile="rs8", encoder="huffman")
+    scenarios = sweep._build_scenarios([0.01, 0.02], "equal")
+    tasks = sweep._build_tasks(cfg, scenarios, ["rs8", "rs16"], _make_inputs(tmp_path), trials=2, base_seed=11)
+
+    timing = {"encode_time_s", "decode_time_s", "total_time_s", *sweep.STAGE_COLUMNS}
+
+    def _strip(rows):
+        return [{k: v for k, v in row.items() if k not in timing} for row in rows]
+
+    serial = list(sweep._iter_results(tasks, workers=1, ordered=True))
+    parallel = list(sweep._iter_results(tasks, workers=2, ordered=True))
+
+    assert len(serial) == len(tasks)
+    assert _strip(parallel) == _strip(serial)
+
+
+def test_load_checkpoint_skips_done_tasks_and_drops_partial_row(tmp_path):
+    import csv
+
+    cfg = PipelineConfig(ecc_profile="rs8", encoder="huffman")
+    scenarios = sweep._build_scenarios([0.01], "equal")
+    tasks = sweep._build_tasks(cfg, scenarios, ["rs8"], _make_inputs(tmp_path), trials=2, base_seed=9)
+
+    output_csv = tmp_path / "sweep.csv"
+    with output_csv.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=sweep.FIELDNAMES)
+        writer.writeheader()
+        for row in sweep._iter_results(tasks[:2], workers=1, ordered=True):
+            writer.writerow(row)
+        handle.write("7,cut-short-by-a-crash")
+
+    done, base_seed = sweep._load_checkpoint(output_csv)
+
+    assert done == {task.task_hash for task in tasks[:2]}
+    assert base_seed == 9
+    assert output_csv.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_resume_backfills_rows_missing_from_dataset(tmp_path):
+    import csv
+
+    import pytest
+
+    pytest.importorskip("pyarrow")
+    from src.reporting.columnar import ColumnarWriter, read_dataset
+
+    cfg = PipelineConfig(ecc_profile="rs8", encoder="huffman")
+    scenarios = sweep._build_scenarios([0.01], "equal")
+    tasks = sweep._build_tasks(cfg, scenarios, ["rs8"], _make_inputs(tmp_path), trials=2, base_seed=3)
+    rows = list(sweep._iter_results(tasks[:3], workers=1, ordered=True))
+
+    output_csv = tmp_path / "sweep.csv"
+    with output_csv.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=sweep.FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    def _writer():
+        return ColumnarWriter(tmp_path / "dataset", sweep.COLUMN_KINDS, partition_by=sweep.DATASET_PARTITIONS)
+
+    # A killed run: every row checkpointed to the CSV, only the first flushed to the dataset.
+    with _writer() as dataset:
+        dataset.write(rows[0])
+
+    with _writer() as dataset:
+        assert sweep._backfill_dataset(output_csv, dataset) == 2
+        assert sweep._backfill_dataset(output_csv, dataset) == 0
+
+    table = read_dataset(tmp_path / "dataset")
+    assert sorted(table.column("task_hash").to_pylist()) == sorted(row["task_hash"] for row in rows)
+    assert sorted(table.column("seed").to_pylist()) == sorted(row["seed"] for row in rows)
@@ -1,3 +1,9 @@
+import gzip
+import threading
+import time
+
+import pytest
+
 from src.error_model import scored_errors as se
 
 
@@ -38,6 +44,7 @@ def test_fetch_scores_chunked_preserves_order_and_reuses_score_column(monkeypatc
         retry_sleep=1.0,
         max_sleep=30.0,
         request_timeout=30.0,
+        **kwargs,
     ):
         calls.append(
             {
@@ -59,6 +66,7 @@ def test_fetch_scores_chunked_preserves_order_and_reuses_score_column(monkeypatc
         max_payload_bytes=10_000,
     )
 
+    calls.sort(key=lambda call: call["score_label"])
     assert [call["sequences"] for call in calls] == [
         ["AAA", "BBB"],
         ["CCC", "DDD"],
@@ -73,3 +81,238 @@ def test_fetch_scores_chunked_preserves_order_and_reuses_score_column(monkeypatc
         "demo_chunk003",
     ]
     assert rows == [(pep, score_map[pep]) for pep in peptides]
+
+
+def test_score_cache_skips_already_scored_peptides(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_fetch_scores_batch(
+        sequences,
+        score_column,
+        score_label,
+        retry_sleep=1.0,
+        max_sleep=30.0,
+        request_timeout=30.0,
+        **kwargs,
+    ):
+        calls.append(list(sequences))
+        return [(pep, 1.0) for pep in sequences], score_column or "score"
+
+    monkeypatch.setattr(se, "_fetch_scores_batch", fake_fetch_scores_batch)
+    cache_path = str(tmp_path / "scores.sqlite")
+
+    first = se.apply_peptide_errors_scored(["AAA", "BBB"], score_cache_path=cache_path, seed=1)
+    second = se.apply_peptide_errors_scored(
+        ["BBB", "AAA", "CCC"], score_cache_path=cache_path, seed=1
+    )
+    third = se.apply_peptide_errors_scored(["CCC", "AAA"], score_cache_path=cache_path, seed=1)
+
+    assert calls == [["AAA", "BBB"], ["CCC"]]
+    # Q = 1.0 means no errors, so the pools pass through unchanged.
+    assert first == ["AAA", "BBB"]
+    assert second == ["BBB", "AAA", "CCC"]
+    assert third == ["CCC", "AAA"]
+    assert se.get_last_score_stats()["score_cache_hits"] == 2.0
+
+
+def test_scored_errors_submit_each_distinct_peptide_once(monkeypatch):
+    submitted = []
+
+    def fake_fetch_scores_chunked(sequences, score_column, score_label, **kwargs):
+        submitted.append(list(sequences))
+        # No peptide column: scores follow submission order.
+        return [("", 1.0 - idx / 10.0) for idx in range(len(sequences))]
+
+    monkeypatch.setattr(se, "_fetch_scores_chunked", fake_fetch_scores_chunked)
+
+    peptides = ["AAA", "BBB", "AAA", "", "CCC", "BBB", "AAA"]
+    out = se.apply_peptide_errors_scored(peptides, seed=3)
+
+    assert submitted == [["AAA", "BBB", "CCC"]]
+    assert out[0] == "AAA"  # Q = 1.0 for the first distinct sequence
+    stats = se.get_last_score_stats()
+    assert stats["score_unique_peptides"] == 3.0
+    assert stats["score_dedup_ratio"] == 3 / 6
+    assert stats["score_mean"] == pytest.approx((1.0 * 3 + 0.9 * 2 + 0.8) / 6)
+
+
+def test_fetch_scores_chunked_runs_batches_concurrently(monkeypatch):
+    peptides = [f"P{i:02d}" for i in range(12)]
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def fake_fetch_scores_batch(
+        sequences,
+        score_column,
+        score_label,
+        retry_sleep=1.0,
+        max_sleep=30.0,
+        request_timeout=30.0,
+        **kwargs,
+    ):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return [(pep, 0.5) for pep in sequences], score_column
+
+    monkeypatch.setattr(se, "_fetch_scores_batch", fake_fetch_scores_batch)
+
+    rows = se._fetch_scores_chunked(
+        peptides,
+        score_column="score",
+        score_label=None,
+        max_sequences_per_batch=2,
+        max_payload_bytes=10_000,
+        max_concurrency=3,
+    )
+
+    assert peak[0] == 3
+    assert [pep for pep, _ in rows] == peptides
+
+
+def test_local_standin_matches_heuristic_provider(monkeypatch, tmp_path):
+    from src.error_model.pepsysco_standin import serve_in_background
+    from src.error_model.score_archive import ScoreArchive
+    from src.error_model.score_providers import HeuristicScoreProvider, get_score_provider
+
+    monkeypatch.chdir(tmp_path)  # score CSV dumps land under ./reports
+    server = serve_in_background()
+    try:
+        peptides = ["AVLSTFYE", "EEEEEEEE", "VVVVLLLL", "STSTSTST", "AVLSTFYE"]
+        provider = get_score_provider("local", server.base_url)
+        rows = se._fetch_scores_chunked(
+            peptides,
+            score_column=None,
+            score_label="standin",
+            max_sequences_per_batch=2,
+            provider=provider,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    archives = list((tmp_path / "reports" / "pepsysco").glob("scores_*.csv.gz"))
+    assert len(archives) == 1
+    archive = ScoreArchive(archives[0])
+    assert [entry["label"] for entry in archive.read_index()] == [
+        "standin_chunk001",
+        "standin_chunk002",
+        "standin_chunk003",
+    ]
+    assert archive.read_batch(2).splitlines()[1].startswith("AVLSTFYE,")
+    with gzip.open(archives[0], "rt", encoding="utf-8") as handle:
+        assert sum(1 for line in handle if not line.startswith("peptide,")) == len(peptides)
+
+    heuristic = HeuristicScoreProvider()
+    assert [pep for pep, _ in rows] == peptides
+    assert [score for _, score in rows] == pytest.approx(
+        [heuristic.score(pep) for pep in peptides], abs=1e-6
+    )
+    assert heuristic.score("EEEEEEEE") < heuristic.score("STSTSTST")
+
+
+def test_form_provider_cache_namespace_follows_base_url():
+    from src.error_model.score_providers import PepsyscoFormProvider, get_score_provider
+
+    assert get_score_provider("pepsysco").cache_namespace == ""
+    assert get_score_provider("pepsysco", "HTTPS://tools.iedb.org/").cache_namespace == ""
+    mirror = get_score_provider("pepsysco", "https://mirror.example.org/pepsysco/")
+    assert mirror.cache_namespace == "pepsysco:https://mirror.example.org/pepsysco"
+    local = get_score_provider("local")
+    assert local.cache_namespace == "local:http://127.0.0.1:8765"
+    assert get_score_provider("local", "http://127.0.0.1:9000").cache_namespace != local.cache_namespace
+    assert PepsyscoFormProvider("http://Scores.Example.org").cache_namespace == "pepsysco:http://scores.example.org"
+
+
+def test_score_provider_without_fetch_batch_fails_at_construction():
+    from src.error_model.score_providers import ScoreProvider
+
+    class Incomplete(ScoreProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_heuristic_provider_runs_offline(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("network access attempted")
+
+    monkeypatch.setattr(se, "_fetch_scores_batch", no_network)
+    out = se.apply_peptide_errors_scored(["AVLSTFYE"] * 4, score_provider="heuristic", seed=7)
+
+    assert len(out) <= 4
+    assert se.get_last_score_stats()["score_dedup_ratio"] == 0.25
+
+
+def _reference_scored_corruption(peptides, scores, seed, drop_empty, loss_mode, alphabet="AVLSTFYE"):
+    """The per-peptide helper chain the scored model used before it was fused."""
+    import random
+
+    from src.error_model.drop import drop_amino_acids, drop_peptides
+    from src.error_model.insert import insert_aa_random_position
+    from src.error_model.mutate import mutate_peptides
+    from src.error_model.shuffle import shuffle_amino_acids
+
+    rng = random.Random(seed)
+    out = []
+    for peptide in peptides:
+        p_val = (1.0 - scores[peptide]) * 0.02
+        if p_val <= 0.0:
+            out.append(peptide)
+            continue
+        drop = drop_peptides if loss_mode == "peptide" else drop_amino_acids
+        current = drop([peptide], loss_prob=p_val, rng=rng, drop_empty=drop_empty)
+        if not current:
+            continue
+        current = mutate_peptides(current, mutation_prob=p_val / 2, alphabet=alphabet, rng=rng)
+        current = insert_aa_random_position(current, insertion_prob=p_val / 2, alphabet=alphabet, rng=rng)
+        current = shuffle_amino_acids(current, shuffle_prob=p_val / 2, rng=rng, passes=2)
+        out.extend(current)
+    return out
+
+
+@pytest.mark.parametrize("loss_mode,drop_empty", [("aa", True), ("aa", False), ("peptide", False)])
+def test_scored_corruption_matches_helper_chain(monkeypatch, tmp_path, loss_mode, drop_empty):
+    import random
+
+    rng = random.Random(11)
+    peptides = ["".join(rng.choice("AVLSTFYE") for _ in range(6)) for _ in range(300)]
+    # Low scores so every error type fires, plus a few zero-error peptides.
+    scores = {pep: rng.choice([-40.0, -20.0, 0.5, 1.0]) for pep in peptides}
+
+    def fake_fetch_scores_chunked(sequences, score_column, score_label, **kwargs):
+        return [(pep, scores[pep]) for pep in sequences]
+
+    monkeypatch.setattr(se, "_fetch_scores_chunked", fake_fetch_scores_chunked)
+    trace_path = tmp_path / "trace.jsonl"
+
+    out = se.apply_peptide_errors_scored(
+        peptides,
+        seed=5,
+        drop_empty=drop_empty,
+        loss_mode=loss_mode,
+        shuffle_passes=2,
+        event_level="trace",
+        trace_path=str(trace_path),
+        trace_sample_rate=1.0,
+    )
+
+    assert out == _reference_scored_corruption(peptides, scores, 5, drop_empty, loss_mode)
+    stats = se.get_last_score_stats()
+    assert stats["error_intact"] + stats["error_corrupted"] + stats["error_dropped"] == len(peptides)
+    assert stats["error_corrupted"] > 0
+    assert len(trace_path.read_text(encoding="utf-8").splitlines()) == len(peptides)
+
+
+def test_parse_score_rows_streams_lines_into_typed_scores():
+    lines = iter(["seq,len,prob", "", "AAA,3,0.25", "BBB,3,0.75"])
+    peptide_column, score_column, rows = se._parse_score_rows(lines, None)
+
+    assert (peptide_column, score_column) == ("seq", "prob")
+    assert rows.scores.typecode == "d"
+    assert list(rows) == [("AAA", 0.25), ("BBB", 0.75)]
@@ -0,0 +1,156 @@
+import random
+
+import pytest
+
+from src.encoding_schemes.yin_yang import (
+    YY_AA_TO_BITS,
+    YY_PAIRS,
+    YinYangEncoded,
+    _AROMATIC,
+    _STRONG_HYDROPHOBIC,
+    _rule_caps,
+    yin_yang_decode,
+    yin_yang_encode,
+)
+from src.pipeline.config import PipelineConfig
+from src.utils.bits_bytes_utils import bitstring_to_bytes
+
+
+def _suffix_run(current, predicate, candidate):
+    if not predicate(candidate):
+        return 0
+    run = 1
+    for ch in reversed(current):
+        if not predicate(ch):
+            break
+        run += 1
+    return run
+
+
+def _reference_penalty(aa, current, aro_cap, e_cap):
+    # The rules as originally written: rescan the payload built so far.
+    pen = 0.0
+    if _suffix_run(current, lambda x: x == aa, aa) > 2:
+        pen += 1000.0
+    if _suffix_run(current, lambda x: x in _STRONG_HYDROPHOBIC, aa) > 2:
+        pen += 1000.0
+    if _suffix_run(current, lambda x: x == "E", aa) > 2:
+        pen += 1000.0
+    if sum(ch in _AROMATIC for ch in current) + (aa in _AROMATIC) > aro_cap:
+        pen += 1000.0
+    if current.count("E") + (aa == "E") > e_cap:
+        pen += 1000.0
+    pen += 1.0 if aa in _STRONG_HYDROPHOBIC else 0.0
+    pen += 0.5 if aa in _AROMATIC else 0.0
+    pen += 0.2 if aa == "E" else 0.0
+    pen -= 0.2 if aa in {"S", "T"} else 0.0
+    pen += 0.8 if current and aa == current[-1] else 0.0
+    return pen
+
+
+def _reference_payload(data, payload_len):
+    bits = "".join(f"{byte:08b}" for byte in data)
+    aro_cap, e_cap = _rule_caps(payload_len)
+    peptides, current = [], ""
+    for i in range(0, len(bits), 2):
+        a0, a1 = YY_PAIRS[bits[i:i + 2]]
+        p0 = _reference_penalty(a0, current, aro_cap, e_cap)
+        p1 = _reference_penalty(a1, current, aro_cap, e_cap)
+        current += a0 if p0 <= p1 else a1
+        if len(current) == payload_len:
+            peptides.append(current)
+            current = ""
+    return peptides + ([current] if current else [])
+
+
+@pytest.mark.parametrize("peptide_length", [1, 3, 7, 18, 40])
+def test_incremental_state_matches_rescanning_rules(peptide_length):
+    rng = random.Random(peptide_length)
+    cfg = PipelineConfig(peptide_length=peptide_length)
+    inputs = [
+        bytes(rng.getrandbits(8) for _ in range(600)),
+        b"\x00" * 300,  # forces E/F runs past every cap
+        bytes(rng.choice([0x00, 0x55, 0xAA, 0xFF]) for _ in range(600)),
+    ]
+    for data in inputs:
+        encoded = yin_yang_encode(data, cfg)
+        assert encoded.peptides == _reference_payload(data, peptide_length)
+        assert yin_yang_decode(encoded) == data
+
+
+def test_transducer_is_compiled_once_per_payload_length():
+    from src.encoding_schemes.yin_yang import _transducer
+
+    assert _transducer(18) is _transducer(18)
+    assert _transducer(18) is not _transducer(17)
+    # A single-residue peptide resets the state after every symbol.
+    assert _transducer(1).state_count == 1
+
+
+def _reference_cost(peptide, aro_cap, e_cap):
+    return sum(_reference_penalty(aa, peptide[:i], aro_cap, e_cap) for i, aa in enumerate(peptide))
+
+
+def test_optimal_mode_reaches_brute_force_minimum():
+    import itertools
+
+    payload_len = 7
+    aro_cap, e_cap = _rule_caps(payload_len)
+    rng = random.Random(7)
+    data = bytes(rng.choice([0x00, 0x0F, 0xF0, rng.getrandbits(8)]) for _ in range(40))
+    greedy = yin_yang_encode(data, PipelineConfig(peptide_length=payload_len))
+    optimal = yin_yang_encode(data, PipelineConfig(peptide_length=payload_len, yin_yang_mode="optimal"))
+    assert yin_yang_decode(optimal) == data
+    assert optimal.violations <= greedy.violations
+
+    bits = "".join(f"{byte:08b}" for byte in data)
+    pairs = [YY_PAIRS[bits[i:i + 2]] for i in range(0, len(bits), 2)]
+    for n, peptide in enumerate(optimal.peptides):
+        chunk = pairs[n * payload_len:(n + 1) * payload_len]
+        best = min(_reference_cost("".join(choice), aro_cap, e_cap) for choice in itertools.product(*chunk))
+        assert _reference_cost(peptide, aro_cap, e_cap) == pytest.approx(best)
+
+
+def test_beam_mode_and_unknown_mode():
+    data = bytes(range(256))
+    exact = yin_yang_encode(data, PipelineConfig(yin_yang_mode="optimal"))
+    beam = yin_yang_encode(data, PipelineConfig(yin_yang_mode="optimal", yin_yang_beam_width=4))
+    greedy = yin_yang_encode(data, PipelineConfig())
+    assert yin_yang_decode(beam) == data
+    assert exact.violations <= beam.violations
+    assert exact.violations <= greedy.violations
+
+    with pytest.raises(ValueError):
+        yin_yang_encode(data, PipelineConfig(yin_yang_mode="fastest"))
+
+
+@pytest.mark.parametrize("payload_len", [18, 7])
+@pytest.mark.parametrize("mode", ["greedy", "optimal"])
+def test_chunked_encoding_matches_serial(payload_len, mode):
+    data = random.Random(payload_len).randbytes(3000)
+    serial = yin_yang_encode(data, PipelineConfig(peptide_length=payload_len, yin_yang_mode=mode))
+    chunked = yin_yang_encode(
+        data,
+        PipelineConfig(
+            peptide_length=payload_len,
+            yin_yang_mode=mode,
+            yin_yang_workers=2,
+            yin_yang_chunk_bytes=500,
+        ),
+    )
+    assert chunked.peptides == serial.peptides
+    assert chunked.violations == serial.violations
+    assert yin_yang_decode(chunked) == data
+
+
+def test_table_decoder_matches_bitstring_reference():
+    rng = random.Random(3)
+    residues = "".join(rng.choice(sorted(YY_AA_TO_BITS)) for _ in range(4 * 500))
+    peptides = [residues[i:i + 18] for i in range(0, len(residues), 18)]
+    encoded = YinYangEncoded(peptides=peptides, pad_bits=0, peptide_length=18, index_aa_length=0, original_size_bytes=490)
+    reference = bitstring_to_bytes("".join(YY_AA_TO_BITS[aa] for aa in residues))
+    assert yin_yang_decode(encoded) == reference[:490]
+
+    for bad in (["FEYX"], ["FEY\u00e9"], ["FEY"]):
+        with pytest.raises(ValueError):
+            yin_yang_decode(YinYangEncoded(peptides=bad, pad_bits=0, peptide_length=4, index_aa_length=0, original_size_bytes=1))